@@ -0,0 +1,227 @@
+"""无界面批处理入口：导入 → 离散化 → 距离 → MDS 降维 → 导出。
+
+只依赖 ``core`` 模块，不导入 Qt，可在服务器或定时任务中运行。多个输入文件由进程池并发处理，
+每个文件的结果写成一个会话文件（可在界面中通过“打开会话”直接加载）。
+
+示例::
+
+    python batch.py data/*.csv -o results --methods euclidean information --jobs 4
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import as_completed
+
+from core.loader import upload
+from core.distance import compute_distance_matrix, discretize as discretize_data, DISCRETIZERS
+from core.reduction import reduce_dimension
+from core.session import save_session
+from core.runtime import configure, process_pool
+from core.trace import TRACER, span, export_chrome_trace
+
+
+# 各阶段的显示顺序
+STAGE_ORDER = ("load", "discretize", "euclidean", "information", "reduce", "export")
+
+
+def run_pipeline(path: str, output_dir: str, methods: list, sigma: float, bins: int,
+                 reduce_on: str, discretize: bool, trace: bool = False, strategy: str = "auto",
+                 budget=None, k: int = 10, sketch: int = None, job_dir: str = None,
+                 discretizer: str = "gaussian") -> dict:
+    """处理单个输入文件，返回输出路径与各阶段耗时。
+
+    Args:
+        path: 输入 CSV/TXT 路径。
+        output_dir: 输出目录。
+        methods: 要计算的距离，``"euclidean"`` 和/或 ``"information"``。
+        sigma: 高斯离散化的标准差。
+        bins: 离散等级数量。
+        reduce_on: 用于 MDS 的距离，``"euclidean"``、``"information"`` 或 ``"none"``。
+        discretize: 是否额外保存离散化数据。
+        trace: 是否返回本文件的跨度记录（Chrome trace 事件）。
+        strategy: 距离的执行策略，见 :func:`core.planner.plan_distance`。
+        budget: 内存预算（字节数或 ``"4G"``），None 时取运行配置的预算（见 :mod:`core.runtime`）。
+        k: topk 策略保留的近邻数。
+        sketch: 给定时欧氏距离改用 sketch 维的随机投影近似计算，见 :mod:`core.sketch`。
+        job_dir: 给定时每种距离在其下的 ``<文件名>.<方法>`` 子目录中分块计算并记录进度，
+            中断后重新运行同一命令会从未完成的分块继续，见 :mod:`core.checkpoint`。
+        discretizer: 离散化方法（信息距离与保存的离散化数据），见 :func:`core.distance.discretize`。
+
+    Returns:
+        dict: ``{"input", "output", "timings", "notes", "events"}``，timings 为阶段名 → 秒，
+        notes 为需要提示的说明（如近似误差），events 在 trace 为 False 时为空列表。
+    """
+    # 进程池会复用工作进程，先清掉上一个文件的记录
+    TRACER.clear()
+    TRACER.enabled = trace
+    timings = {}
+    stages = {}
+    params = {}
+    notes = []
+
+    def timed(stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        with span(f"batch.{stage}", input=os.path.basename(path)):
+            result = fn(*args, **kwargs)
+        timings[stage] = time.perf_counter() - start
+        return result
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    jobs = {method: os.path.join(job_dir, f"{stem}.{method}") if job_dir else None for method in methods}
+    data = timed("load", upload, path)
+    stages["data"] = data
+
+    if discretize:
+        stages["discretized_data"] = timed("discretize", discretize_data, data, discretizer, sigma=sigma, bins=bins)
+        params["discretized_data"] = ({"sigma": sigma, "bins": bins, "return_zscore": True}
+                                      if discretizer == "gaussian" else {"discretizer": discretizer, "bins": bins})
+
+    if "euclidean" in methods:
+        stages["eudistance"] = timed("euclidean", compute_distance_matrix, data, method="euclidean",
+                                     strategy=strategy, budget=budget, k=k, sketch=sketch,
+                                     job_dir=jobs["euclidean"])
+        params["eudistance"] = {"method": "euclidean", "strategy": strategy}
+        if sketch is not None:
+            params["eudistance"]["sketch"] = sketch
+            report = stages["eudistance"].attrs.get("sketch") if hasattr(stages["eudistance"], "attrs") else None
+            if report:
+                notes.append(report["describe"])
+    if "information" in methods:
+        stages["infodistance"] = timed("information", compute_distance_matrix, data, method="information",
+                                       sigma=sigma, bins=bins, strategy=strategy, budget=budget, k=k,
+                                       job_dir=jobs["information"], discretizer=discretizer)
+        params["infodistance"] = {"method": "information", "sigma": sigma, "bins": bins, "return_zscore": True,
+                                  "strategy": strategy}
+        if discretizer != "gaussian":
+            params["infodistance"]["discretizer"] = discretizer
+
+    source = {"euclidean": "eudistance", "information": "infodistance"}.get(reduce_on)
+    # topk 的稀疏结果不是方阵，无法做 MDS
+    if source in stages and stages[source].shape[0] == stages[source].shape[1]:
+        stages["coordinates"] = timed("reduce", reduce_dimension, stages[source])
+        params["coordinates"] = {"method": "mds", "n_components": 2, "random_state": 42, "source": source}
+
+    output = os.path.join(output_dir, f"{stem}.corr")
+    timed("export", save_session, output, stages, params)
+    return {"input": path, "output": output, "timings": timings, "notes": notes,
+            "events": TRACER.events() if trace else []}
+
+
+def duplicate_stems(inputs: list) -> dict:
+    """输出文件（与作业目录）按输入的文件名主干命名，返回主干相同的输入 ``{主干: [路径, ...]}``。
+
+    如 ``a/x.csv`` 与 ``b/x.csv``、``x.csv`` 与 ``x.txt`` 都会写到同一个 ``x.corr``，并行时互相覆盖。
+    """
+    groups = {}
+    for path in inputs:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        groups.setdefault(os.path.normcase(stem), []).append(path)
+    return {stem: paths for stem, paths in groups.items() if len(paths) > 1}
+
+
+def print_summary(results: list, wall: float) -> None:
+    """打印每个文件及汇总的分阶段耗时表。"""
+    stages = [s for s in STAGE_ORDER if any(s in r["timings"] for r in results)]
+    name_width = max([len("文件")] + [len(os.path.basename(r["input"])) for r in results])
+
+    header = f"{'文件':<{name_width}}" + "".join(f"{s:>13}" for s in stages) + f"{'total':>13}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        cells = "".join(f"{r['timings'].get(s, 0.0):>12.3f}s" for s in stages)
+        print(f"{os.path.basename(r['input']):<{name_width}}{cells}{sum(r['timings'].values()):>12.3f}s")
+
+    if len(results) > 1:
+        print("-" * len(header))
+        for label, agg in (("sum", sum), ("max", max)):
+            cells = "".join(f"{agg(r['timings'].get(s, 0.0) for r in results):>12.3f}s" for s in stages)
+            total = agg(sum(r["timings"].values()) for r in results)
+            print(f"{label:<{name_width}}{cells}{total:>12.3f}s")
+    print(f"墙钟时间: {wall:.3f}s")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="相关性分析批处理：导入 → 离散化 → 距离 → 降维 → 导出")
+    parser.add_argument("inputs", nargs="+", help="输入的 CSV/TXT 文件")
+    parser.add_argument("-o", "--output-dir", default=".", help="输出目录（默认当前目录）")
+    parser.add_argument("--methods", nargs="+", choices=("euclidean", "information"),
+                        default=["euclidean", "information"], help="要计算的距离")
+    parser.add_argument("--sigma", type=float, default=1.0, help="高斯离散化的标准差")
+    parser.add_argument("--bins", type=int, default=13, help="离散等级数量")
+    parser.add_argument("--discretizer", choices=DISCRETIZERS, default="gaussian",
+                        help="离散化方法：高斯核（默认）、按行等频（quantile）或全局等宽网格（grid）")
+    parser.add_argument("--reduce-on", choices=("euclidean", "information", "none"), default="euclidean",
+                        help="用于 MDS 降维的距离")
+    parser.add_argument("--discretize", action="store_true", help="同时保存离散化数据")
+    parser.add_argument("--strategy", choices=("auto", "dense", "tiled", "topk"), default="auto",
+                        help="距离的执行策略，auto 按内存预算自动选择")
+    parser.add_argument("--memory-budget", help="每个进程的内存预算，如 4G；默认把 CORR_MEMORY_BUDGET "
+                                                "或可用内存的一半平分给各进程")
+    parser.add_argument("--top-k", type=int, default=10, help="topk 策略保留的近邻数")
+    parser.add_argument("--sketch", type=int, metavar="K",
+                        help="欧氏距离改用 K 维稀疏随机投影近似计算（样本列极多时使用），默认精确计算")
+    parser.add_argument("--job-dir", metavar="DIR",
+                        help="在 DIR 中分块记录距离计算的进度，中断后重新运行同一命令从未完成的分块继续")
+    parser.add_argument("--trace", metavar="PATH", help="把所有文件的分阶段跨度导出为 Chrome trace JSON")
+    parser.add_argument("-j", "--jobs", type=int,
+                        help="并发处理的文件数（进程数），默认 CORR_WORKERS 或 CPU 核数")
+    parser.add_argument("--blas-threads", type=int,
+                        help="每个进程内 BLAS/OpenMP 的线程数，默认 CORR_BLAS_THREADS 或 CPU 核数 ÷ 进程数")
+    parser.add_argument("--scratch-dir", help="分块写盘结果的临时目录，默认 CORR_SCRATCH_DIR 或系统临时目录")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    duplicates = duplicate_stems(args.inputs)
+    if duplicates:
+        for stem, paths in duplicates.items():
+            print(f"[失败] 输出 {stem}.corr 对应多个输入：{'、'.join(paths)}，请重命名后再运行", file=sys.stderr)
+        return 2
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    overrides = {"workers": args.jobs, "blas_threads": args.blas_threads, "scratch_dir": args.scratch_dir}
+    try:
+        config = configure(**{name: value for name, value in overrides.items() if value is not None})
+    except (TypeError, ValueError) as e:
+        print(f"[失败] {e}", file=sys.stderr)
+        return 2
+    jobs = max(1, min(config.n_workers, len(args.inputs)))
+    # 子进程的运行配置由进程池按进程数分摊：未指定 --memory-budget 时各自取总预算的 1/jobs
+    budget = args.memory_budget
+    results, failed = [], 0
+    start = time.perf_counter()
+    with process_pool(jobs) as pool:
+        futures = {
+            pool.submit(run_pipeline, path, args.output_dir, args.methods, args.sigma, args.bins,
+                        args.reduce_on, args.discretize, bool(args.trace), args.strategy,
+                        budget, args.top_k, args.sketch, args.job_dir, args.discretizer): path
+            for path in args.inputs
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"[失败] {path}: {e}", file=sys.stderr)
+            else:
+                results.append(result)
+                print(f"[完成] {path} → {result['output']}")
+                for note in result["notes"]:
+                    print(f"       {note}")
+    wall = time.perf_counter() - start
+
+    if results:
+        results.sort(key=lambda r: args.inputs.index(r["input"]))
+        print_summary(results, wall)
+    if args.trace:
+        TRACER.clear()
+        export_chrome_trace(args.trace, [e for r in results for e in r["events"]])
+        print(f"Trace 已写入 {args.trace}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
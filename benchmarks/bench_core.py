@@ -0,0 +1,368 @@
+"""core 模块的性能基准。
+
+覆盖高斯离散化、信息距离、欧氏距离、MDS 降维以及 CSV 导入/导出，数据由合成数据生成器
+按变量数、样本数、离散等级数的网格生成。每个用例记录墙钟时间、峰值内存与吞吐量，
+结果写成 JSON；``--compare`` 与保存的基线对比并标出回退；每个用例还会在小规模数据上
+与本文件中的参考实现做正确性校验。
+
+示例::
+
+    python benchmarks/bench_core.py --scale small -o bench.json
+    python benchmarks/bench_core.py --scale small --compare bench.json --threshold 0.2
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.loader import upload, download
+from core.distance import gaussian_discretization, information_distance, compute_distance_matrix
+from core.reduction import reduce_dimension
+
+
+# 规模预设：(变量数, 样本数) 网格与离散等级
+SCALES = {
+    "small": {"vars": [50, 100], "samples": [100, 500], "bins": [7, 13]},
+    "medium": {"vars": [500, 1000], "samples": [500, 2000], "bins": [7, 13]},
+    "large": {"vars": [2000, 5000], "samples": [1000, 5000], "bins": [13]},
+}
+CHECK_VARS = 40      # 正确性校验使用的变量数
+CHECK_SAMPLES = 60   # 正确性校验使用的样本数
+MIN_WALL = 0.01      # 低于该耗时（秒）的用例计时噪声过大，对比时不判定时间回退
+
+
+def make_data(n_vars: int, n_samples: int, n_factors: int = 5, nan_frac: float = 0.0,
+              seed: int = 0) -> pd.DataFrame:
+    """生成带潜在因子结构的合成数据（行=变量，列=样本）。
+
+    Args:
+        n_vars: 变量数。
+        n_samples: 样本数。
+        n_factors: 潜在因子数，变量之间由此产生相关性。
+        nan_frac: 缺失值比例。
+        seed: 随机种子。
+
+    Returns:
+        pandas.DataFrame: 合成数据，行索引 ``v0…``，列名 ``s0…``。
+    """
+    rng = np.random.default_rng(seed)
+    loadings = rng.normal(size=(n_vars, n_factors))
+    factors = rng.normal(size=(n_factors, n_samples))
+    data = loadings @ factors + rng.normal(scale=0.5, size=(n_vars, n_samples))
+    if nan_frac > 0:
+        data[rng.random(data.shape) < nan_frac] = np.nan
+    return pd.DataFrame(data,
+                        index=[f"v{i}" for i in range(n_vars)],
+                        columns=[f"s{j}" for j in range(n_samples)])
+
+
+# ---------------------------------------------------------------- 参考实现
+# 以下实现是基准建立时 core 中的算法原样保留，用来校验后续优化结果是否一致。
+
+def reference_gaussian_discretization(df: pd.DataFrame, sigma: float = 1.0, bins: int = 7) -> pd.DataFrame:
+    data = df.to_numpy()
+    mu = data.mean(axis=1)
+    std = data.std(axis=1)
+    zero_std_mask = std < 1e-12
+    std_safe = std.copy()
+    std_safe[zero_std_mask] = 1.0
+    z_centers = np.linspace(-3, 3, bins)
+    centers = mu[None, :] + std_safe[None, :] * z_centers[:, None]
+    diff = data[:, None, :] - centers.T[:, :, None]
+    weights = np.exp(-0.5 * (diff / sigma) ** 2)
+    idx = np.argmax(weights, axis=1)
+    result = z_centers[idx]
+    result[zero_std_mask, :] = 0
+    return pd.DataFrame(result, index=df.index, columns=df.columns)
+
+
+def reference_information_distance(discrete_df: pd.DataFrame, base: float = 2.0) -> pd.DataFrame:
+    from scipy.stats import entropy
+
+    X = np.stack([pd.factorize(row, sort=False)[0].astype(np.int64) for _, row in discrete_df.iterrows()])
+    n = X.shape[0]
+    out = np.zeros((n, n))
+    for i in range(n):
+        for j in range(i, n):
+            xi, xj = X[i], X[j]
+            m = (xi >= 0) & (xj >= 0)
+            xi, xj = xi[m], xj[m]
+            if xi.size == 0:
+                vij = np.nan
+            elif i == j:
+                vij = 0.0
+            else:
+                cont = np.zeros((xi.max() + 1, xj.max() + 1), dtype=np.int64)
+                np.add.at(cont, (xi, xj), 1)
+                vij = (2 * entropy(cont.ravel(), base=base)
+                       - entropy(cont.sum(axis=1), base=base) - entropy(cont.sum(axis=0), base=base))
+            out[i, j] = out[j, i] = vij
+    return pd.DataFrame(out, index=discrete_df.index, columns=discrete_df.index)
+
+
+def reference_euclidean(df: pd.DataFrame) -> pd.DataFrame:
+    from scipy.spatial.distance import cdist
+
+    X = df.to_numpy()
+    return pd.DataFrame(cdist(X, X), index=df.index, columns=df.index)
+
+
+def _max_abs_diff(a: pd.DataFrame, b: pd.DataFrame) -> float:
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    if a.shape != b.shape:
+        return float("inf")
+    both_nan = np.isnan(a) & np.isnan(b)
+    return float(np.nanmax(np.where(both_nan, 0.0, np.abs(a - b)))) if a.size else 0.0
+
+
+# ---------------------------------------------------------------- 用例
+# 每个用例：setup(params) 返回被测函数的参数；run(*args) 执行；work(params) 给出吞吐量的工作量；
+# check() 在小规模数据上返回与参考实现的最大偏差。
+
+def _case_discretize():
+    def setup(p):
+        return (make_data(p["vars"], p["samples"]), p["bins"])
+
+    def run(df, bins):
+        return gaussian_discretization(df, bins=bins)
+
+    def check():
+        df = make_data(CHECK_VARS, CHECK_SAMPLES, seed=1)
+        return _max_abs_diff(gaussian_discretization(df, bins=7), reference_gaussian_discretization(df, bins=7))
+
+    return {"name": "gaussian_discretization", "grid": ("vars", "samples", "bins"),
+            "setup": setup, "run": run, "check": check,
+            "work": lambda p: p["vars"] * p["samples"], "unit": "cells/s"}
+
+
+def _case_information():
+    def setup(p):
+        return (gaussian_discretization(make_data(p["vars"], p["samples"]), bins=p["bins"]),)
+
+    def run(disc):
+        return information_distance(disc)
+
+    def check():
+        disc = gaussian_discretization(make_data(CHECK_VARS, CHECK_SAMPLES, seed=2), bins=7)
+        return _max_abs_diff(information_distance(disc), reference_information_distance(disc))
+
+    return {"name": "information_distance", "grid": ("vars", "samples", "bins"),
+            "setup": setup, "run": run, "check": check,
+            "work": lambda p: p["vars"] * (p["vars"] - 1) // 2, "unit": "pairs/s"}
+
+
+def _case_euclidean():
+    def setup(p):
+        return (make_data(p["vars"], p["samples"]),)
+
+    def run(df):
+        return compute_distance_matrix(df, method="euclidean")
+
+    def check():
+        df = make_data(CHECK_VARS, CHECK_SAMPLES, seed=3)
+        return _max_abs_diff(compute_distance_matrix(df, method="euclidean"), reference_euclidean(df))
+
+    return {"name": "euclidean_distance", "grid": ("vars", "samples"),
+            "setup": setup, "run": run, "check": check,
+            "work": lambda p: p["vars"] * (p["vars"] - 1) // 2, "unit": "pairs/s"}
+
+
+def _case_reduce():
+    def setup(p):
+        return (reference_euclidean(make_data(p["vars"], 50)),)
+
+    def run(dist):
+        return reduce_dimension(dist)
+
+    def check():
+        # MDS 是迭代优化，校验坐标间距离与输入距离的相关性足够高
+        dist = reference_euclidean(make_data(CHECK_VARS, 10, seed=4))
+        coords = reduce_dimension(dist).to_numpy()
+        from scipy.spatial.distance import pdist, squareform
+        r = np.corrcoef(pdist(coords), squareform(dist.to_numpy(), checks=False))[0, 1]
+        return float(1.0 - r)
+
+    return {"name": "reduce_dimension", "grid": ("vars",),
+            "setup": setup, "run": run, "check": check, "check_tol": 0.1,
+            "work": lambda p: p["vars"], "unit": "points/s"}
+
+
+def _case_io():
+    def setup(p):
+        return (make_data(p["vars"], p["samples"]),)
+
+    def run(df):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.csv")
+            download(df, path)
+            return upload(path)
+
+    def check():
+        df = make_data(CHECK_VARS, CHECK_SAMPLES, seed=5)
+        return _max_abs_diff(run(df), df)
+
+    return {"name": "upload_download", "grid": ("vars", "samples"),
+            "setup": setup, "run": run, "check": check,
+            "work": lambda p: p["vars"] * p["samples"], "unit": "cells/s"}
+
+
+CASES = [_case_discretize, _case_information, _case_euclidean, _case_reduce, _case_io]
+
+
+def _grid(scale: dict, keys: tuple) -> list:
+    """按用例需要的维度展开参数网格"""
+    combos = [{}]
+    for key in keys:
+        combos = [dict(c, **{key: v}) for c in combos for v in scale[key]]
+    return combos
+
+
+def measure(fn, args: tuple, repeat: int) -> tuple:
+    """返回 (墙钟时间中位数, 峰值内存字节)。内存在单独一次 tracemalloc 运行中测量，不影响计时。"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return float(np.median(times)), int(peak)
+
+
+def run_suite(scale_name: str, repeat: int, only: list = None, check: bool = True) -> dict:
+    scale = SCALES[scale_name]
+    cases = [make_case() for make_case in CASES]
+    if only:
+        unknown = set(only) - {case["name"] for case in cases}
+        if unknown:
+            raise ValueError(f"未知的用例: {', '.join(sorted(unknown))}，可选 {', '.join(c['name'] for c in cases)}")
+    results, failed_checks = [], []
+    for case in cases:
+        if only and case["name"] not in only:
+            continue
+
+        check_error = None
+        if check:
+            check_error = case["check"]()
+            ok = check_error <= case.get("check_tol", 1e-9)
+            if not ok:
+                failed_checks.append(case["name"])
+            print(f"[校验] {case['name']}: 最大偏差 {check_error:.3g} {'通过' if ok else '失败'}")
+
+        for params in _grid(scale, case["grid"]):
+            args = case["setup"](params)
+            wall, peak = measure(case["run"], args, repeat)
+            throughput = case["work"](params) / wall if wall > 0 else float("inf")
+            results.append({
+                "name": case["name"],
+                "params": params,
+                "wall_s": wall,
+                "peak_mb": peak / 2 ** 20,
+                "throughput": throughput,
+                "unit": case["unit"],
+                "check_error": check_error,
+            })
+            print(f"{case['name']:<26}{json.dumps(params):<42}{wall:>10.4f}s{peak / 2 ** 20:>10.1f} MB"
+                  f"{throughput:>14.3g} {case['unit']}")
+
+    return {
+        "meta": {
+            "scale": scale_name,
+            "repeat": repeat,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+        "failed_checks": failed_checks,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> int:
+    """与基线逐用例比较，墙钟时间或峰值内存超过基线 (1 + threshold) 倍时标为回退。
+
+    Returns:
+        int: 回退的用例数；没有任何用例能与基线对应时为 -1（对比无效）。
+    """
+    def key(r):
+        return r["name"], json.dumps(r["params"], sort_keys=True)
+
+    base = {key(r): r for r in baseline["results"]}
+    regressions = compared = 0
+    print(f"\n{'用例':<26}{'参数':<42}{'时间比':>10}{'内存比':>10}")
+    for r in current["results"]:
+        b = base.get(key(r))
+        if b is None:
+            continue
+        compared += 1
+        t_ratio = r["wall_s"] / b["wall_s"] if b["wall_s"] > 0 else 1.0
+        m_ratio = r["peak_mb"] / b["peak_mb"] if b["peak_mb"] > 0 else 1.0
+        flag = ""
+        slow = t_ratio > 1 + threshold and r["wall_s"] >= MIN_WALL
+        if slow or m_ratio > 1 + threshold:
+            flag = "  ← 回退"
+            regressions += 1
+        print(f"{r['name']:<26}{json.dumps(r['params']):<42}{t_ratio:>10.2f}{m_ratio:>10.2f}{flag}")
+    return regressions if compared else -1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="core 模块性能基准")
+    parser.add_argument("--scale", choices=tuple(SCALES), default="small", help="规模预设")
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例的计时次数（取中位数）")
+    parser.add_argument("--only", nargs="+", help="只运行指定用例")
+    parser.add_argument("--no-check", action="store_true", help="跳过正确性校验")
+    parser.add_argument("-o", "--output", help="结果 JSON 输出路径")
+    parser.add_argument("--compare", help="基线结果 JSON，对比并标出回退")
+    parser.add_argument("--threshold", type=float, default=0.2, help="回退阈值（相对基线的增幅）")
+    args = parser.parse_args(argv)
+    warnings.simplefilter("ignore", FutureWarning)
+
+    try:
+        current = run_suite(args.scale, args.repeat, args.only, check=not args.no_check)
+    except ValueError as e:
+        print(f"[失败] {e}", file=sys.stderr)
+        return 2
+    if not current["results"]:
+        # 什么都没测时不能让回退检查“通过”
+        print("[失败] 没有运行任何用例。", file=sys.stderr)
+        return 2
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+
+    status = 1 if current["failed_checks"] else 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions < 0:
+            print("\n[失败] 没有与基线对应的用例（规模或用例名不一致），无法对比。", file=sys.stderr)
+            return 2
+        print(f"\n回退用例数: {regressions}")
+        status = status or (1 if regressions else 0)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
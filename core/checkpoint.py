@@ -0,0 +1,345 @@
+"""距离计算的分块断点续算。
+
+几万个变量的 VI 要算几个小时，``compute_distance_matrix`` 中途崩溃或关闭窗口就前功尽弃。
+给定作业目录后，计算按分块进行，每块写入目录中的内存映射矩阵并在分块表中标记完成；
+再次用同一数据、同一参数运行时，只计算尚未完成的分块。作业目录的内容：
+
+- ``job.json``：输入指纹、参数、矩阵规模、分块边长与是否已完成；
+- ``core.npy``：代表变量（去重后）之间的距离矩阵，未去重时直接就是结果 ``distance.npy``；
+- ``tiles.npy``：分块完成表（bool），先落盘分块数据、再标记，崩溃时最多重算一块；
+- ``inverse.npy`` 与 ``distance.npy``：去重时的逆映射与展开后的完整结果（展开后删除 ``core.npy``）。
+
+指纹或参数与目录中的记录不一致时拒绝续算，避免把两份数据的结果拼在一起。
+
+作业目录默认由调用方保留；只需要断点续算、不需要保留结果的场合（如界面）在完成后调用
+:func:`release_job`，结果文件移到临时目录并随结果回收删除，作业目录随即删除。
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import weakref
+
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+
+from core.trace import span
+from core.planner import ITEMSIZE, KERNEL_BYTES, MAX_TILE_ROWS, kernel_block
+from core.distance import (discretize, _encode, _canonical_codes, unique_rows, _info_tiles,
+                           _euclidean_tiles, _remove_file)
+from core.sketch import sketch_frame
+from core.runtime import get_runtime
+
+JOB_VERSION = 1
+# 计算指纹时每次读入的行数
+_FINGERPRINT_ROWS = 4096
+
+
+def fingerprint(df: pd.DataFrame) -> str:
+    """输入数据的 SHA-1 指纹（形状、列名与逐行内容的哈希，含行索引），按行块计算以免整表复制"""
+    h = hashlib.sha1()
+    h.update(repr(df.shape).encode())
+    h.update(pd.util.hash_pandas_object(pd.Index(df.columns).astype(str), index=False).to_numpy().tobytes())
+    for r0 in range(0, df.shape[0], _FINGERPRINT_ROWS):
+        h.update(pd.util.hash_pandas_object(df.iloc[r0:r0 + _FINGERPRINT_ROWS], index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def default_job_dir(df: pd.DataFrame, params: dict) -> str:
+    """界面使用的作业目录：``$CORR_JOB_DIR``（默认运行配置的临时目录下的 corr_jobs）中按数据指纹与参数命名，
+    同一数据、同一参数再次计算时自然落到同一目录并续算"""
+    root = os.environ.get("CORR_JOB_DIR") or os.path.join(get_runtime().scratch_path, "corr_jobs")
+    key = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:8]
+    return os.path.join(root, f"{fingerprint(df)[:16]}-{params['method']}-{key}")
+
+
+def job_params(method: str, sigma: float = 1.0, bins: int = 13, return_zscore: bool = True, base: float = 2.0,
+               dedup: bool = True, sketch: int = None, discretizer: str = "gaussian", edges=None) -> dict:
+    """作业目录中记录、续算时需要逐项一致的参数（只保留对该方法有效的项）"""
+    params = {"method": method, "dedup": bool(dedup)}
+    if method == "information":
+        params.update(sigma=float(sigma), bins=int(bins), return_zscore=bool(return_zscore), base=float(base))
+        # 默认的高斯离散化不写入，已有的作业目录保持原来的参数
+        if discretizer != "gaussian":
+            params["discretizer"] = discretizer
+        if discretizer == "grid" and edges is not None:
+            params["edges"] = [float(e) for e in edges]
+    elif sketch is not None:
+        params["sketch"] = int(sketch)
+    return params
+
+
+def _read_meta(job_dir: str):
+    path = os.path.join(job_dir, "job.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_meta(job_dir: str, meta: dict) -> None:
+    """原子地写入 job.json（先写临时文件再替换）"""
+    path = os.path.join(job_dir, "job.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def job_status(job_dir: str):
+    """作业目录的进度 ``{"fingerprint", "params", "done", "total", "complete"}``；目录中没有作业时返回 None"""
+    meta = _read_meta(job_dir)
+    if meta is None:
+        return None
+    tiles = np.load(os.path.join(job_dir, "tiles.npy"), mmap_mode="r")
+    return {"fingerprint": meta["fingerprint"], "params": meta["params"], "done": int(tiles.sum()),
+            "total": meta["tiles"], "complete": bool(meta["complete"])}
+
+
+def _load_result(job_dir: str, meta: dict, labels: pd.Index) -> pd.DataFrame:
+    path = os.path.join(job_dir, meta["result"])
+    result = pd.DataFrame(np.load(path, mmap_mode="r"), index=labels, columns=labels, copy=False)
+    result.attrs["path"] = path
+    result.attrs["job_dir"] = job_dir
+    return result
+
+
+class DistanceJob:
+    """作业目录中的一次距离计算：准备好代表变量的数据，打开（或初始化）结果矩阵与分块完成表。
+
+    分块按 ``step`` 划分网格：信息距离为上三角的正方形块 ``(r0, r1, c0, c1)``，欧氏距离为完整的行块
+    ``(r0, r1, 0, n_core)``。:meth:`pending` 列出尚未完成的分块，:meth:`write` 写入一块并标记完成，
+    :meth:`finish` 在全部完成后展开为完整结果。单机续算见 :func:`run_job`，多机见 :mod:`core.distributed`。
+
+    Args:
+        df: 行=变量、列=样本的数值型 DataFrame（行索引为变量名）。
+        method: ``"euclidean"`` 或 ``"information"``。
+        job_dir: 作业目录，不存在时创建。
+        其余参数见 :func:`run_job`。
+
+    Attributes:
+        values: 代表变量的数据（信息距离为编码，欧氏距离为数值），工作进程据此计算分块。
+        levels: 信息距离的编码等级数（欧氏距离为 None）。
+        base: 熵的对数底。
+        step: 分块网格的 (行, 列) 边长。
+        total: 需要计算的分块总数。
+        complete: 作业是否已经完成。
+
+    Raises:
+        ValueError: method 未知，或作业目录属于另一份数据/另一组参数。
+    """
+
+    def __init__(self, df: pd.DataFrame, method: str, job_dir: str, sigma: float = 1.0, bins: int = 13,
+                 return_zscore: bool = True, base: float = 2.0, dedup: bool = True, sketch: int = None,
+                 discretizer: str = "gaussian", edges=None):
+        if method not in ("euclidean", "information"):
+            raise ValueError(f"未知的距离计算方法: {method}")
+        fp = fingerprint(df)
+        params = job_params(method, sigma, bins, return_zscore, base, dedup, sketch, discretizer, edges)
+        meta = _read_meta(job_dir)
+        if meta is not None and (meta["version"] != JOB_VERSION or meta["fingerprint"] != fp
+                                 or meta["params"] != params):
+            raise ValueError(f"作业目录 {job_dir} 属于另一份数据或另一组参数，请换一个目录或删除后重试。")
+        self.job_dir = job_dir
+        self.method = method
+        self.base = base
+        self.labels = df.index
+        self.meta = meta
+        self.values = self.levels = None
+        if self.complete:
+            return
+
+        # 准备阶段只有 O(n·m)，续算时重新做一遍
+        with span("checkpoint.prepare", n=df.shape[0]):
+            if method == "information":
+                discrete = discretize(df, discretizer, sigma=sigma, bins=bins, return_zscore=return_zscore,
+                                      edges=edges)
+                values, self.levels = _encode(discrete, True)
+                keys = _canonical_codes(values, self.levels)
+            else:
+                if sketch is not None:
+                    df = sketch_frame(df, sketch).embedding
+                values = keys = df.to_numpy(dtype=np.float64)
+            n = values.shape[0]
+            reps, self.inverse = unique_rows(keys) if dedup else (np.arange(n), np.arange(n))
+            self.values = values[reps]
+        n_core = reps.size
+
+        if meta is None:
+            os.makedirs(job_dir, exist_ok=True)
+            if method == "information":
+                step = (kernel_block(self.levels),) * 2
+            else:
+                step = (max(1, min(MAX_TILE_ROWS, KERNEL_BYTES // (ITEMSIZE * n_core))), n_core)
+            grid = (-(-n_core // step[0]), -(-n_core // step[1]))
+            identity = n_core == n
+            # 信息距离只计算上三角的分块
+            total = grid[0] * (grid[0] + 1) // 2 if method == "information" else grid[0]
+            meta = {"version": JOB_VERSION, "fingerprint": fp, "params": params, "n": n, "n_core": int(n_core),
+                    "step": list(step), "tiles": total, "result": "distance.npy",
+                    "core": "distance.npy" if identity else "core.npy", "complete": False}
+            open_memmap(os.path.join(job_dir, meta["core"]), mode="w+", dtype=np.float64,
+                        shape=(n_core, n_core)).flush()
+            open_memmap(os.path.join(job_dir, "tiles.npy"), mode="w+", dtype=bool, shape=grid).flush()
+            if not identity:
+                np.save(os.path.join(job_dir, "inverse.npy"), self.inverse)
+            # 最后写 job.json：没有它的目录会被视为新作业重新初始化
+            _write_meta(job_dir, meta)
+        elif meta["n_core"] != n_core:
+            raise ValueError(f"作业目录 {job_dir} 的记录已损坏，请删除后重试。")
+        self.meta = meta
+        self._core = np.load(os.path.join(job_dir, meta["core"]), mmap_mode="r+")
+        self._tiles = np.load(os.path.join(job_dir, "tiles.npy"), mmap_mode="r+")
+
+    @property
+    def complete(self) -> bool:
+        return self.meta is not None and self.meta["complete"]
+
+    @property
+    def step(self) -> tuple:
+        return tuple(self.meta["step"])
+
+    @property
+    def total(self) -> int:
+        return self.meta["tiles"]
+
+    @property
+    def done(self) -> int:
+        return self.total if self.complete else int(self._tiles.sum())
+
+    def is_done(self, r0: int, c0: int) -> bool:
+        """起点为 (r0, c0) 的分块是否已完成"""
+        return bool(self._tiles[r0 // self.step[0], c0 // self.step[1]])
+
+    def pending(self) -> list:
+        """尚未完成的分块 ``(r0, r1, c0, c1)``，按行优先顺序"""
+        if self.complete:
+            return []
+        n_core = self.meta["n_core"]
+        row_step, col_step = self.step
+        out = []
+        for r0 in range(0, n_core, row_step):
+            for c0 in range(r0 if self.method == "information" else 0, n_core, col_step):
+                if not self.is_done(r0, c0):
+                    out.append((r0, min(r0 + row_step, n_core), c0, min(c0 + col_step, n_core)))
+        return out
+
+    def write(self, r0: int, r1: int, c0: int, c1: int, block: np.ndarray) -> None:
+        """写入一个分块（信息距离同时镜像到下三角），落盘后再标记完成"""
+        self._core[r0:r1, c0:c1] = block
+        if self.method == "information" and c0 != r0:
+            self._core[c0:c1, r0:r1] = block.T
+        self._core.flush()
+        self._tiles[r0 // self.step[0], c0 // self.step[1]] = True
+        self._tiles.flush()
+
+    def finish(self) -> pd.DataFrame:
+        """全部分块完成后展开为完整结果并标记作业完成，返回映射自 ``distance.npy`` 的方阵。
+
+        Raises:
+            ValueError: 仍有未完成的分块。
+        """
+        if self.complete:
+            return _load_result(self.job_dir, self.meta, self.labels)
+        if self.done < self.total:
+            raise ValueError(f"作业尚未完成：{self.done}/{self.total} 个分块。")
+        meta, n = self.meta, self.meta["n"]
+        if meta["core"] != meta["result"]:
+            with span("checkpoint.expand", n=n):
+                out = open_memmap(os.path.join(self.job_dir, meta["result"]), mode="w+", dtype=np.float64,
+                                  shape=(n, n))
+                rows = max(1, min(MAX_TILE_ROWS, KERNEL_BYTES // (ITEMSIZE * n)))
+                for r0 in range(0, n, rows):
+                    out[r0:r0 + rows] = np.asarray(self._core[self.inverse[r0:r0 + rows]])[:, self.inverse]
+                out.flush()
+                del out
+        del self._core, self._tiles
+        if meta["core"] != meta["result"]:
+            # 代表变量矩阵只用于展开，完成后不再需要
+            os.remove(os.path.join(self.job_dir, meta["core"]))
+        meta["complete"] = True
+        _write_meta(self.job_dir, meta)
+        return _load_result(self.job_dir, meta, self.labels)
+
+
+@span("checkpoint.run")
+def run_job(df: pd.DataFrame, method: str, job_dir: str, sigma: float = 1.0, bins: int = 13,
+            return_zscore: bool = True, base: float = 2.0, dedup: bool = True, sketch: int = None,
+            progress=None, discretizer: str = "gaussian", edges=None) -> pd.DataFrame:
+    """在作业目录中分块计算完整的距离方阵，已完成的分块直接复用。
+
+    Args:
+        df: 行=变量、列=样本的数值型 DataFrame（行索引为变量名）。
+        method: ``"euclidean"`` 或 ``"information"``。
+        job_dir: 作业目录，不存在时创建。
+        sigma: 高斯离散化的标准差，仅 ``information`` 有效。
+        bins: 离散等级数量，仅 ``information`` 有效。
+        return_zscore: 离散化是否返回 z-score 中心，仅 ``information`` 有效。
+        base: 熵的对数底，仅 ``information`` 有效。
+        dedup: 是否先合并重复的变量，见 :func:`core.distance.compute_distance_matrix`。
+        sketch: 仅 ``euclidean`` 有效，先随机投影到 sketch 维，见 :mod:`core.sketch`。
+        progress: 可选的回调 ``progress(done, total)``，每完成一个分块调用一次。
+        discretizer: 离散化方法，仅 ``information`` 有效，见 :func:`core.distance.discretize`。
+        edges: grid 离散化的箱边界，仅 ``information`` 有效。
+
+    Returns:
+        pandas.DataFrame: 映射自 ``distance.npy`` 的只读方阵，``attrs`` 中有 ``path`` 与 ``job_dir``。
+
+    Raises:
+        ValueError: method 未知，或作业目录属于另一份数据/另一组参数。
+    """
+    job = DistanceJob(df, method, job_dir, sigma, bins, return_zscore, base, dedup, sketch, discretizer, edges)
+    if job.complete:
+        return job.finish()
+
+    row_step = job.step[0]
+    if method == "information":
+        source = ((r0, r1, c0, c1, v["vi"]) for r0, r1, c0, c1, v in
+                  _info_tiles(job.values, job.levels, base, ("vi",), full_rows=False, block=row_step,
+                              skip=job.is_done))
+    else:
+        source = _euclidean_tiles(job.values, row_step, skip=job.is_done)
+
+    done = job.done
+    with span("checkpoint.tiles", done=done, total=job.total):
+        for r0, r1, c0, c1, block in source:
+            job.write(r0, r1, c0, c1, block)
+            done += 1
+            if progress is not None:
+                progress(done, job.total)
+    return job.finish()
+
+
+def release_job(result: pd.DataFrame) -> pd.DataFrame:
+    """交出已完成作业的结果并删除作业目录，不再保留 n²·8 字节的结果文件。
+
+    结果文件移到运行配置的临时目录，重新映射后返回，映射被回收时删除该文件（与分块写盘的结果一致）。
+    调用后不要再使用传入的 result。
+
+    Args:
+        result: :func:`run_job` 返回的结果（``attrs`` 中有 ``path`` 与 ``job_dir``）。
+
+    Returns:
+        pandas.DataFrame: 内容相同的只读方阵；无法移动文件时（如 Windows 上文件仍被映射）原样返回 result。
+    """
+    path, job_dir = result.attrs.get("path"), result.attrs.get("job_dir")
+    if path is None or job_dir is None:
+        return result
+    fd, target = tempfile.mkstemp(prefix="corr_", suffix=".npy", dir=get_runtime().scratch_path)
+    os.close(fd)
+    try:
+        os.replace(path, target)
+    except OSError:
+        _remove_file(target)
+        return result
+    shutil.rmtree(job_dir, ignore_errors=True)
+
+    values = np.load(target, mmap_mode="r")
+    weakref.finalize(values, _remove_file, target)
+    released = pd.DataFrame(values, index=result.index, columns=result.columns, copy=False)
+    released.attrs["path"] = target
+    return released
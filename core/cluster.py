@@ -0,0 +1,323 @@
+"""基于距离矩阵的层次聚类。
+
+直接消费 ``compute_distance_matrix`` 的方阵结果（可以是分块写盘的 memmap）：按行流式抽取上三角
+得到压缩（condensed）形式，长度 n(n-1)/2，只有方阵的一半。聚类都是 O(n²) 时间，按内存预算选择：
+
+- 压缩距离与 scipy 内部的一份工作副本（共 n(n-1) 个 float64）在预算内时，直接调用
+  ``scipy.cluster.hierarchy.linkage``（C 实现，最快），额外内存为 O(n²)；
+- 否则把压缩距离写到临时目录的内存映射文件中，在这份文件上聚类：single 用 Prim 最小生成树，
+  其余用最近邻链（nearest-neighbor chain）原地做 Lance–Williams 更新。每步只按行读写 O(n) 个距离，
+  内存中只有 O(n) 的工作数组，压缩距离占用 n(n-1)/2·8 字节磁盘（用完即删）。两种实现与 scipy
+  使用相同的算法与并列规则，链接矩阵一致。
+
+结果中的叶序可以交给 :class:`core.matrix.IndexedMatrix`，让表格和热图按聚类顺序显示原矩阵而不复制。
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from scipy.cluster import hierarchy
+
+from core.trace import span
+from core.matrix import IndexedMatrix
+from core.planner import ITEMSIZE, memory_budget
+
+
+LINKAGE_METHODS = ("single", "complete", "average", "weighted", "ward")
+# 最优叶序是 O(n³) 的，变量数超过该值时默认改用链接树自身的叶序
+OPTIMAL_ORDERING_MAX = 1000
+# 未指定切分方式时按最大合并高度的该比例切分（与 scipy dendrogram 的默认着色阈值一致）
+DEFAULT_THRESHOLD_RATIO = 0.7
+
+
+def _check_square(distance_matrix: pd.DataFrame) -> int:
+    """校验可以聚类的方阵距离矩阵，返回变量数"""
+    if not isinstance(distance_matrix, pd.DataFrame):
+        raise TypeError("distance_matrix 必须是 pandas.DataFrame。")
+    if distance_matrix.empty:
+        raise ValueError("距离矩阵不能为空。")
+    n_rows, n_cols = distance_matrix.shape
+    if n_rows != n_cols or isinstance(distance_matrix.index, pd.MultiIndex):
+        raise ValueError("聚类需要方阵距离矩阵（稀疏近邻结果不能直接聚类）。")
+    if n_rows < 2:
+        raise ValueError("至少需要 2 个变量才能聚类。")
+    return n_rows
+
+
+def condensed_distance(distance_matrix: pd.DataFrame, out: np.ndarray = None) -> np.ndarray:
+    """按行流式抽取方阵的上三角，得到压缩距离向量。
+
+    只读取严格上三角，下三角与对角线不参与（结果视为对称）；对 memmap 逐行读取与校验，不会整块载入。
+
+    Args:
+        distance_matrix: 方阵距离矩阵，行列标签一致。
+        out: 写入结果的长度 n(n-1)/2 的 float64 数组（如内存映射文件），None 时新分配。
+
+    Returns:
+        numpy.ndarray: 长度 n(n-1)/2 的 float64 向量，顺序与 ``scipy.spatial.distance.squareform`` 一致。
+
+    Raises:
+        TypeError: 输入不是 DataFrame。
+        ValueError: 矩阵为空、不是方阵（例如稀疏近邻结果）、含 NaN/inf 或负值。
+    """
+    n_rows = _check_square(distance_matrix)
+    values = distance_matrix.to_numpy()
+    if out is None:
+        out = np.empty(n_rows * (n_rows - 1) // 2, dtype=np.float64)
+    k = 0
+    for i in range(n_rows - 1):
+        row = np.asarray(values[i, i + 1:], dtype=np.float64)
+        if not np.isfinite(row).all():
+            raise ValueError("距离矩阵含 NaN 或无穷值，无法聚类。")
+        if (row < 0).any():
+            raise ValueError("距离矩阵含负值，无法聚类。")
+        out[k:k + row.size] = row
+        k += row.size
+    return out
+
+
+def _lance_williams(method: str, d_xi: np.ndarray, d_yi: np.ndarray, d_xy: float, nx: int, ny: int,
+                    ni: np.ndarray) -> np.ndarray:
+    """合并 x、y 后新簇到其余各簇 i 的距离（与 scipy 的更新公式一致）"""
+    if method == "single":
+        return np.minimum(d_xi, d_yi)
+    if method == "complete":
+        return np.maximum(d_xi, d_yi)
+    if method == "average":
+        return (nx * d_xi + ny * d_yi) / (nx + ny)
+    if method == "weighted":
+        return 0.5 * (d_xi + d_yi)
+    t = 1.0 / (nx + ny + ni)
+    return np.sqrt((ni + nx) * t * d_xi * d_xi + (ni + ny) * t * d_yi * d_yi - ni * t * d_xy * d_xy)
+
+
+def _condensed_start(n: int) -> np.ndarray:
+    """压缩距离中 (i, j)（i < j）的位置为 ``start[i] + j``"""
+    start = np.arange(n, dtype=np.int64)
+    return n * start - start * (start + 1) // 2 - start - 1
+
+
+def _row_positions(start: np.ndarray, x: int, others: np.ndarray) -> np.ndarray:
+    """x 与 others 中各变量的距离在压缩距离中的位置"""
+    return np.where(others < x, start[others] + x, start[x] + others)
+
+
+def _mst_single(y: np.ndarray, n: int) -> np.ndarray:
+    """single 链接：与 scipy 相同的 Prim 最小生成树（只读 y），工作数组为 O(n)"""
+    start = _condensed_start(n)
+    best = np.full(n, np.inf)
+    outside = np.arange(1, n, dtype=np.int64)
+    merges = np.empty((n - 1, 4))
+    x = 0
+    for step in range(n - 1):
+        best[outside] = np.minimum(best[outside], y[_row_positions(start, x, outside)])
+        j = int(np.argmin(best[outside]))
+        nearest = int(outside[j])
+        merges[step] = (x, nearest, best[nearest], 0)
+        outside = np.delete(outside, j)
+        x = nearest
+    return _relabel(merges[np.argsort(merges[:, 2], kind="mergesort")], n)
+
+
+def _nn_chain(y: np.ndarray, n: int, method: str) -> np.ndarray:
+    """在压缩距离 y 上原地执行最近邻链聚类（y 会被改写），返回 scipy 格式的链接矩阵。
+
+    与 scipy 的 ``nn_chain`` 相同：合并后的簇占用两者中较大的下标，最近邻并列时优先链上的前一个簇、
+    其次下标最小者；最后按合并高度稳定排序并重新编号。每步只按行读写 y，工作数组均为 O(n)。
+    """
+    start = _condensed_start(n)
+
+    def positions(x: int, others: np.ndarray) -> np.ndarray:
+        return _row_positions(start, x, others)
+
+    size = np.ones(n, dtype=np.int64)
+    alive = np.arange(n, dtype=np.int64)
+    merges = np.empty((n - 1, 4))
+    chain = []
+    for step in range(n - 1):
+        if not chain:
+            chain.append(int(alive[0]))
+        while True:
+            x = chain[-1]
+            others = alive[alive != x]
+            dist = y[positions(x, others)]
+            j = int(np.argmin(dist))
+            nearest, current = int(others[j]), float(dist[j])
+            if len(chain) > 1:
+                previous = chain[-2]
+                d_prev = float(y[positions(x, np.array([previous]))[0]])
+                if current >= d_prev:
+                    nearest, current = previous, d_prev
+                    break
+            chain.append(nearest)
+        chain.pop()
+        chain.pop()
+        x, z = min(x, nearest), max(x, nearest)
+        nx, nz = size[x], size[z]
+        merges[step] = (x, z, current, 0)
+
+        # 新簇放在 z 的位置，x 失效
+        alive = alive[alive != x]
+        size[x] = 0
+        size[z] = nx + nz
+        others = alive[alive != z]
+        if others.size:
+            pos_z = positions(z, others)
+            y[pos_z] = _lance_williams(method, y[positions(x, others)], y[pos_z], current, nx, nz, size[others])
+
+    merges = merges[np.argsort(merges[:, 2], kind="mergesort")]
+    return _relabel(merges, n)
+
+
+def _relabel(merges: np.ndarray, n: int) -> np.ndarray:
+    """把以原下标表示的合并序列改写为 scipy 链接矩阵的簇编号（第 k 次合并产生簇 n + k）并填入簇大小"""
+    parent = np.arange(2 * n - 1)
+    size = np.ones(2 * n - 1, dtype=np.int64)
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    linkage = merges.copy()
+    for k, (a, b, _, _) in enumerate(merges):
+        ra, rb = find(int(a)), find(int(b))
+        linkage[k, 0], linkage[k, 1] = min(ra, rb), max(ra, rb)
+        size[n + k] = linkage[k, 3] = size[ra] + size[rb]
+        parent[ra] = parent[rb] = n + k
+    return linkage
+
+
+def _linkage_out_of_core(distance_matrix: pd.DataFrame, method: str, scratch_dir: str = None) -> np.ndarray:
+    """把压缩距离写到临时目录的内存映射文件中，在其上聚类（single 用最小生成树，其余用最近邻链），用完删除文件"""
+    if scratch_dir is None:
+        from core.runtime import get_runtime
+
+        scratch_dir = get_runtime().scratch_path
+    n = distance_matrix.shape[0]
+    fd, path = tempfile.mkstemp(prefix="corr_", suffix=".condensed", dir=scratch_dir)
+    os.close(fd)
+    try:
+        y = np.memmap(path, dtype=np.float64, mode="w+", shape=(n * (n - 1) // 2,))
+        condensed_distance(distance_matrix, out=y)
+        linkage = _mst_single(y, n) if method == "single" else _nn_chain(y, n, method)
+        del y
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    return linkage
+
+
+class ClusterResult:
+    """层次聚类的结果。
+
+    Attributes:
+        linkage: scipy 格式的链接矩阵（n-1 行 × 4 列），即树状图。
+        order: 叶序，聚类顺序下第 i 个位置对应原矩阵的第 ``order[i]`` 个变量。
+        labels: 扁平聚类编号（从 1 开始），索引为变量名、按原顺序排列。
+        names: 变量名（原顺序）。
+        method: 链接方式。
+        optimal: 叶序是否经过最优叶序优化。
+    """
+
+    def __init__(self, linkage: np.ndarray, order: np.ndarray, labels: pd.Series, names: pd.Index,
+                 method: str, optimal: bool):
+        self.linkage = linkage
+        self.order = order
+        self.labels = labels
+        self.names = names
+        self.method = method
+        self.optimal = optimal
+
+    @property
+    def n_clusters(self) -> int:
+        return int(self.labels.nunique())
+
+    def flat(self, n_clusters: int = None, threshold: float = None) -> pd.Series:
+        """按簇数或合并高度重新切分树状图，见 :func:`cluster_distance`"""
+        return _flat_labels(self.linkage, self.names, n_clusters, threshold)
+
+    def dendrogram(self, **kwargs) -> dict:
+        """返回 scipy ``dendrogram`` 的绘图数据（不绘图），叶子标签为变量名"""
+        kwargs.setdefault("no_plot", True)
+        return hierarchy.dendrogram(self.linkage, labels=[str(v) for v in self.names], **kwargs)
+
+    def ordered(self, distance_matrix: pd.DataFrame) -> IndexedMatrix:
+        """返回按聚类叶序排列的矩阵视图（行列同时重排，不复制数据）"""
+        if len(distance_matrix) != len(self.order):
+            raise ValueError("矩阵与聚类结果的变量数不一致。")
+        return IndexedMatrix.from_frame(distance_matrix, self.order, self.order)
+
+    def __repr__(self) -> str:
+        return f"ClusterResult(n={len(self.order)}, method={self.method!r}, n_clusters={self.n_clusters})"
+
+
+def _flat_labels(linkage: np.ndarray, names: pd.Index, n_clusters: int, threshold: float) -> pd.Series:
+    """切分树状图得到扁平聚类编号"""
+    if n_clusters is not None and threshold is not None:
+        raise ValueError("n_clusters 与 threshold 只能指定一个。")
+    if n_clusters is not None:
+        if not isinstance(n_clusters, int) or n_clusters < 1:
+            raise ValueError("n_clusters 必须为正整数。")
+        labels = hierarchy.fcluster(linkage, n_clusters, criterion="maxclust")
+    else:
+        if threshold is None:
+            threshold = DEFAULT_THRESHOLD_RATIO * float(linkage[:, 2].max()) if len(linkage) else 0.0
+        if threshold < 0:
+            raise ValueError("threshold 不能为负。")
+        labels = hierarchy.fcluster(linkage, threshold, criterion="distance")
+    return pd.Series(labels, index=names, name="cluster")
+
+
+@span("cluster.hierarchical")
+def cluster_distance(distance_matrix: pd.DataFrame, method: str = "average", n_clusters: int = None,
+                     threshold: float = None, optimal_ordering: bool = None, budget=None,
+                     scratch_dir: str = None) -> ClusterResult:
+    """对距离矩阵做层次聚类。
+
+    Args:
+        distance_matrix: 方阵距离矩阵（``compute_distance_matrix`` 的 dense/tiled 结果）。
+        method: 链接方式，见 ``LINKAGE_METHODS``；ward 只对欧氏距离有几何意义。
+        n_clusters: 切分为至多 n_clusters 个簇。
+        threshold: 按合并高度切分；两者都未指定时取最大合并高度的 ``DEFAULT_THRESHOLD_RATIO`` 倍。
+        optimal_ordering: 是否计算最优叶序（相邻叶子距离之和最小）；None 表示变量数不超过
+            ``OPTIMAL_ORDERING_MAX`` 时计算。最优叶序需要在内存中保存压缩距离。
+        budget: 内存预算，见 :func:`core.planner.memory_budget`；两份压缩距离超出预算时改用
+            临时目录中的内存映射文件与最近邻链。
+        scratch_dir: 内存映射文件的目录，默认运行配置的临时目录。
+
+    Returns:
+        ClusterResult: 链接矩阵、叶序与扁平聚类编号。
+
+    Raises:
+        TypeError: distance_matrix 不是 DataFrame。
+        ValueError: 矩阵不合法、链接方式未知或切分参数不合法。
+    """
+    if method not in LINKAGE_METHODS:
+        raise ValueError(f"未知的链接方式: {method}，可选 {', '.join(LINKAGE_METHODS)}")
+
+    # 先校验再选择实现，稀疏近邻长表等不合法输入不会分配任何临时文件
+    n = _check_square(distance_matrix)
+    if optimal_ordering is None:
+        optimal_ordering = n <= OPTIMAL_ORDERING_MAX
+    in_memory = optimal_ordering or n * (n - 1) * ITEMSIZE <= memory_budget(budget)
+
+    if in_memory:
+        y = condensed_distance(distance_matrix)
+        with span("cluster.linkage", n=n, method=method):
+            linkage = hierarchy.linkage(y, method=method)
+        if optimal_ordering:
+            with span("cluster.optimal_ordering", n=n):
+                linkage = hierarchy.optimal_leaf_ordering(linkage, y)
+        del y
+    else:
+        with span("cluster.linkage", n=n, method=method, out_of_core=True):
+            linkage = _linkage_out_of_core(distance_matrix, method, scratch_dir)
+
+    order = hierarchy.leaves_list(linkage)
+    labels = _flat_labels(linkage, distance_matrix.index, n_clusters, threshold)
+    return ClusterResult(linkage, order, labels, distance_matrix.index, method, bool(optimal_ordering))
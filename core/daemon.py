@@ -0,0 +1,508 @@
+"""本机计算服务：多个界面进程共享的数据、离散化与距离缓存。
+
+同一台工作站上的多个分析人员各自启动 ``main.py``、导入同样的文件时，会在各自的进程里重复计算同样
+的矩阵。计算服务是一个可选的后台进程，通过本机 socket（Windows 上为命名管道）提供 ``core`` 的
+导入、离散化与距离计算：
+
+- 结果放在共享内存（:class:`multiprocessing.shared_memory.SharedMemory`）中，客户端只收到块名、
+  形状与行列标签，直接映射同一块内存，第二个客户端请求同样的结果时不需要重新计算，也不复制数据；
+- 缓存按数据指纹（:func:`core.checkpoint.fingerprint`）与参数为键，总量超过 ``capacity`` 时按最近
+  最少使用淘汰；已映射的客户端不受淘汰影响（共享内存在最后一个映射关闭后才释放）；
+- 计算在一个大小为 ``workers`` 的线程池中排队执行，多个用户的请求共享机器的核心；多个客户端同时
+  请求同一结果时只计算一次。
+
+启动与使用::
+
+    python -m core.daemon serve --capacity 8G --workers 4
+    CORR_DAEMON=1 python main.py          # 界面在内存计算的距离与离散化改为向服务请求
+
+连接需要共享密钥：优先使用 ``CORR_AUTHKEY``，否则服务生成随机密钥写入 socket 旁的 ``.key`` 文件
+（仅当前用户可读）。socket 默认只有当前用户可连接；多个用户共用一个服务时，以 ``--shared-group``
+启动（socket 对属组开放），并为组内所有人设置同一个 ``CORR_AUTHKEY``。
+
+服务以自身的权限读取 ``load`` 请求中的文件，因此只允许读取 ``--allow-root``（或环境变量
+``CORR_DAEMON_ROOTS``，多个目录以 ``os.pathsep`` 分隔）之下的文件；未指定时不开放文件读取，
+客户端仍可上传数据。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+from multiprocessing.connection import Listener, Client
+
+import numpy as np
+import pandas as pd
+
+from core.trace import span
+from core.planner import parse_size, memory_budget, format_size
+from core.checkpoint import fingerprint
+from core.runtime import get_runtime, configure, apply_thread_limit, cpu_count
+
+
+def default_address() -> str:
+    """``$CORR_DAEMON_SOCKET``，否则 Windows 上为命名管道、其他系统为临时目录下的 corr-daemon.sock"""
+    address = os.environ.get("CORR_DAEMON_SOCKET")
+    if address:
+        return address
+    if sys.platform == "win32":
+        return r"\\.\pipe\corr-daemon"
+    return os.path.join(tempfile.gettempdir(), "corr-daemon.sock")
+
+
+def _key_path(address: str) -> str:
+    if sys.platform == "win32":
+        return os.path.join(tempfile.gettempdir(), "corr-daemon.key")
+    return address + ".key"
+
+
+def _client_authkey(address: str, authkey=None) -> bytes:
+    """显式参数 → CORR_AUTHKEY → 服务写下的密钥文件"""
+    authkey = authkey or os.environ.get("CORR_AUTHKEY")
+    if authkey is not None:
+        return authkey.encode() if isinstance(authkey, str) else bytes(authkey)
+    try:
+        with open(_key_path(address), "rb") as f:
+            return f.read()
+    except OSError:
+        raise ConnectionError("找不到计算服务的密钥，请设置 CORR_AUTHKEY。") from None
+
+
+def _index_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """与 compute_distance_matrix 一致：首列为字符串时作为行索引"""
+    first_col = df.iloc[:, 0]
+    if first_col.dtype == 'object' or isinstance(first_col.iloc[0], str):
+        df = df.set_index(df.columns[0])
+    return df
+
+
+def _float_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """服务中保存的数据形式：float64 数值与原行列标签（已是 float64 时不复制）；指纹按这一形式计算"""
+    return pd.DataFrame(df.to_numpy(dtype=np.float64), index=df.index, columns=df.columns, copy=False)
+
+
+class SharedCache:
+    """以共享内存保存二维结果的 LRU 缓存（线程安全）。
+
+    Args:
+        capacity: 缓存总字节数上限；单个结果超过上限时仍会保留（此时其余结果全部淘汰）。
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """取出描述 ``{"name", "shape", "dtype", "index", "columns"}``，没有时返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["desc"]
+
+    def put(self, key, values: np.ndarray, index, columns) -> dict:
+        """把 values 复制到新的共享内存块并登记，返回描述"""
+        values = np.ascontiguousarray(values)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, values.nbytes))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[...] = values
+        desc = {"name": shm.name, "shape": values.shape, "dtype": values.dtype.str,
+                "index": pd.Index(index), "columns": pd.Index(columns)}
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._release(old)
+            self._entries[key] = {"shm": shm, "desc": desc, "nbytes": values.nbytes}
+            self.nbytes += values.nbytes
+            while self.nbytes > self.capacity and len(self._entries) > 1:
+                _, entry = self._entries.popitem(last=False)
+                self._release(entry)
+                self.evictions += 1
+        return desc
+
+    def _release(self, entry: dict) -> None:
+        self.nbytes -= entry["nbytes"]
+        try:
+            entry["shm"].close()
+        except BufferError:
+            # 同进程内仍有视图引用（服务与客户端在同一进程时），映射由垃圾回收释放
+            pass
+        entry["shm"].unlink()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "nbytes": self.nbytes, "capacity": self.capacity,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def clear(self) -> None:
+        with self._lock:
+            while self._entries:
+                self._release(self._entries.popitem()[1])
+
+
+class ComputeDaemon:
+    """计算服务。
+
+    消息为 pickle 的元组，回复为 ``("ok", ...)``、``("missing",)`` 或 ``("error", 信息)``：
+
+    - ``("load", path)`` → ``("ok", fp, desc)``：由服务读取 ``roots`` 之下的文件（按路径、修改时间与大小复用）；
+    - ``("put", fp, values, index, columns)`` → ``("ok", desc)``：客户端上传数据；服务按上传的数据重新计算
+      指纹，与 fp 不符时回复错误，客户端不能把数据登记到别人的指纹下；
+    - ``("discretize", fp, sigma, bins, return_zscore)`` / ``("distance", fp, method, sigma, bins,
+      return_zscore)`` → ``("ok", desc)``；数据不在缓存中时回复 ``("missing",)``，客户端上传后重试；
+    - ``("stats",)``、``("shutdown",)``。
+
+    Args:
+        address: 监听地址，默认 :func:`default_address`。
+        authkey: 共享密钥，默认 ``CORR_AUTHKEY``，都没有时随机生成并写入密钥文件。
+        capacity: 缓存上限（字节数或 ``"8G"``），默认内存预算的一半。
+        workers: 同时执行的计算数，默认运行配置的进程数（见 :mod:`core.runtime`）。
+        roots: 允许 ``load`` 读取的目录列表，默认 ``CORR_DAEMON_ROOTS``；都没有时拒绝 ``load``。
+        shared_group: socket 是否对属组开放（权限 0o660），默认只有当前用户可连接（0o600）。
+    """
+
+    def __init__(self, address: str = None, authkey=None, capacity=None, workers: int = None,
+                 roots=None, shared_group: bool = False):
+        self.address = address or default_address()
+        if roots is None:
+            roots = [r for r in os.environ.get("CORR_DAEMON_ROOTS", "").split(os.pathsep) if r]
+        self.roots = [os.path.realpath(r) for r in roots]
+        self.shared_group = shared_group
+        authkey = authkey or os.environ.get("CORR_AUTHKEY")
+        self._key_file = None
+        if authkey is None:
+            authkey = os.urandom(16)
+            self._key_file = _key_path(self.address)
+            fd = os.open(self._key_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(authkey)
+        self.authkey = authkey.encode() if isinstance(authkey, str) else bytes(authkey)
+        self.cache = SharedCache(parse_size(capacity) if capacity else memory_budget() // 2)
+        self.workers = workers or get_runtime().n_workers
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="daemon-compute")
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._files = {}
+        self._stop = threading.Event()
+        self._listener = None
+
+    def _compute_once(self, key, fn):
+        """同一键只计算一次：正在计算时等待同一个结果，否则提交到线程池"""
+        desc = self.cache.get(key)
+        if desc is not None:
+            return desc
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._pool.submit(fn)
+                self._inflight[key] = future
+        try:
+            return future.result()
+        finally:
+            with self._inflight_lock:
+                if self._inflight.get(key) is future and future.done():
+                    del self._inflight[key]
+
+    def _data(self, fp: str):
+        """缓存中的数据描述与 DataFrame 视图（不复制）；不在缓存中时返回 None"""
+        desc = self.cache.get(("data", fp))
+        if desc is None:
+            return None
+        shm = shared_memory.SharedMemory(name=desc["name"])
+        values = np.ndarray(desc["shape"], dtype=desc["dtype"], buffer=shm.buf)
+        # 计算期间持有映射，淘汰不会影响本次计算
+        return shm, pd.DataFrame(values, index=desc["index"], columns=desc["columns"], copy=False)
+
+    def _allowed(self, path: str) -> bool:
+        """path（已解析符号链接）是否位于某个允许的目录之下"""
+        for root in self.roots:
+            try:
+                if os.path.commonpath([root, path]) == root:
+                    return True
+            except ValueError:
+                # Windows 上不同盘符
+                continue
+        return False
+
+    def _handle(self, message: tuple) -> tuple:
+        kind = message[0]
+        if kind == "stats":
+            return ("ok", dict(self.cache.stats(), workers=self.workers, inflight=len(self._inflight)))
+        if kind == "shutdown":
+            self._stop.set()
+            return ("ok",)
+        if kind == "put":
+            _, fp, values, index, columns = message
+            df = _float_frame(pd.DataFrame(np.asarray(values), index=index, columns=columns, copy=False))
+            if fingerprint(df) != fp:
+                return ("error", "上传的数据与指纹不符。")
+            return ("ok", self.cache.put(("data", fp), df.to_numpy(), df.index, df.columns))
+        if kind == "load":
+            path = os.path.realpath(message[1])
+            if not self._allowed(path):
+                return ("error", f"计算服务不允许读取该路径：{message[1]}（见 --allow-root）")
+            stat = os.stat(path)
+            file_key = (path, stat.st_mtime_ns, stat.st_size)
+            fp = self._files.get(file_key)
+            desc = self.cache.get(("data", fp)) if fp is not None else None
+            if desc is not None:
+                return ("ok", fp, desc)
+
+            def load():
+                from core.loader import upload
+
+                df = _float_frame(_index_frame(upload(path)))
+                key = fingerprint(df)
+                self._files[file_key] = key
+                return key, self.cache.put(("data", key), df.to_numpy(dtype=np.float64), df.index, df.columns)
+
+            fp, desc = self._compute_once(("file",) + file_key, load)
+            return ("ok", fp, desc)
+        if kind in ("discretize", "distance"):
+            key = message
+            fp = message[1]
+            desc = self.cache.get(key)
+            if desc is not None:
+                return ("ok", desc)
+            if self.cache.get(("data", fp)) is None:
+                return ("missing",)
+
+            def compute():
+                from core.distance import gaussian_discretization, compute_distance_matrix
+
+                attached = self._data(fp)
+                if attached is None:
+                    raise ValueError("数据已被淘汰，请重试。")
+                shm, df = attached
+                try:
+                    with span(f"daemon.{kind}", n=df.shape[0]):
+                        if kind == "discretize":
+                            _, _, sigma, bins, return_zscore = message
+                            out = gaussian_discretization(df, sigma=sigma, bins=bins, return_zscore=return_zscore)
+                        else:
+                            _, _, method, sigma, bins, return_zscore = message
+                            out = compute_distance_matrix(df, method, sigma=sigma, bins=bins,
+                                                          return_zscore=return_zscore)
+                    return self.cache.put(key, out.to_numpy(dtype=np.float64), out.index, out.columns)
+                finally:
+                    del df
+                    try:
+                        shm.close()
+                    except BufferError:
+                        # 仍有视图引用这块内存时由垃圾回收释放映射
+                        pass
+
+            return ("ok", self._compute_once(key, compute))
+        return ("error", f"未知的请求: {kind}")
+
+    def _serve_connection(self, conn) -> None:
+        with conn:
+            while not self._stop.is_set():
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = self._handle(message)
+                except Exception as e:
+                    # 畸形请求或计算中的任何异常都回复给客户端，不结束连接线程
+                    reply = ("error", str(e) or type(e).__name__)
+                try:
+                    conn.send(reply)
+                except OSError:
+                    return
+
+    def serve_forever(self) -> None:
+        """接受连接直到收到 shutdown，每个连接一个线程"""
+        if sys.platform != "win32" and os.path.exists(self.address):
+            # 上次异常退出留下的 socket 文件
+            try:
+                Client(self.address, authkey=self.authkey).close()
+            except OSError:
+                os.remove(self.address)
+            else:
+                raise RuntimeError(f"计算服务已在 {self.address} 运行。")
+        self._listener = Listener(self.address, authkey=self.authkey)
+        if sys.platform != "win32":
+            # 服务以自身权限读取文件，默认只允许当前用户连接；共享时只对属组开放
+            os.chmod(self.address, 0o660 if self.shared_group else 0o600)
+        acceptor = threading.Thread(target=self._accept_loop, name="daemon-accept", daemon=True)
+        acceptor.start()
+        try:
+            self._stop.wait()
+        finally:
+            self.close()
+
+    def _accept_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError):
+                if self._stop.is_set():
+                    return
+                continue
+            except Exception:
+                # 认证失败
+                continue
+            threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+    def close(self) -> None:
+        """停止服务并释放所有共享内存"""
+        self._stop.set()
+        if self._listener is not None:
+            # 连一次自身，唤醒阻塞在 accept 上的线程
+            try:
+                Client(self.address, authkey=self.authkey).close()
+            except OSError:
+                pass
+            self._listener.close()
+            self._listener = None
+        self._pool.shutdown(wait=True)
+        self.cache.clear()
+        if self._key_file and os.path.exists(self._key_file):
+            os.remove(self._key_file)
+
+
+class DaemonClient:
+    """计算服务的客户端；返回的 DataFrame 直接映射服务的共享内存（只读）。
+
+    Args:
+        address: 服务地址，默认 :func:`default_address`。
+        authkey: 共享密钥，默认 ``CORR_AUTHKEY`` 或服务写下的密钥文件。
+
+    Raises:
+        ConnectionError: 服务未运行或密钥不正确。
+    """
+
+    def __init__(self, address: str = None, authkey=None):
+        self.address = address or default_address()
+        try:
+            self._conn = Client(self.address, authkey=_client_authkey(self.address, authkey))
+        except (OSError, EOFError) as e:
+            raise ConnectionError(f"无法连接计算服务 {self.address}：{e}") from e
+        except Exception as e:
+            raise ConnectionError(f"计算服务拒绝连接：{e}") from e
+        self._lock = threading.Lock()
+        # 映射期间需要保持共享内存对象
+        self._attached = []
+
+    def _request(self, *message) -> tuple:
+        with self._lock:
+            try:
+                self._conn.send(message)
+                reply = self._conn.recv()
+            except (EOFError, OSError) as e:
+                raise ConnectionError(f"与计算服务的连接已断开：{e}") from e
+        if reply[0] == "error":
+            raise ValueError(reply[1])
+        return reply
+
+    def _attach(self, desc: dict) -> pd.DataFrame:
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=desc["name"], track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=desc["name"])
+            # 3.13 之前映射也会登记到 resource_tracker，进程退出时会误删服务的共享内存
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        self._attached.append(shm)
+        values = np.ndarray(desc["shape"], dtype=desc["dtype"], buffer=shm.buf)
+        values.flags.writeable = False
+        return pd.DataFrame(values, index=desc["index"], columns=desc["columns"], copy=False)
+
+    def _fetch(self, df: pd.DataFrame, *message) -> pd.DataFrame:
+        """请求一个依赖数据的结果；服务没有这份数据时先上传"""
+        df = _float_frame(_index_frame(df))
+        fp = fingerprint(df)
+        for _ in range(3):
+            reply = self._request(message[0], fp, *message[1:])
+            if reply[0] == "missing":
+                self._request("put", fp, df.to_numpy(), df.index, df.columns)
+                continue
+            try:
+                return self._attach(reply[1])
+            except FileNotFoundError:
+                # 回复之后、映射之前被淘汰，重新请求
+                continue
+        raise ValueError("计算服务的缓存过小，结果在取回前被淘汰。")
+
+    def load(self, path: str) -> pd.DataFrame:
+        """由服务读取文件（同一文件只读一次），返回数据"""
+        _, _, desc = self._request("load", path)
+        return self._attach(desc)
+
+    def discretize(self, df: pd.DataFrame, sigma: float = 1.0, bins: int = 7,
+                   return_zscore: bool = True) -> pd.DataFrame:
+        """与 :func:`core.distance.gaussian_discretization` 相同的结果，由服务计算并缓存"""
+        return self._fetch(df, "discretize", float(sigma), int(bins), bool(return_zscore))
+
+    def distance(self, df: pd.DataFrame, method: str, sigma: float = 1.0, bins: int = 13,
+                 return_zscore: bool = True) -> pd.DataFrame:
+        """与 :func:`core.distance.compute_distance_matrix`（内存计算）相同的结果，由服务计算并缓存"""
+        if method == "euclidean":
+            sigma, bins, return_zscore = 1.0, 13, True  # 与欧氏距离无关，统一键
+        return self._fetch(df, "distance", method, float(sigma), int(bins), bool(return_zscore))
+
+    def stats(self) -> dict:
+        return self._request("stats")[1]
+
+    def shutdown(self) -> None:
+        self._request("shutdown")
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="本机计算服务：多个界面进程共享的数据与距离缓存")
+    parser.add_argument("command", choices=("serve", "stats", "stop"))
+    parser.add_argument("--address", help="socket 路径或命名管道，默认 CORR_DAEMON_SOCKET 或临时目录下的 corr-daemon.sock")
+    parser.add_argument("--capacity", help="缓存上限，如 8G；默认内存预算的一半")
+    parser.add_argument("--workers", type=int, help="同时执行的计算数，默认 CORR_WORKERS 或 CPU 核数")
+    parser.add_argument("--allow-root", action="append", dest="roots",
+                        help="允许服务读取的目录，可多次指定；默认 CORR_DAEMON_ROOTS，都没有时不开放文件读取")
+    parser.add_argument("--shared-group", action="store_true", help="socket 对属组开放，供同组用户共用服务")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.command == "serve":
+        daemon = ComputeDaemon(args.address, capacity=args.capacity, workers=args.workers,
+                               roots=args.roots, shared_group=args.shared_group)
+        # 各计算线程共享进程内的 BLAS 线程池，按计算线程数分摊核数；入口函数的限制取同一个值，
+        # 各线程进出限制时不会互相改写
+        config = configure(blas_threads=get_runtime().threads_for(daemon.workers) or cpu_count())
+        apply_thread_limit(config.blas_threads)
+        print(f"计算服务已启动：{daemon.address}，缓存上限 {format_size(daemon.cache.capacity)}，"
+              f"{daemon.workers} 个计算线程，每线程 BLAS 线程 {config.blas_threads}")
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            daemon.close()
+        return 0
+
+    try:
+        client = DaemonClient(args.address)
+    except ConnectionError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.command == "stats":
+        for name, value in client.stats().items():
+            print(f"{name}: {format_size(value) if name in ('nbytes', 'capacity') else value}")
+    else:
+        client.shutdown()
+    client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
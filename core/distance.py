@@ -1,7 +1,16 @@
+import os
+import tempfile
+import weakref
+
 import numpy as np
 import pandas as pd
 from sklearn.metrics import pairwise_distances
-from scipy.stats import entropy
+
+from core.trace import span
+from core.planner import DISCRETIZE_CHUNK_BYTES, KERNEL_BYTES, ITEMSIZE, MAX_TILE_ROWS, kernel_block, plan_distance
+from core.matrix import IndexedMatrix
+from core.sketch import sketch_frame
+from core.runtime import get_runtime, thread_limited
 
 
 def zscore_standardize_rows(df: pd.DataFrame) -> pd.DataFrame:
@@ -27,22 +36,36 @@ def zscore_standardize_rows(df: pd.DataFrame) -> pd.DataFrame:
     return (df - row_mean) / row_std
 
 
+def _row_moments(data: np.ndarray, has_missing: bool = None) -> tuple:
+    """每行的均值与标准差；含 NaN 时只在观测值上计算，全部缺失的行为 NaN。无缺失时与 mean/std 相同"""
+    if has_missing is None:
+        has_missing = np.isnan(data).any()
+    if not has_missing:
+        return data.mean(axis=1), data.std(axis=1)
+    count = (~np.isnan(data)).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mu = np.nansum(data, axis=1) / count
+        std = np.sqrt(np.nansum((data - mu[:, None]) ** 2, axis=1) / count)
+    return mu, std
+
+
+@span("distance.discretize")
 def gaussian_discretization(df: pd.DataFrame, sigma: float = 1.0, bins: int = 7,
                                  return_zscore: bool = True) -> pd.DataFrame:
     """按行基于高斯核的自适应离散化（向量化实现）。
 
     Args:
-        df: 数值型 DataFrame，行=随机变量，列=样本。
+        df: 数值型 DataFrame，行=随机变量，列=样本；NaN 视为缺失，均值与标准差只在观测值上计算。
         sigma: 高斯核标准差，必须为正。
         bins: 离散等级数量，建议 ≥ 3。
         return_zscore: True 返回 z-score 的中心；False 返回原值空间的中心。
 
     Returns:
-        pandas.DataFrame: 离散化后的 DataFrame，索引与列名与输入一致。
+        pandas.DataFrame: 离散化后的 DataFrame，索引与列名与输入一致；缺失的位置仍为 NaN。
 
     Raises:
         TypeError: df 不是 DataFrame，或 bins 不是整数。
-        ValueError: df 为空/非数值/含 NaN，sigma ≤ 0，或 bins < 2。
+        ValueError: df 为空/非数值，sigma ≤ 0，或 bins < 2。
     """
     if not isinstance(df, pd.DataFrame):
         raise TypeError("df 必须是 pandas.DataFrame。")
@@ -55,11 +78,12 @@ def gaussian_discretization(df: pd.DataFrame, sigma: float = 1.0, bins: int = 7,
     if bins < 2:
         raise ValueError("bins 必须 ≥ 2。")
     
-    data = df.to_numpy()
+    data = df.to_numpy(dtype=np.float64)
+    missing = np.isnan(data)
+    has_missing = missing.any()
 
-    # 每行均值与标准差
-    mu = data.mean(axis=1)
-    std = data.std(axis=1)
+    # 每行均值与标准差（含缺失时只用观测值）
+    mu, std = _row_moments(data, has_missing)
 
     # 检测标准差为 0 的行（全相同值）
     zero_std_mask = std < 1e-12
@@ -70,12 +94,19 @@ def gaussian_discretization(df: pd.DataFrame, sigma: float = 1.0, bins: int = 7,
     z_centers = np.linspace(-3, 3, bins)  # (bins,)
     centers = mu[None, :] + std_safe[None, :] * z_centers[:, None]  # shape: (bins, n_samples)
 
-    # 广播计算权重
-    diff = data[:, None, :] - centers.T[:, :, None]  # (n_samples, bins, n_features)
-    weights = np.exp(-0.5 * (diff / sigma) ** 2)  # (n_samples, bins, n_features)
+    # 按行分块广播，(rows, bins, n_features) 的权重张量不超过 DISCRETIZE_CHUNK_BYTES
+    n_rows, n_cols = data.shape
+    step = max(1, DISCRETIZE_CHUNK_BYTES // (2 * bins * n_cols * 8))
+    idx = np.empty(data.shape, dtype=np.intp)
+    with span("distance.discretize.tensor", shape=list(data.shape), bins=bins):
+        for r0 in range(0, n_rows, step):
+            r1 = min(r0 + step, n_rows)
+            # 广播计算权重
+            diff = data[r0:r1, None, :] - centers.T[r0:r1, :, None]  # (rows, bins, n_features)
+            weights = np.exp(-0.5 * (diff / sigma) ** 2)  # (rows, bins, n_features)
 
-    # 找到最大权重对应的索引
-    idx = np.argmax(weights, axis=1)  # (n_samples, n_features)
+            # 找到最大权重对应的索引
+            idx[r0:r1] = np.argmax(weights, axis=1)  # (rows, n_features)
 
     if return_zscore:
         result = z_centers[idx]
@@ -86,27 +117,597 @@ def gaussian_discretization(df: pd.DataFrame, sigma: float = 1.0, bins: int = 7,
         result = np.take_along_axis(centers.T, idx, axis=1)
         # 对全相同值的行返回原值（均值）
         result[zero_std_mask, :] = mu[zero_std_mask, None]
+    if has_missing:
+        # 缺失位置的权重为 NaN，argmax 给出的下标无意义
+        result[missing] = np.nan
 
     return pd.DataFrame(result, index=df.index, columns=df.columns)
 
 
-def information_distance(discrete_df: pd.DataFrame, base: float = 2.0, ignore_na: bool=True) -> pd.DataFrame:
+def _code_dtype(levels: int):
+    """容纳 -1..levels-1 的最小有符号整数类型"""
+    return np.int8 if levels <= 127 else np.int16 if levels <= 32767 else np.int32
+
+
+def _code_frame(codes: np.ndarray, df: pd.DataFrame, discretizer: str) -> pd.DataFrame:
+    """把整数编码包装为 DataFrame，并在 attrs 中标记离散化方法，信息距离据此直接使用编码"""
+    result = pd.DataFrame(codes, index=df.index, columns=df.columns, copy=False)
+    result.attrs["discretizer"] = discretizer
+    return result
+
+
+@span("distance.discretize_quantile")
+def quantile_discretization(df: pd.DataFrame, bins: int = 7) -> pd.DataFrame:
+    """按行等频离散化：每行按取值排序后切成 bins 段，各段的观测数相差不超过 1。
+
+    排序后位置 p 所在并列组的末位为 e、该行有 c 个观测，则编码为 ``min(bins-1, ⌈(e+1)·bins/c⌉ - 1)``，
+    即分割点 ``⌊k·c/bins⌋``（k = 1..bins-1）处的取值中不大于它的个数。相同取值总在同一段，
+    每行 O(m log m)（一次排序），不需要 (行, bins, 样本) 的广播张量。编码只依赖本行，新增变量或
+    样本子集变化时其他行的编码不变。
+
+    Args:
+        df: 数值型 DataFrame，行=随机变量，列=样本；NaN 视为缺失。
+        bins: 离散等级数量，必须 ≥ 2。
+
+    Returns:
+        pandas.DataFrame: 与输入同形的整数编码 0..bins-1（缺失为 -1），``attrs["discretizer"]`` 为
+        ``"quantile"``。
+
+    Raises:
+        TypeError: df 不是 DataFrame，或 bins 不是整数。
+        ValueError: df 为空，或 bins < 2。
+    """
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError("df 必须是 pandas.DataFrame。")
+    if not isinstance(bins, int):
+        raise TypeError("bins 必须为整数。")
+    if df.empty:
+        raise ValueError("DataFrame 为空。")
+    if bins < 2:
+        raise ValueError("bins 必须 ≥ 2。")
+
+    data = df.to_numpy(dtype=np.float64)
+    n_rows, n_cols = data.shape
+    codes = np.empty(data.shape, dtype=_code_dtype(bins))
+    positions = np.arange(n_cols)
+    # 每块约 6 个 (rows, m) 的 8 字节数组
+    step = max(1, DISCRETIZE_CHUNK_BYTES // (6 * 8 * n_cols))
+    for r0 in range(0, n_rows, step):
+        block = data[r0:r0 + step]
+        order = np.argsort(block, axis=1, kind="stable")  # NaN 排在最后
+        ordered = np.take_along_axis(block, order, axis=1)
+        count = (~np.isnan(block)).sum(axis=1)[:, None]
+        # 每个位置所在并列组的末位：从右向左取“组末位”的累计最小值
+        last = np.ones(block.shape, dtype=bool)
+        last[:, :-1] = ordered[:, 1:] != ordered[:, :-1]
+        end = np.where(last, positions, n_cols)
+        end = np.minimum.accumulate(end[:, ::-1], axis=1)[:, ::-1]
+        level = ((end + 1) * bins + count - 1) // np.maximum(count, 1) - 1
+        np.minimum(level, bins - 1, out=level)
+        level[positions[None, :] >= count] = -1
+        np.put_along_axis(codes[r0:r0 + step], order, level.astype(codes.dtype), axis=1)
+    return _code_frame(codes, df, "quantile")
+
+
+@span("distance.discretize_grid")
+def grid_discretization(df: pd.DataFrame, bins: int = 7, edges=None) -> pd.DataFrame:
+    """全局固定网格离散化：所有行共用同一组分箱边界，编码为取值所在的箱号。
+
+    边界固定（显式给出 edges）时每个取值的编码与其他数据无关，适合增量更新：新数据只需编码自身，
+    已有的编码与距离不变。每个元素一次二分查找，O(m log bins)。
+
+    Args:
+        df: 数值型 DataFrame，行=随机变量，列=样本；NaN 视为缺失。
+        bins: 等宽箱数，edges 为 None 时在全部数据的 [最小值, 最大值] 上等分，必须 ≥ 2。
+        edges: 严格递增的箱边界（含两端，长度为箱数 + 1）；给定时忽略 bins，超出两端的取值归入首末箱。
+
+    Returns:
+        pandas.DataFrame: 与输入同形的整数编码 0..箱数-1（缺失为 -1），``attrs["discretizer"]`` 为 ``"grid"``，
+        ``attrs["edges"]`` 为使用的边界。
+
+    Raises:
+        TypeError: df 不是 DataFrame，或 bins 不是整数。
+        ValueError: df 为空，bins < 2，或 edges 不是长度 ≥ 3 的严格递增序列。
+    """
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError("df 必须是 pandas.DataFrame。")
+    if df.empty:
+        raise ValueError("DataFrame 为空。")
+    data = df.to_numpy(dtype=np.float64)
+    if edges is None:
+        if not isinstance(bins, int):
+            raise TypeError("bins 必须为整数。")
+        if bins < 2:
+            raise ValueError("bins 必须 ≥ 2。")
+        finite = data[np.isfinite(data)]
+        lo, hi = (finite.min(), finite.max()) if finite.size else (0.0, 1.0)
+        if hi <= lo:
+            hi = lo + 1.0
+        edges = np.linspace(lo, hi, bins + 1)
+    else:
+        edges = np.asarray(edges, dtype=np.float64)
+        if edges.ndim != 1 or edges.size < 3 or not np.all(np.diff(edges) > 0):
+            raise ValueError("edges 必须是长度 ≥ 3 的严格递增序列。")
+    n_bins = edges.size - 1
+
+    codes = np.empty(data.shape, dtype=_code_dtype(n_bins))
+    step = max(1, DISCRETIZE_CHUNK_BYTES // (8 * data.shape[1]))
+    for r0 in range(0, data.shape[0], step):
+        block = data[r0:r0 + step]
+        # 内部边界上的二分查找：< edges[1] 为 0 号箱，≥ edges[-2] 为末箱
+        level = np.searchsorted(edges[1:-1], block, side="right")
+        level[np.isnan(block)] = -1
+        codes[r0:r0 + step] = level
+    result = _code_frame(codes, df, "grid")
+    result.attrs["edges"] = edges.tolist()
+    return result
+
+
+# 可选的离散化方法；后两种直接输出整数编码
+DISCRETIZERS = ("gaussian", "quantile", "grid")
+
+
+def discretize(df: pd.DataFrame, discretizer: str = "gaussian", sigma: float = 1.0, bins: int = 7,
+               return_zscore: bool = True, edges=None) -> pd.DataFrame:
+    """按名称选择离散化方法。
+
+    Args:
+        df: 数值型 DataFrame，行=随机变量，列=样本。
+        discretizer: ``"gaussian"``（:func:`gaussian_discretization`）、``"quantile"``
+            （:func:`quantile_discretization`）或 ``"grid"``（:func:`grid_discretization`）。
+        sigma: 高斯核标准差，仅 gaussian 有效。
+        bins: 离散等级数量。
+        return_zscore: 仅 gaussian 有效。
+        edges: 网格边界，仅 grid 有效。
+
+    Returns:
+        pandas.DataFrame: 离散化结果。
+
+    Raises:
+        ValueError: discretizer 未知，或参数不合法（见各方法）。
+    """
+    if discretizer == "gaussian":
+        return gaussian_discretization(df, sigma=sigma, bins=bins, return_zscore=return_zscore)
+    if discretizer == "quantile":
+        return quantile_discretization(df, bins=bins)
+    if discretizer == "grid":
+        return grid_discretization(df, bins=bins, edges=edges)
+    raise ValueError(f"未知的离散化方法: {discretizer}")
+
+
+def _row_codes(discrete_df: pd.DataFrame) -> np.ndarray:
+    """把每行的取值编码为 0..L-1 的整数，缺失值编码为 -1。
+
+    数值型数据按行排序后一次性编码（编码顺序为取值大小顺序，VI 与编码顺序无关）；
+    其他类型逐行使用 ``pd.factorize``。
+    """
+    values = discrete_df.to_numpy()
+    if values.dtype.kind not in "fiub":
+        return np.stack([pd.factorize(row, sort=False)[0] for row in values]).astype(np.int32)
+
+    values = values.astype(np.float64, copy=False)
+    order = np.argsort(values, axis=1, kind="stable")  # NaN 排在最后
+    ordered = np.take_along_axis(values, order, axis=1)
+    new = np.ones(ordered.shape, dtype=bool)
+    new[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    ranks = np.cumsum(new, axis=1, dtype=np.int32) - 1
+    codes = np.empty_like(ranks)
+    np.put_along_axis(codes, order, ranks, axis=1)
+    codes[np.isnan(values)] = -1
+    return codes
+
+
+def _encode(discrete_df: pd.DataFrame, ignore_na: bool) -> tuple:
+    """行编码并确定等级数；ignore_na 为 False 时缺失值单独占一个等级。返回 (codes, levels)
+
+    quantile/grid 离散化的结果已经是整数编码（缺失为 -1），直接使用，不再逐行排序重编码。
+    """
+    codes = None
+    if discrete_df.attrs.get("discretizer") in ("quantile", "grid"):
+        values = discrete_df.to_numpy()
+        if values.dtype.kind == "i":
+            codes = values.astype(np.int32)
+    if codes is None:
+        codes = _row_codes(discrete_df)
+    levels = int(codes.max()) + 1 if codes.size else 0
+    if not ignore_na:
+        codes[codes < 0] = levels
+        levels += 1
+    return codes, max(levels, 1)
+
+
+def _onehot(codes: np.ndarray, levels: int) -> np.ndarray:
+    """(rows, m) 的编码 → (rows·L, m) 的 one-hot 矩阵，编码 -1 对应全零行"""
+    # float32 的计数在 2^24 以内是精确的
+    dtype = np.float32 if codes.shape[1] < 2 ** 24 else np.float64
+    onehot = codes[:, None, :] == np.arange(levels, dtype=codes.dtype)[None, :, None]
+    return onehot.reshape(-1, codes.shape[1]).astype(dtype)
+
+
+def unique_rows(values: np.ndarray) -> tuple:
+    """按行的字节内容去重（整行作为哈希键）。
+
+    Args:
+        values: 二维数组。
+
+    Returns:
+        tuple: ``(reps, inverse)``，reps 为各组代表行（首次出现）的位置，按出现顺序排列；
+        inverse 为每一行所属代表在 reps 中的位置，满足 ``values[reps][inverse] == values``。
+    """
+    values = np.ascontiguousarray(values)
+    n = values.shape[0]
+    if n == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    keys = values.reshape(n, -1).view(np.dtype((np.void, values.dtype.itemsize * values[0].size))).ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    # np.unique 按键排序，改为按首次出现的顺序
+    order = np.argsort(first, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(order.size)
+    return first[order].astype(np.intp), rank[inverse.ravel()].astype(np.intp)
+
+
+def _canonical_codes(codes: np.ndarray, levels: int) -> np.ndarray:
+    """把每行编码按取值首次出现的顺序重新编号（缺失仍为 -1）。
+
+    VI 只依赖编码诱导的划分，与取值的具体编号无关；规范化后，划分相同的行（包括所有常数行）
+    得到完全相同的编码，去重时会被合并。
+    """
+    n, m = codes.shape
+    first = np.full((n, levels), m, dtype=np.int64)
+    for level in range(levels):
+        hit = codes == level
+        first[:, level] = np.where(hit.any(axis=1), hit.argmax(axis=1), m)
+    rank = np.argsort(np.argsort(first, axis=1, kind="stable"), axis=1, kind="stable").astype(codes.dtype)
+    canonical = np.take_along_axis(rank, np.maximum(codes, 0), axis=1)
+    canonical[codes < 0] = -1
+    return canonical
+
+
+# information_metrics 可选的输出
+INFO_METRICS = ("vi", "mi", "nvi", "nmi", "joint_entropy")
+
+
+def _entropy_block(OA: np.ndarray, OB: np.ndarray, levels: int, clogc: np.ndarray,
+                   miller_madow: bool = False) -> tuple:
+    """由两组 one-hot 矩阵一次矩阵乘法得到所有变量对的联合计数，再求熵（单位 nat）。
+
+    对变量对 (x, y)，联合计数 c_xy 的行和/列和就是在共同观测上的边缘计数，因此缺失值
+    （全零 one-hot）自然被排除。记 S(c) = Σ c·ln c、N 为共同观测数，则 H = ln N - S(c)/N。
+    Miller–Madow 校正给每个熵加上 (K - 1) / 2N，K 为非零计数的格子数。
+
+    Returns:
+        tuple: ``(hx, hy, hxy, total)``，均为 (A, B) 数组；没有共同观测的变量对熵为 NaN。
+    """
+    A, B = OA.shape[0] // levels, OB.shape[0] // levels
+    joint = np.rint(OA @ OB.T).astype(np.int32).reshape(A, levels, B, levels)
+    mx = joint.sum(axis=3)                     # (A, L, B)
+    my = joint.sum(axis=1)                     # (A, B, L)
+    total = mx.sum(axis=1)                     # (A, B) 共同观测数
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_total = np.log(total)
+        hxy = log_total - clogc[joint].sum(axis=(1, 3)) / total
+        hx = log_total - clogc[mx].sum(axis=1) / total
+        hy = log_total - clogc[my].sum(axis=2) / total
+        if miller_madow:
+            hxy += ((joint > 0).sum(axis=(1, 3)) - 1) / (2.0 * total)
+            hx += ((mx > 0).sum(axis=1) - 1) / (2.0 * total)
+            hy += ((my > 0).sum(axis=2) - 1) / (2.0 * total)
+
+    empty = total == 0
+    for h in (hx, hy, hxy):
+        h[empty] = np.nan
+    return hx, hy, hxy, total
+
+
+def _info_metrics(hx: np.ndarray, hy: np.ndarray, hxy: np.ndarray, metrics: tuple) -> dict:
+    """由边缘熵与联合熵逐元素计算所需的指标"""
+    out = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if "vi" in metrics or "nvi" in metrics:
+            vi = np.maximum((hxy - hx) + (hxy - hy), 0.0)
+            if "vi" in metrics:
+                out["vi"] = vi
+            if "nvi" in metrics:
+                # VI / H(X,Y)，两变量都是常数时为 0
+                out["nvi"] = np.where(hxy > 0, vi / hxy, np.where(np.isnan(hxy), np.nan, 0.0))
+        if "mi" in metrics or "nmi" in metrics:
+            mi = np.maximum(hx + hy - hxy, 0.0)
+            if "mi" in metrics:
+                out["mi"] = mi
+            if "nmi" in metrics:
+                # MI / ((H(X) + H(Y)) / 2)，与 sklearn 的 arithmetic 归一化一致；两变量都是常数时为 1
+                mean = (hx + hy) / 2.0
+                out["nmi"] = np.where(mean > 0, np.minimum(mi / mean, 1.0), np.where(np.isnan(mean), np.nan, 1.0))
+        if "joint_entropy" in metrics:
+            out["joint_entropy"] = hxy.copy()
+    return out
+
+
+def _clogc(m: int) -> np.ndarray:
+    """c·ln(c) 查找表，c = 0..m"""
+    clogc = np.zeros(m + 1)
+    counts = np.arange(1, m + 1, dtype=np.float64)
+    clogc[1:] = counts * np.log(counts)
+    return clogc
+
+
+def _info_tiles(codes: np.ndarray, levels: int, base: float, metrics: tuple, full_rows: bool,
+                tile_rows: int = None, miller_madow: bool = False, block: int = None, skip=None):
+    """分块生成信息论指标。
+
+    Args:
+        codes: (n, m) 行编码，-1 为缺失。
+        levels: 编码等级数。
+        base: 熵的对数底。
+        metrics: 需要的指标，取自 ``INFO_METRICS``。
+        full_rows: True 时按行块产出完整的行 ``(r0, r1, 0, n, values)``；False 时只产出
+            上三角的块 ``(r0, r1, c0, c1, values)``，由调用方镜像。
+        tile_rows: full_rows 时每个行块的行数。
+        miller_madow: 是否做 Miller–Madow 偏差校正。
+        block: 上三角分块的边长，默认由 :func:`core.planner.kernel_block` 决定。
+        skip: 上三角分块时的 ``skip(r0, c0) -> bool``，为 True 的块不计算也不产出（用于断点续算）。
+
+    Yields:
+        tuple: ``(r0, r1, c0, c1, values)``，values 为指标名 → 数组。
+    """
+    n, m = codes.shape
+    block = block or kernel_block(levels)
+    clogc = _clogc(m)
+    scale = 1.0 / np.log(base)
+    # 除归一化指标外都以熵为单位，需要换底
+    scaled = {"vi", "mi", "joint_entropy"}
+
+    # one-hot 总量不大时一次性构建，否则每块现算
+    if n * levels * m * 4 <= 4 * KERNEL_BYTES:
+        onehot_all = _onehot(codes, levels)
+        onehot = lambda a, b: onehot_all[a * levels:b * levels]
+    else:
+        onehot = lambda a, b: _onehot(codes[a:b], levels)
+
+    def compute(r0, r1, c0, c1):
+        hx, hy, hxy, _ = _entropy_block(onehot(r0, r1), onehot(c0, c1), levels, clogc, miller_madow)
+        values = _info_metrics(hx, hy, hxy, metrics)
+        # 自身的距离为 0（没有任何观测时保持 NaN）
+        diag = np.arange(max(r0, c0), min(r1, c1))
+        if diag.size:
+            for name in ("vi", "nvi"):
+                if name in values:
+                    self_values = values[name][diag - r0, diag - c0]
+                    values[name][diag - r0, diag - c0] = np.where(np.isnan(self_values), np.nan, 0.0)
+        for name in scaled.intersection(values):
+            values[name] *= scale
+        return values
+
+    if not full_rows:
+        for r0 in range(0, n, block):
+            r1 = min(r0 + block, n)
+            for c0 in range(r0, n, block):
+                if skip is not None and skip(r0, c0):
+                    continue
+                c1 = min(c0 + block, n)
+                yield r0, r1, c0, c1, compute(r0, r1, c0, c1)
+        return
+
+    tile_rows = max(block, tile_rows or block)
+    for t0 in range(0, n, tile_rows):
+        t1 = min(t0 + tile_rows, n)
+        rows = {name: np.empty((t1 - t0, n)) for name in metrics}
+        for r0 in range(t0, t1, block):
+            r1 = min(r0 + block, t1)
+            for c0 in range(0, n, block):
+                c1 = min(c0 + block, n)
+                for name, values in compute(r0, r1, c0, c1).items():
+                    rows[name][r0 - t0:r1 - t0, c0:c1] = values
+        yield t0, t1, 0, n, rows
+
+
+def _masked_parts(X: np.ndarray) -> tuple:
+    """含缺失值的数据 → ``(X0, X0², M)``：缺失处置 0 的数值、其平方与观测掩码，均为 float64 以便交给 BLAS"""
+    observed = ~np.isnan(X)
+    X0 = np.where(observed, X, 0.0)
+    return X0, X0 * X0, observed.astype(np.float64)
+
+
+def _masked_euclidean(a: tuple, b: tuple) -> np.ndarray:
+    """成对完整（pairwise-complete）的欧氏距离，a、b 为 :func:`_masked_parts` 的结果。
+
+    只在两行都有观测的列上求平方和：d² = X0²·M_bᵀ + M_a·X0_b²ᵀ - 2·X0_a·X0_bᵀ，共同观测数为 M_a·M_bᵀ，
+    四次矩阵乘法即得整块结果。平方和按 sqrt(m / 共同观测数) 放大到全部 m 列，与
+    ``sklearn.metrics.pairwise.nan_euclidean_distances`` 一致；没有共同观测的变量对为 NaN。
+    """
+    A0, A2, MA = a
+    B0, B2, MB = b
+    d2 = A2 @ MB.T
+    d2 += MA @ B2.T
+    d2 -= 2.0 * (A0 @ B0.T)
+    count = MA @ MB.T
+    np.maximum(d2, 0.0, out=d2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d2 *= A0.shape[1] / count
+    d2[count == 0] = np.nan
+    return np.sqrt(d2, out=d2)
+
+
+def _euclidean_tiles(X: np.ndarray, tile_rows: int, skip=None):
+    """按行块生成欧氏距离 ``(r0, r1, 0, n, block)``；``skip(r0, 0)`` 为 True 的行块跳过。
+
+    含 NaN 时改用成对完整的掩码核（:func:`_masked_euclidean`），否则与原来一样调用 sklearn。
+    """
+    n = X.shape[0]
+    parts = _masked_parts(X) if np.isnan(X).any() else None
+    for r0 in range(0, n, tile_rows):
+        if skip is not None and skip(r0, 0):
+            continue
+        r1 = min(r0 + tile_rows, n)
+        rows = np.arange(r1 - r0)
+        if parts is None:
+            block = pairwise_distances(X[r0:r1], X, metric="euclidean")
+            # 分块时 sklearn 不会把自身距离置零，点积展开的舍入误差可能留下 1e-7 量级的非零值
+            block[rows, rows + r0] = 0.0
+        else:
+            block = _masked_euclidean(tuple(p[r0:r1] for p in parts), parts)
+            # 全部缺失的行与自身也没有共同观测，保持 NaN
+            own = block[rows, rows + r0]
+            block[rows, rows + r0] = np.where(np.isnan(own), np.nan, 0.0)
+        yield r0, r1, 0, n, block
+
+
+def _allocate(n: int, strategy: str, scratch_dir: str = None) -> tuple:
+    """为 n×n 结果分配内存方阵（dense）或临时目录中的内存映射文件（tiled），返回 (数组, 路径)"""
+    if strategy == "dense":
+        return np.empty((n, n)), None
+    fd, path = tempfile.mkstemp(prefix="corr_", suffix=".dist", dir=scratch_dir or get_runtime().scratch_dir)
+    os.close(fd)
+    return np.memmap(path, dtype=np.float64, mode="w+", shape=(n, n)), path
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        # 已被删除，或 Windows 上仍有映射未关闭
+        pass
+
+
+def _to_frame(out: np.ndarray, path: str, labels: pd.Index) -> pd.DataFrame:
+    """把结果方阵包装为 DataFrame；内存映射结果落盘后以只读方式重新映射。
+
+    临时文件归结果所有：映射（连同 DataFrame 及其视图）被回收时删除，不会遗留在临时目录中。
+    """
+    if path is not None:
+        n = out.shape[0]
+        out.flush()
+        del out
+        out = np.memmap(path, dtype=np.float64, mode="r", shape=(n, n))
+        weakref.finalize(out, _remove_file, path)
+    result = pd.DataFrame(out, index=labels, columns=labels, copy=False)
+    if path is not None:
+        result.attrs["path"] = path
+    return result
+
+
+def _assemble(tiles, labels: pd.Index, strategy: str, k: int = 10, scratch_dir: str = None,
+              symmetric: bool = False) -> pd.DataFrame:
+    """把分块结果组装为 dense / tiled（内存映射）/ topk（稀疏近邻长表）结果。
+
+    Args:
+        tiles: ``(r0, r1, c0, c1, values)`` 的迭代器。
+        labels: 变量标签。
+        strategy: ``"dense"``、``"tiled"`` 或 ``"topk"``。
+        k: topk 保留的近邻数。
+        scratch_dir: tiled 结果的目录。
+        symmetric: 块只覆盖上三角，需要镜像到下三角（dense/tiled）。
+
+    Returns:
+        pandas.DataFrame: dense/tiled 为 n×n 方阵；topk 为以 (source, target) 为
+        MultiIndex、单列 ``distance`` 的长表，每个 source 按距离升序排列。
+    """
+    n = len(labels)
+    if strategy in ("dense", "tiled"):
+        out, path = _allocate(n, strategy, scratch_dir)
+        for r0, r1, c0, c1, values in tiles:
+            out[r0:r1, c0:c1] = values
+            if symmetric and c0 != r0:
+                out[c0:c1, r0:r1] = values.T
+        return _to_frame(out, path, labels)
+
+    kk = min(k, n - 1)
+    sources, targets, distances = [], [], []
+    for r0, r1, _, _, values in tiles:
+        values = np.where(np.isnan(values), np.inf, values)
+        rows = np.arange(r1 - r0)
+        values[rows, rows + r0] = np.inf  # 排除自身
+        if kk <= 0:
+            continue
+        idx = np.argpartition(values, kk - 1, axis=1)[:, :kk]
+        dist = np.take_along_axis(values, idx, axis=1)
+        order = np.argsort(dist, axis=1, kind="stable")
+        idx = np.take_along_axis(idx, order, axis=1)
+        dist = np.take_along_axis(dist, order, axis=1)
+        keep = np.isfinite(dist)
+        sources.append(np.broadcast_to((rows + r0)[:, None], idx.shape)[keep])
+        targets.append(idx[keep])
+        distances.append(dist[keep])
+
+    source = np.concatenate(sources) if sources else np.empty(0, dtype=np.intp)
+    target = np.concatenate(targets) if targets else np.empty(0, dtype=np.intp)
+    index = pd.MultiIndex.from_arrays([labels[source], labels[target]], names=["source", "target"])
+    return pd.DataFrame({"distance": np.concatenate(distances) if distances else np.empty(0)}, index=index)
+
+
+def _expand_tiles(values: np.ndarray, inverse: np.ndarray, tile_rows: int):
+    """把代表行之间的结果按逆映射展开为完整行块 ``(r0, r1, 0, n, block)``"""
+    n = inverse.size
+    for r0 in range(0, n, tile_rows):
+        r1 = min(r0 + tile_rows, n)
+        yield r0, r1, 0, n, np.asarray(values[inverse[r0:r1]])[:, inverse]
+
+
+def _assemble_unique(tiles, reps: np.ndarray, inverse: np.ndarray, labels: pd.Index, strategy: str,
+                     k: int = 10, scratch_dir: str = None, symmetric: bool = False, lazy: bool = False):
+    """只在代表行之间计算，再按逆映射展开为完整结果。
+
+    Args:
+        tiles: 代表行之间的分块结果 ``(r0, r1, c0, c1, values)``，位置以代表行计。
+        reps: 代表行位置，见 :func:`unique_rows`。
+        inverse: 逆映射，见 :func:`unique_rows`。
+        labels: 完整的变量标签。
+        strategy: 完整结果的组装策略，见 :func:`_assemble`。
+        k: topk 保留的近邻数。
+        scratch_dir: tiled 结果的目录。
+        symmetric: tiles 是否只覆盖上三角。
+        lazy: True 时不展开，直接返回代表行矩阵上的 :class:`IndexedMatrix` 视图。
+
+    Returns:
+        pandas.DataFrame | IndexedMatrix: 与不去重时相同的结果。
+    """
+    n_unique = reps.size
+    # 代表行矩阵足够小时放在内存里，否则与完整结果一样写到临时文件
+    inner = "dense" if strategy == "dense" or lazy or n_unique * n_unique * ITEMSIZE <= 4 * KERNEL_BYTES else "tiled"
+    small = _assemble(tiles, labels[reps], inner, scratch_dir=scratch_dir, symmetric=symmetric)
+    if lazy:
+        return IndexedMatrix.expanded(small.to_numpy(), inverse, labels)
+
+    tile_rows = max(1, min(MAX_TILE_ROWS, KERNEL_BYTES // (ITEMSIZE * len(labels))))
+    result = _assemble(_expand_tiles(small.to_numpy(), inverse, tile_rows), labels, strategy,
+                       k=k, scratch_dir=scratch_dir)
+    # 代表行矩阵的临时文件随 small 的映射一起删除
+    del small
+    return result
+
+
+@span("distance.information")
+def information_distance(discrete_df: pd.DataFrame, base: float = 2.0, ignore_na: bool = True,
+                         strategy: str = "dense", k: int = 10, scratch_dir: str = None,
+                         tile_rows: int = None, dedup: bool = True, expand: bool = True) -> pd.DataFrame:
     """计算变分信息距离（Variation of Information, VI）。
 
-    对每一行分别做编码（`pd.factorize`），再两两构建列联表并计算
+    对每一行编码后，按块把 one-hot 矩阵相乘得到所有变量对的列联表，再计算
     :math:`VI(X,Y) = 2H(X,Y) - H(X) - H(Y)`。
 
     Args:
-        discrete_df: 离散化后的 DataFrame（每行一个随机变量，列为样本）。
+        discrete_df: 离散化后的 DataFrame（每行一个随机变量，列为样本）；quantile/grid 离散化输出的
+            整数编码直接使用。
         base: 熵的对数底，默认 2 表示以 bit 为单位。
-        ignore_na: True 时在两变量的“共同观测”上计算（同时非缺失）。
+        ignore_na: True 时在两变量的“共同观测”上计算（同时非缺失）；False 时缺失值视为一个单独的取值。
+        strategy: ``"dense"``（内存方阵）、``"tiled"``（写入 scratch_dir 的内存映射方阵）
+            或 ``"topk"``（每个变量最近的 k 个邻居），见 :mod:`core.planner`。
+        k: topk 保留的近邻数。
+        scratch_dir: tiled 结果的目录，默认运行配置的临时目录。
+        tile_rows: topk 每次处理的行数。
+        dedup: 是否先合并编码划分相同的变量（重复变量、常数变量），只在代表变量之间计算。
+        expand: False 时不展开完整矩阵，返回代表变量矩阵上按逆映射索引的 :class:`IndexedMatrix`
+            视图（strategy 不生效）。
 
     Returns:
-        pandas.DataFrame: 对称的 VI 距离矩阵，主对角为 0。
+        pandas.DataFrame: 对称的 VI 距离矩阵，主对角为 0；topk 时为 (source, target) → distance 的长表；
+        expand 为 False 时为 IndexedMatrix。
 
     Raises:
         TypeError: 输入不是 DataFrame。
-        ValueError: DataFrame 为空或 base ≤ 0。
+        ValueError: DataFrame 为空、base ≤ 0 或 strategy 未知。
     """
     if not isinstance(discrete_df, pd.DataFrame):
         raise TypeError("discrete_df 必须是 pandas.DataFrame。")
@@ -114,60 +715,155 @@ def information_distance(discrete_df: pd.DataFrame, base: float = 2.0, ignore_na
         raise ValueError("离散化数据为空。")
     if base <= 0:
         raise ValueError("base 必须为正。")
-    
-    rows = []
-    for _, row in discrete_df.iterrows():
-        c, _ = pd.factorize(row, sort=False)  # NaN→-1
-        rows.append(c.astype(np.int64))
-    X = np.stack(rows, axis=0)
-    n = X.shape[0]
-    out = np.zeros((n, n), dtype=float)
-
-    for i in range(n):
-        for j in range(i, n):
-            xi, xj = X[i], X[j]
-            if ignore_na:
-                m = (xi >= 0) & (xj >= 0)
-                xi, xj = xi[m], xj[m]
-            if xi.size == 0:
-                vij = np.nan
-            elif i == j:
-                vij = 0.0
-            else:
-                Ai, Aj = xi.max()+1, xj.max()+1
-                cont = np.zeros((Ai, Aj), dtype=np.int64)
-                np.add.at(cont, (xi, xj), 1)
-                # H(X), H(Y), H(X,Y)
-                Hx  = entropy(cont.sum(axis=1), base=base)
-                Hy  = entropy(cont.sum(axis=0), base=base)
-                Hxy = entropy(cont.ravel(),      base=base)
-                # 或者用 I：mi_nats = mutual_info_score(None, None, contingency=cont)
-                vij = 2*Hxy - Hx - Hy
-            out[i, j] = out[j, i] = vij
-
-    return pd.DataFrame(out, index=discrete_df.index, columns=discrete_df.index)
+    if strategy not in ("dense", "tiled", "topk"):
+        raise ValueError(f"未知的执行策略: {strategy}")
+
+    with span("distance.information.factorize", n=discrete_df.shape[0]):
+        codes, levels = _encode(discrete_df, ignore_na)
+
+    n = codes.shape[0]
+    if dedup:
+        with span("distance.information.dedup", n=n):
+            reps, inverse = unique_rows(_canonical_codes(codes, levels))
+    else:
+        reps = inverse = np.arange(n)
+    if reps.size < n or not expand:
+        n_unique = reps.size
+        with span("distance.information.pairs", pairs=n_unique * (n_unique - 1) // 2, strategy=strategy,
+                  unique=int(n_unique)):
+            tiles = _info_tiles(codes[reps], levels, base, ("vi",), full_rows=False)
+            tiles = ((r0, r1, c0, c1, values["vi"]) for r0, r1, c0, c1, values in tiles)
+            return _assemble_unique(tiles, reps, inverse, discrete_df.index, strategy, k=k,
+                                    scratch_dir=scratch_dir, symmetric=True, lazy=not expand)
+
+    with span("distance.information.pairs", pairs=n * (n - 1) // 2, strategy=strategy):
+        tiles = _info_tiles(codes, levels, base, ("vi",), full_rows=strategy == "topk", tile_rows=tile_rows)
+        tiles = ((r0, r1, c0, c1, values["vi"]) for r0, r1, c0, c1, values in tiles)
+        return _assemble(tiles, discrete_df.index, strategy, k=k, scratch_dir=scratch_dir,
+                         symmetric=strategy != "topk")
+
+
+@span("distance.information_metrics")
+def information_metrics(discrete_df: pd.DataFrame, metrics=("vi",), base: float = 2.0,
+                        ignore_na: bool = True, miller_madow: bool = False, strategy: str = "dense",
+                        scratch_dir: str = None) -> dict:
+    """一次遍历同时计算多种信息论指标矩阵。
+
+    所有指标共享同一批联合计数与边缘熵，额外的指标只增加逐元素运算：
 
+    - ``vi``：变分信息 2H(X,Y) - H(X) - H(Y)；
+    - ``mi``：互信息 H(X) + H(Y) - H(X,Y)；
+    - ``nvi``：归一化变分信息 VI / H(X,Y)，取值 [0, 1]；
+    - ``nmi``：归一化互信息 MI / ((H(X) + H(Y)) / 2)，取值 [0, 1]；
+    - ``joint_entropy``：联合熵 H(X,Y)。
 
+    Args:
+        discrete_df: 离散化后的 DataFrame（每行一个随机变量，列为样本）。
+        metrics: 需要的指标名，单个字符串或序列。
+        base: 熵的对数底，默认 2 表示以 bit 为单位（只影响 vi、mi、joint_entropy）。
+        ignore_na: True 时在两变量的共同观测上计算；False 时缺失值视为一个单独的取值。
+        miller_madow: 是否对各熵做 Miller–Madow 偏差校正 (K - 1) / 2N。
+        strategy: ``"dense"`` 或 ``"tiled"``，见 :func:`information_distance`。
+        scratch_dir: tiled 结果的目录，默认运行配置的临时目录。
+
+    Returns:
+        dict: 指标名 → 对称的 n×n DataFrame。
+
+    Raises:
+        TypeError: 输入不是 DataFrame。
+        ValueError: DataFrame 为空、base ≤ 0、指标名或 strategy 未知。
+    """
+    if not isinstance(discrete_df, pd.DataFrame):
+        raise TypeError("discrete_df 必须是 pandas.DataFrame。")
+    if discrete_df.empty:
+        raise ValueError("离散化数据为空。")
+    if base <= 0:
+        raise ValueError("base 必须为正。")
+    if strategy not in ("dense", "tiled"):
+        raise ValueError(f"information_metrics 不支持的执行策略: {strategy}")
+    metrics = (metrics,) if isinstance(metrics, str) else tuple(dict.fromkeys(metrics))
+    unknown = [name for name in metrics if name not in INFO_METRICS]
+    if unknown or not metrics:
+        raise ValueError(f"未知的信息指标: {unknown}，可选 {INFO_METRICS}")
+
+    with span("distance.information.factorize", n=discrete_df.shape[0]):
+        codes, levels = _encode(discrete_df, ignore_na)
+
+    n = codes.shape[0]
+    outs = {name: _allocate(n, strategy, scratch_dir) for name in metrics}
+    with span("distance.information.pairs", pairs=n * (n - 1) // 2, metrics=list(metrics)):
+        for r0, r1, c0, c1, values in _info_tiles(codes, levels, base, metrics, full_rows=False,
+                                                  miller_madow=miller_madow):
+            for name, (out, _) in outs.items():
+                out[r0:r1, c0:c1] = values[name]
+                if c0 != r0:
+                    out[c0:c1, r0:r1] = values[name].T
+    return {name: _to_frame(out, path, discrete_df.index) for name, (out, path) in outs.items()}
+
+
+def _euclidean(df: pd.DataFrame, strategy: str, tile_rows: int, k: int, scratch_dir: str, dedup: bool,
+               expand: bool):
+    """欧氏距离：去重后在代表行之间计算，或直接计算"""
+    if dedup or not expand:
+        X = df.to_numpy(dtype=np.float64)
+        reps, inverse = unique_rows(X) if dedup else (np.arange(len(X)), np.arange(len(X)))
+        if reps.size < len(X) or not expand:
+            tiles = _euclidean_tiles(X[reps], tile_rows or reps.size)
+            return _assemble_unique(tiles, reps, inverse, df.index, strategy, k=k,
+                                    scratch_dir=scratch_dir, lazy=not expand)
+    X = df.to_numpy(dtype=np.float64)
+    if strategy == "dense" and not np.isnan(X).any():
+        eudistance = pairwise_distances(X, metric="euclidean")
+        return pd.DataFrame(eudistance, index=df.index, columns=df.index)
+    tiles = _euclidean_tiles(X, tile_rows or len(X))
+    return _assemble(tiles, df.index, strategy, k=k, scratch_dir=scratch_dir)
+
+
+@span("distance.compute")
+@thread_limited
 def compute_distance_matrix(df: pd.DataFrame, method: str, sigma: float = 1.0, bins: int = 13,
-                            return_zscore: bool = True) -> pd.DataFrame:
+                            return_zscore: bool = True, strategy: str = "dense", budget=None,
+                            k: int = 10, scratch_dir: str = None, dedup: bool = True,
+                            expand: bool = True, sketch: int = None, job_dir: str = None,
+                            discretizer: str = "gaussian", edges=None) -> pd.DataFrame:
     """根据方法计算距离矩阵。
 
     - euclidean：计算欧氏距离；
-    - information：先做高斯离散化，再计算 VI 距离。
+    - information：先离散化（默认高斯离散化），再计算 VI 距离。
 
     Args:
-        df: 行=随机变量、列=样本的 DataFrame。若首列为字符串，会被设为行索引。
+        df: 行=随机变量、列=样本的 DataFrame。若首列为字符串，会被设为行索引。NaN 视为缺失：欧氏距离
+            为只在共同观测上计算的成对完整距离（按 sqrt(m / 共同观测数) 放大，与 sklearn 的
+            ``nan_euclidean_distances`` 一致），信息距离只在共同观测上计算 VI；没有共同观测的变量对为 NaN。
         method: 距离类型，``"euclidean"`` 或 ``"information"``。
         sigma: 高斯离散化的标准差，仅在 ``information`` 有效，需为正。
         bins: 离散等级数量，仅在 ``information`` 有效，需为整数且 ≥ 2。
         return_zscore: ``information`` 路径下是否返回 z-score 中心。
+        strategy: ``"dense"``、``"tiled"``、``"topk"``，或 ``"auto"`` 由
+            :func:`core.planner.plan_distance` 按内存预算选择；``information`` 还可以用 ``"lsh"``，
+            只在 MinHash/LSH 生成的候选变量对上计算，得到近似的 topk 结果（见 :mod:`core.lsh`）。
+        budget: 内存预算（字节数或 ``"4G"``），用于 auto 与分块大小。
+        k: topk 保留的近邻数。
+        scratch_dir: tiled 结果的目录，默认运行配置的临时目录。
+        dedup: 是否先合并重复的变量（欧氏距离按原始行，信息距离按离散编码的划分），
+            只在代表变量之间计算后再按索引映射展开。
+        expand: False 时返回代表变量矩阵上的 :class:`IndexedMatrix` 视图，不展开完整矩阵。
+        sketch: 仅 ``euclidean`` 有效；给定时先用稀疏随机投影把样本维降到 sketch 维再计算近似距离
+            （见 :mod:`core.sketch`），误差报告记录在结果的 ``attrs["sketch"]`` 中；默认精确计算。
+        job_dir: 给定时在该作业目录中分块计算并记录进度，中断后用同一数据与参数再次调用会从
+            未完成的分块继续，结果为映射自目录中 ``distance.npy`` 的方阵（见 :mod:`core.checkpoint`）；
+            不支持 topk/lsh，expand 不生效。
+        discretizer: ``information`` 的离散化方法，``"gaussian"``、``"quantile"``（按行等频）或
+            ``"grid"``（全局固定网格），见 :func:`discretize`；lsh 只支持 gaussian。
+        edges: grid 的箱边界，默认在全部数据的取值范围上等分为 bins 箱。
 
     Returns:
-        pandas.DataFrame: 带行列标签的方阵距离矩阵。
+        pandas.DataFrame: 带行列标签的方阵距离矩阵；topk/lsh 时为 (source, target) → distance 的长表；
+        expand 为 False 时为 IndexedMatrix。
 
     Raises:
         TypeError: df 不是 DataFrame，或 bins 不是整数。
-        ValueError: df 为空。
+        ValueError: df 为空、method/strategy 未知，auto 找不到预算内的策略，或作业目录与数据/参数不一致。
     """
     if not isinstance(df, pd.DataFrame):
         raise TypeError("df 必须是 pandas.DataFrame。")
@@ -179,13 +875,156 @@ def compute_distance_matrix(df: pd.DataFrame, method: str, sigma: float = 1.0, b
     if first_col.dtype == 'object' or isinstance(first_col.iloc[0], str):
         df = df.set_index(df.columns[0])  # 把第一列作为索引
 
+    if method not in ("euclidean", "information"):
+        raise ValueError(f"未知的距离计算方法: {method}")
+    if discretizer not in DISCRETIZERS:
+        raise ValueError(f"未知的离散化方法: {discretizer}")
+
+    if job_dir is not None:
+        if strategy in ("topk", "lsh"):
+            raise ValueError("断点续算需要把完整矩阵写入作业目录，不支持 topk/lsh 策略。")
+        from core.checkpoint import run_job
+        return run_job(df, method, job_dir, sigma=sigma, bins=bins, return_zscore=return_zscore,
+                       dedup=dedup, sketch=sketch, discretizer=discretizer, edges=edges)
+
+    sketched = None
+    if sketch is not None and method == "euclidean":
+        # 先随机投影到 sketch 维，之后的计划与计算都在投影坐标上进行
+        sketched = sketch_frame(df, sketch)
+        df = sketched.embedding
+
+    if strategy == "lsh":
+        if method != "information":
+            raise ValueError("lsh 策略只支持信息距离。")
+        if discretizer != "gaussian":
+            raise ValueError("lsh 策略只支持高斯离散化。")
+        from core.lsh import lsh_neighbors
+        return lsh_neighbors(df, k=k, sigma=sigma, bins=bins)
+
+    tile_rows = None
+    if strategy != "dense":
+        has_nan = method == "euclidean" and bool(df.isna().to_numpy().any())
+        plan = plan_distance(df.shape[0], df.shape[1], method, bins=bins, budget=budget,
+                             strategy=strategy, k=k, scratch_dir=scratch_dir, has_nan=has_nan)
+        if strategy == "auto" and not plan.feasible:
+            raise ValueError(f"{plan.describe()}，超出内存预算。")
+        strategy, tile_rows = plan.strategy, plan.tile_rows
+
     if method == "euclidean":
         # standardized_df = zscore_standardize_rows(df)
-        eudistance = pairwise_distances(df, metric="euclidean")
-        return pd.DataFrame(eudistance, index=df.index, columns=df.index)
-        
-    elif method == "information":
-        discretized_df = gaussian_discretization(df, sigma=sigma, bins=bins, return_zscore=return_zscore)
-        return information_distance(discretized_df)
+        with span("distance.euclidean", n=df.shape[0], strategy=strategy):
+            result = _euclidean(df, strategy, tile_rows, k, scratch_dir, dedup, expand)
+        if sketched is not None and isinstance(result, pd.DataFrame):
+            result.attrs["sketch"] = {"n_components": sketched.n_components, "eps": sketched.eps,
+                                      "delta": sketched.delta, "check": sketched.check,
+                                      "describe": sketched.describe()}
+        return result
+
+    discretized_df = discretize(df, discretizer, sigma=sigma, bins=bins, return_zscore=return_zscore, edges=edges)
+    return information_distance(discretized_df, strategy=strategy, k=k, scratch_dir=scratch_dir,
+                                tile_rows=tile_rows, dedup=dedup, expand=expand)
+
+
+def _cross_information(codes_a: np.ndarray, codes_b: np.ndarray, levels: int, base: float) -> np.ndarray:
+    """A、B 两组编码之间两两的 VI，返回 (|A|, |B|) 数组"""
+    block = kernel_block(levels)
+    clogc = _clogc(codes_a.shape[1])
+    out = np.empty((codes_a.shape[0], codes_b.shape[0]))
+    for c0 in range(0, codes_b.shape[0], block):
+        c1 = min(c0 + block, codes_b.shape[0])
+        OB = _onehot(codes_b[c0:c1], levels)
+        for r0 in range(0, codes_a.shape[0], block):
+            r1 = min(r0 + block, codes_a.shape[0])
+            hx, hy, hxy, _ = _entropy_block(_onehot(codes_a[r0:r1], levels), OB, levels, clogc)
+            out[r0:r1, c0:c1] = _info_metrics(hx, hy, hxy, ("vi",))["vi"]
+    return out / np.log(base)
+
+
+def _cross_euclidean(X_a: np.ndarray, X_b: np.ndarray) -> np.ndarray:
+    """A、B 两组行之间两两的欧氏距离，按行分块以限制中间数组；含 NaN 时为成对完整的距离"""
+    out = np.empty((X_a.shape[0], X_b.shape[0]))
+    rows = max(1, KERNEL_BYTES // (ITEMSIZE * max(1, X_b.shape[0])))
+    if np.isnan(X_a).any() or np.isnan(X_b).any():
+        parts = _masked_parts(X_b)
+        for r0 in range(0, X_a.shape[0], rows):
+            out[r0:r0 + rows] = _masked_euclidean(_masked_parts(X_a[r0:r0 + rows]), parts)
+        return out
+    for r0 in range(0, X_a.shape[0], rows):
+        out[r0:r0 + rows] = pairwise_distances(X_a[r0:r0 + rows], X_b, metric="euclidean")
+    return out
+
+
+def _zero_self_pairs(out: np.ndarray, a: pd.DataFrame, b: pd.DataFrame) -> None:
+    """A、B 中标签相同且数值相同的变量是同一变量：与方阵结果一致把距离置 0（没有任何观测时保持 NaN）。
+
+    点积展开的舍入误差会在这些位置留下 1e-7 量级的非零值。
+    """
+    if b.index.is_unique:
+        j = b.index.get_indexer(a.index)
+        i = np.flatnonzero(j >= 0)
+        j = j[i]
     else:
-        raise ValueError(f"未知的距离计算方法: {method}")
\ No newline at end of file
+        i, j = np.nonzero(a.index.to_numpy()[:, None] == b.index.to_numpy()[None, :])
+    if not i.size:
+        return
+    X_a, X_b = a.to_numpy()[i], b.to_numpy()[j]
+    same = ((X_a == X_b) | (pd.isna(X_a) & pd.isna(X_b))).all(axis=1)
+    i, j = i[same], j[same]
+    out[i, j] = np.where(np.isnan(out[i, j]), np.nan, 0.0)
+
+
+@span("distance.cross")
+@thread_limited
+def cross_distance(a: pd.DataFrame, b: pd.DataFrame, method: str, sigma: float = 1.0, bins: int = 13,
+                   return_zscore: bool = True, base: float = 2.0, ignore_na: bool = True) -> pd.DataFrame:
+    """计算两组变量之间的矩形距离矩阵 A × B，耗时 O(|A|·|B|)。
+
+    两组变量需在同一批样本上观测（列数相同）；信息距离的离散化逐行进行，因此结果与从
+    ``compute_distance_matrix`` 的完整方阵中取出对应子矩阵一致。
+
+    Args:
+        a: 查询变量，行=变量、列=样本；首列为字符串时作为行索引。
+        b: 目标变量，格式同 a。
+        method: ``"euclidean"`` 或 ``"information"``。
+        sigma: 高斯离散化的标准差，仅 ``information`` 有效。
+        bins: 离散等级数量，仅 ``information`` 有效。
+        return_zscore: 离散化是否返回 z-score 中心，仅 ``information`` 有效。
+        base: 熵的对数底，仅 ``information`` 有效。
+        ignore_na: 是否只在共同观测上计算 VI，见 :func:`information_distance`。
+
+    Returns:
+        pandas.DataFrame: 行为 a 的变量、列为 b 的变量的距离矩阵。
+
+    Raises:
+        TypeError: a 或 b 不是 DataFrame。
+        ValueError: 数据为空、样本数不一致或 method 未知。
+    """
+    frames = []
+    for name, df in (("a", a), ("b", b)):
+        if not isinstance(df, pd.DataFrame):
+            raise TypeError(f"{name} 必须是 pandas.DataFrame。")
+        if df.empty:
+            raise ValueError(f"{name} 为空，无法计算距离。")
+        # 与 compute_distance_matrix 一致：首列为字符串时作为行索引
+        first_col = df.iloc[:, 0]
+        if first_col.dtype == 'object' or isinstance(first_col.iloc[0], str):
+            df = df.set_index(df.columns[0])
+        frames.append(df)
+    a, b = frames
+    if a.shape[1] != b.shape[1]:
+        raise ValueError(f"两组变量的样本数不一致：{a.shape[1]} ≠ {b.shape[1]}")
+    if method not in ("euclidean", "information"):
+        raise ValueError(f"未知的距离计算方法: {method}")
+
+    if method == "euclidean":
+        out = _cross_euclidean(a.to_numpy(dtype=np.float64), b.to_numpy(dtype=np.float64))
+        _zero_self_pairs(out, a, b)
+        return pd.DataFrame(out, index=a.index, columns=b.index)
+
+    discrete = [gaussian_discretization(df, sigma=sigma, bins=bins, return_zscore=return_zscore) for df in (a, b)]
+    # 两组一起编码，保证等级数与缺失值的编码一致
+    stacked = pd.DataFrame(np.vstack([d.to_numpy() for d in discrete]))
+    codes, levels = _encode(stacked, ignore_na)
+    out = _cross_information(codes[:len(a)], codes[len(a):], levels, base)
+    _zero_self_pairs(out, a, b)
+    return pd.DataFrame(out, index=a.index, columns=b.index)
@@ -0,0 +1,448 @@
+"""多进程/多机分块计算距离矩阵。
+
+协调者（:class:`Coordinator`）在 :class:`core.checkpoint.DistanceJob` 的作业目录上工作：把尚未完成的
+分块（信息距离为上三角的正方形块，欧氏距离为行块）分发给通过 socket 连接进来的工作进程，收到结果后
+写入目录中的内存映射矩阵并标记完成，全部完成后展开为完整结果。因为结果按分块落盘，协调者本身中断
+后重新运行同样会从未完成的分块继续。
+
+通信使用 :mod:`multiprocessing.connection`（带共享密钥的 HMAC 认证，消息为 pickle 的元组）：
+
+- 工作进程连上后发送 ``("hello", 主机名, pid)``，协调者回复 ``("setup", method, values, levels, base)``，
+  即代表变量的编码/数值，每个工作进程只传一次；
+- 之后每次下发一个分块 ``("tile", tile_id, r0, r1, c0, c1)``，工作进程回复 ``("result", tile_id, block)``
+  或 ``("error", tile_id, message)``；结束时协调者发送 ``("stop",)``。
+
+容错与负载均衡：
+
+- 工作进程断开（崩溃、网络中断）或分块计算出错时，分块重新排队，同一分块失败超过 ``max_retries`` 次时
+  整个计算失败；超过 ``tile_timeout`` 秒未返回的分块只是再排队一份副本，原工作进程继续计算，不算失败；
+- 工作进程各自拉取分块，快的机器自然多算；队列空了而仍有分块在计算时，空闲的工作进程会重复计算
+  其中开始最早的分块（work stealing，最多两份），先返回的结果生效，避免被一台慢机器拖住。
+
+单机测试::
+
+    python -m core.distributed coordinator data.csv --method information --job-dir jobs/data --local-workers 4
+
+多机时协调者监听对外地址，其他机器启动工作进程::
+
+    python -m core.distributed coordinator data.csv --job-dir jobs/data --bind 0.0.0.0:47100 --authkey SECRET
+    python -m core.distributed worker coordinator-host:47100 --authkey SECRET --processes 8
+"""
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from multiprocessing import Process
+from multiprocessing.connection import Listener, Client, wait
+
+import numpy as np
+import pandas as pd
+
+from core.trace import span
+from core.distance import _cross_information, _cross_euclidean, DISCRETIZERS
+from core.checkpoint import DistanceJob
+from core.runtime import get_runtime, init_process
+
+DEFAULT_PORT = 47100
+# 同一分块最多同时在几个工作进程上计算（含 work stealing 的副本）
+MAX_COPIES = 2
+
+
+def _parse_address(text: str) -> tuple:
+    """``host:port`` → (host, port)，省略端口时使用 DEFAULT_PORT"""
+    host, _, port = text.rpartition(":")
+    if not host:
+        return text, DEFAULT_PORT
+    return host, int(port)
+
+
+def _is_loopback(host: str) -> bool:
+    return host in ("localhost", "127.0.0.1", "::1")
+
+
+def _authkey(authkey) -> bytes:
+    """显式参数优先，其次环境变量 CORR_AUTHKEY；都没有时返回 None"""
+    authkey = authkey or os.environ.get("CORR_AUTHKEY")
+    if authkey is None:
+        return None
+    return authkey.encode() if isinstance(authkey, str) else bytes(authkey)
+
+
+def compute_tile(method: str, values: np.ndarray, levels: int, base: float, r0: int, r1: int, c0: int,
+                 c1: int) -> np.ndarray:
+    """计算代表变量 [r0, r1) × [c0, c1) 的距离块，与单机分块的结果一致（自身距离为 0）"""
+    if method == "information":
+        block = _cross_information(values[r0:r1], values[c0:c1], levels, base)
+    else:
+        block = _cross_euclidean(values[r0:r1], values[c0:c1])
+    diag = np.arange(max(r0, c0), min(r1, c1))
+    if diag.size:
+        # 信息距离没有任何观测时保持 NaN
+        own = block[diag - r0, diag - c0]
+        block[diag - r0, diag - c0] = np.where(np.isnan(own), np.nan, 0.0)
+    return block
+
+
+def run_worker(address, authkey=None, connect_timeout: float = 30.0) -> int:
+    """工作进程：连接协调者，逐个计算分配到的分块，直到收到结束消息或连接断开。
+
+    Args:
+        address: 协调者地址 ``(host, port)`` 或 ``"host:port"``。
+        authkey: 共享密钥，默认取环境变量 CORR_AUTHKEY。
+        connect_timeout: 协调者尚未启动时重试连接的最长秒数。
+
+    Returns:
+        int: 本进程计算的分块数。
+
+    Raises:
+        ConnectionError: 超时仍无法连接协调者。
+    """
+    if isinstance(address, str):
+        address = _parse_address(address)
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            conn = Client(tuple(address), authkey=_authkey(authkey))
+            break
+        except (ConnectionRefusedError, OSError) as e:
+            if time.monotonic() >= deadline:
+                raise ConnectionError(f"无法连接协调者 {address[0]}:{address[1]}：{e}") from e
+            time.sleep(0.5)
+
+    computed = 0
+    state = None
+    with conn:
+        conn.send(("hello", socket.gethostname(), os.getpid()))
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            if message[0] == "setup":
+                state = message[1:]
+            elif message[0] == "tile":
+                tile_id, r0, r1, c0, c1 = message[1:]
+                try:
+                    with span("distributed.tile", rows=r1 - r0, cols=c1 - c0):
+                        reply = ("result", tile_id, compute_tile(*state, r0, r1, c0, c1))
+                except Exception as e:
+                    reply = ("error", tile_id, f"{type(e).__name__}: {e}")
+                try:
+                    conn.send(reply)
+                except OSError:
+                    # 协调者已结束（例如这是被别人先算完的重复分块）
+                    break
+                computed += reply[0] == "result"
+            elif message[0] == "stop":
+                break
+    return computed
+
+
+class Coordinator:
+    """把作业的未完成分块分发给工作进程，并把结果写回作业目录。
+
+    Args:
+        job: 尚未完成的 :class:`core.checkpoint.DistanceJob`。
+        address: 监听地址 ``(host, port)``，端口为 0 时由系统分配（见 ``address`` 属性）。
+        authkey: 共享密钥；监听非回环地址时必须提供（或设置 CORR_AUTHKEY），回环地址默认随机生成。
+        tile_timeout: 分块超过该秒数未返回时再排队一份副本给空闲的工作进程（原进程继续计算，
+            先返回者为准），不计入失败次数；None 表示不限。
+        max_retries: 同一分块允许的失败次数（连接断开、工作进程出错），超过时计算失败。
+        wait_timeout: 没有任何工作进程连接的最长等待秒数，None 表示一直等待。
+        progress: 可选的回调 ``progress(done, total)``，每完成一个分块调用一次。
+
+    Attributes:
+        address: 实际监听的地址。
+        authkey: 工作进程需要使用的共享密钥。
+        stats: 统计 ``{"workers", "retries", "timeouts", "stolen", "duplicates"}``。
+
+    Raises:
+        ValueError: 监听非回环地址却没有共享密钥。
+    """
+
+    def __init__(self, job: DistanceJob, address=("127.0.0.1", 0), authkey=None, tile_timeout: float = None,
+                 max_retries: int = 3, wait_timeout: float = None, progress=None):
+        self.job = job
+        self.authkey = _authkey(authkey)
+        if self.authkey is None:
+            if not _is_loopback(address[0]):
+                raise ValueError("对外监听时必须通过 authkey 或环境变量 CORR_AUTHKEY 指定共享密钥。")
+            self.authkey = os.urandom(16)
+        self.tile_timeout = tile_timeout
+        self.max_retries = max_retries
+        self.wait_timeout = wait_timeout
+        self.progress = progress
+        self.stats = {"workers": 0, "retries": 0, "timeouts": 0, "stolen": 0, "duplicates": 0}
+        self._listener = Listener(tuple(address), authkey=self.authkey)
+        self.address = self._listener.address
+        self._incoming = deque()
+        self._closed = False
+
+    def _accept_loop(self) -> None:
+        """后台线程：接受连接（认证失败的连接直接丢弃）"""
+        while not self._closed:
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError):
+                if self._closed:
+                    return
+                continue
+            except Exception:
+                # multiprocessing.AuthenticationError 等
+                continue
+            self._incoming.append(conn)
+
+    @span("distributed.coordinate")
+    def run(self) -> pd.DataFrame:
+        """分发全部未完成的分块，完成后返回作业的完整结果。
+
+        Raises:
+            RuntimeError: 某个分块失败次数超过 max_retries，或等待工作进程超时。
+        """
+        job = self.job
+        tiles = job.pending()
+        queue = deque(range(len(tiles)))
+        finished = set()
+        attempts = [0] * len(tiles)
+        running = {}          # tile_id → {conn: 开始时间}
+        assigned = {}         # conn → tile_id | None
+        done = job.done
+        last_seen = time.monotonic()
+        setup = ("setup", job.method, job.values, job.levels, job.base)
+
+        def fail(tile_id: int, reason: str) -> None:
+            attempts[tile_id] += 1
+            self.stats["retries"] += 1
+            if attempts[tile_id] > self.max_retries:
+                raise RuntimeError(f"分块 {tiles[tile_id]} 失败 {attempts[tile_id]} 次：{reason}")
+            if tile_id not in finished and not running.get(tile_id) and tile_id not in queue:
+                queue.appendleft(tile_id)
+
+        def release(conn) -> None:
+            tile_id = assigned.get(conn)
+            if tile_id is not None:
+                running.get(tile_id, {}).pop(conn, None)
+            assigned[conn] = None
+
+        def drop(conn, reason: str) -> None:
+            tile_id = assigned.pop(conn, None)
+            conn.close()
+            if tile_id is not None and tile_id not in finished:
+                running.get(tile_id, {}).pop(conn, None)
+                fail(tile_id, reason)
+
+        def assign(conn) -> None:
+            tile_id = None
+            while queue:
+                candidate = queue.popleft()
+                if candidate not in finished:
+                    tile_id = candidate
+                    break
+            if tile_id is None:
+                # 队列已空：重复计算开始最早、副本最少、且不在本进程上的分块
+                candidates = [(len(c), min(c.values()), t) for t, c in running.items()
+                              if t not in finished and conn not in c and len(c) < MAX_COPIES]
+                if not candidates:
+                    return
+                tile_id = min(candidates)[2]
+                self.stats["stolen"] += 1
+            r0, r1, c0, c1 = tiles[tile_id]
+            conn.send(("tile", tile_id, r0, r1, c0, c1))
+            running.setdefault(tile_id, {})[conn] = time.monotonic()
+            assigned[conn] = tile_id
+
+        acceptor = threading.Thread(target=self._accept_loop, name="distributed-accept", daemon=True)
+        acceptor.start()
+        try:
+            with span("distributed.tiles", total=len(tiles)):
+                while len(finished) < len(tiles):
+                    while self._incoming:
+                        conn = self._incoming.popleft()
+                        try:
+                            conn.send(setup)
+                        except OSError:
+                            conn.close()
+                            continue
+                        assigned[conn] = None
+                        self.stats["workers"] += 1
+
+                    for conn in [c for c, t in assigned.items() if t is None]:
+                        try:
+                            assign(conn)
+                        except OSError:
+                            drop(conn, "连接断开")
+
+                    if not assigned:
+                        if self.wait_timeout is not None and time.monotonic() - last_seen > self.wait_timeout:
+                            raise RuntimeError(f"等待工作进程超过 {self.wait_timeout} 秒。")
+                        time.sleep(0.1)
+                        continue
+                    last_seen = time.monotonic()
+
+                    for conn in wait(list(assigned), timeout=0.2):
+                        try:
+                            message = conn.recv()
+                        except (EOFError, OSError):
+                            drop(conn, "连接断开")
+                            continue
+                        if message[0] == "hello":
+                            continue
+                        tile_id = message[1]
+                        release(conn)
+                        if message[0] == "error":
+                            if tile_id not in finished:
+                                fail(tile_id, message[2])
+                            continue
+                        if tile_id in finished:
+                            self.stats["duplicates"] += 1
+                            continue
+                        job.write(*tiles[tile_id], message[2])
+                        finished.add(tile_id)
+                        running.pop(tile_id, None)
+                        done += 1
+                        if self.progress is not None:
+                            self.progress(done, job.total)
+
+                    if self.tile_timeout is not None:
+                        now = time.monotonic()
+                        for tile_id, copies in list(running.items()):
+                            if (copies and len(copies) < MAX_COPIES and tile_id not in queue
+                                    and all(now - t > self.tile_timeout for t in copies.values())):
+                                # 不断开慢的工作进程，也不计入失败次数，只让别的进程也能领到这个分块
+                                for conn in copies:
+                                    copies[conn] = now
+                                self.stats["timeouts"] += 1
+                                queue.appendleft(tile_id)
+        finally:
+            self._closed = True
+            # 关闭监听前连一次自身，唤醒阻塞在 accept 上的线程（认证失败后它会看到 _closed 并退出）
+            try:
+                socket.create_connection(self.address[:2], timeout=1).close()
+            except OSError:
+                pass
+            acceptor.join(timeout=2)
+            while self._incoming:
+                self._incoming.popleft().close()
+            for conn in list(assigned):
+                try:
+                    conn.send(("stop",))
+                except OSError:
+                    pass
+                conn.close()
+            self._listener.close()
+        return job.finish()
+
+
+def start_local_workers(count: int, address, authkey=None, daemon: bool = False) -> list:
+    """在本机启动 count 个工作进程，每个进程的 BLAS 线程数与内存预算按运行配置分摊（见 :mod:`core.runtime`）"""
+    state = get_runtime().for_worker(count).to_dict()
+    workers = [Process(target=init_process, args=(state, run_worker, (address, authkey)), daemon=daemon)
+               for _ in range(count)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def distributed_distance(df: pd.DataFrame, method: str, job_dir: str, address=("127.0.0.1", 0), authkey=None,
+                         local_workers: int = 0, sigma: float = 1.0, bins: int = 13, return_zscore: bool = True,
+                         base: float = 2.0, dedup: bool = True, sketch: int = None, tile_timeout: float = None,
+                         max_retries: int = 3, wait_timeout: float = None, progress=None,
+                         discretizer: str = "gaussian", edges=None) -> pd.DataFrame:
+    """由协调者在作业目录中分块计算完整的距离方阵，分块交给本机或远程的工作进程。
+
+    离散化在协调者上完成（见 :class:`core.checkpoint.DistanceJob`），工作进程只收到编码，因此支持
+    :func:`core.distance.discretize` 的全部离散化方法。
+
+    Args:
+        df: 行=变量、列=样本的 DataFrame；首列为字符串时作为行索引。
+        method: ``"euclidean"`` 或 ``"information"``。
+        job_dir: 作业目录，见 :mod:`core.checkpoint`。
+        address: 协调者监听的地址。
+        authkey: 共享密钥，见 :class:`Coordinator`。
+        local_workers: 在本机启动的工作进程数；为 0 时只等待远程工作进程连接。
+        sigma, bins, return_zscore, base, dedup, sketch: 见 :func:`core.checkpoint.run_job`。
+        tile_timeout, max_retries, wait_timeout, progress: 见 :class:`Coordinator`。
+        discretizer, edges: 离散化方法与 grid 的箱边界，仅 ``information`` 有效，见 :func:`core.checkpoint.run_job`。
+
+    Returns:
+        pandas.DataFrame: 映射自作业目录中 ``distance.npy`` 的只读方阵。
+    """
+    # 与 compute_distance_matrix 一致：首列为字符串时作为行索引
+    first_col = df.iloc[:, 0]
+    if first_col.dtype == 'object' or isinstance(first_col.iloc[0], str):
+        df = df.set_index(df.columns[0])
+    job = DistanceJob(df, method, job_dir, sigma, bins, return_zscore, base, dedup, sketch, discretizer, edges)
+    if job.complete:
+        return job.finish()
+
+    coordinator = Coordinator(job, address, authkey, tile_timeout, max_retries, wait_timeout, progress)
+    workers = start_local_workers(local_workers, coordinator.address, coordinator.authkey, daemon=True)
+    try:
+        return coordinator.run()
+    finally:
+        for worker in workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="多进程/多机分块计算距离矩阵")
+    sub = parser.add_subparsers(dest="role", required=True)
+
+    coordinator = sub.add_parser("coordinator", help="读取数据、分发分块并汇总结果")
+    coordinator.add_argument("input", help="输入的 CSV/TXT 文件")
+    coordinator.add_argument("--job-dir", required=True, help="作业目录（结果与进度）")
+    coordinator.add_argument("--method", choices=("euclidean", "information"), default="information")
+    coordinator.add_argument("--sigma", type=float, default=1.0, help="高斯离散化的标准差")
+    coordinator.add_argument("--bins", type=int, default=13, help="离散等级数量")
+    coordinator.add_argument("--discretizer", choices=DISCRETIZERS, default="gaussian",
+                             help="离散化方法：高斯核（默认）、按行等频（quantile）或全局等宽网格（grid）")
+    coordinator.add_argument("--bind", default=f"127.0.0.1:{DEFAULT_PORT}", help="监听地址 host:port")
+    coordinator.add_argument("--authkey", help="共享密钥（也可用环境变量 CORR_AUTHKEY），对外监听时必填")
+    coordinator.add_argument("--local-workers", type=int, default=0, help="在本机启动的工作进程数")
+    coordinator.add_argument("--tile-timeout", type=float, help="分块超时秒数，超时后重新分配")
+    coordinator.add_argument("--max-retries", type=int, default=3, help="同一分块允许的失败次数")
+
+    worker = sub.add_parser("worker", help="连接协调者并计算分块")
+    worker.add_argument("address", help="协调者地址 host:port")
+    worker.add_argument("--authkey", help="共享密钥（也可用环境变量 CORR_AUTHKEY）")
+    worker.add_argument("--processes", type=int, default=1, help="本机启动的工作进程数")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.role == "worker":
+        address = _parse_address(args.address)
+        workers = start_local_workers(args.processes, address, args.authkey)
+        for worker in workers:
+            worker.join()
+        return 0 if all(worker.exitcode == 0 for worker in workers) else 1
+
+    from core.loader import upload
+
+    def report(done, total):
+        print(f"\r分块 {done}/{total}", end="", flush=True)
+
+    data = upload(args.input)
+    start = time.perf_counter()
+    try:
+        result = distributed_distance(data, args.method, args.job_dir, _parse_address(args.bind), args.authkey,
+                                      args.local_workers, sigma=args.sigma, bins=args.bins,
+                                      discretizer=args.discretizer,
+                                      tile_timeout=args.tile_timeout, max_retries=args.max_retries,
+                                      progress=report)
+    except (ValueError, RuntimeError) as e:
+        print(f"\n[失败] {e}", file=sys.stderr)
+        return 1
+    print(f"\n[完成] {result.shape[0]}×{result.shape[1]} → {result.attrs['path']}，"
+          f"耗时 {time.perf_counter() - start:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""按需计算的距离矩阵。
+
+:class:`LazyDistanceMatrix` 只在构造时做一次 O(n·m) 的准备（信息距离为离散化与编码），
+距离按行块在首次访问时计算并缓存（按最近最少使用淘汰），因此查询少数变量的近邻或导出子矩阵
+只需 O(|A|·n) 而不是 O(n²)。它实现了 :class:`core.matrix.MatrixView`，可以直接交给表格与热图，
+表格只会计算可见区域所在的行块。
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from core.trace import span
+from core.matrix import MatrixView
+from core.planner import ITEMSIZE
+from core.distance import gaussian_discretization, _encode, _cross_information, _cross_euclidean
+
+
+class LazyDistanceMatrix(MatrixView):
+    """按行块惰性计算、带缓存的方阵距离矩阵。
+
+    Args:
+        df: 行=变量、列=样本的 DataFrame；首列为字符串时作为行索引。
+        method: ``"euclidean"`` 或 ``"information"``。
+        sigma: 高斯离散化的标准差，仅 ``information`` 有效。
+        bins: 离散等级数量，仅 ``information`` 有效。
+        return_zscore: 离散化是否返回 z-score 中心，仅 ``information`` 有效。
+        base: 熵的对数底，仅 ``information`` 有效。
+        block_rows: 每个缓存行块的行数。
+        cache_bytes: 行块缓存的上限（字节）。
+
+    Attributes:
+        index: 变量名。
+        columns: 变量名（与 index 相同）。
+        method: 距离类型。
+        computed_rows: 累计计算过的行数（含被淘汰后重算的），用于观察缓存效果。
+
+    Raises:
+        TypeError: df 不是 DataFrame。
+        ValueError: df 为空或 method 未知。
+    """
+
+    def __init__(self, df: pd.DataFrame, method: str, sigma: float = 1.0, bins: int = 13,
+                 return_zscore: bool = True, base: float = 2.0, block_rows: int = 256,
+                 cache_bytes: int = 256 * 1024 * 1024):
+        if not isinstance(df, pd.DataFrame):
+            raise TypeError("df 必须是 pandas.DataFrame。")
+        if df.empty:
+            raise ValueError("DataFrame 为空，无法计算距离。")
+        if method not in ("euclidean", "information"):
+            raise ValueError(f"未知的距离计算方法: {method}")
+        # 与 compute_distance_matrix 一致：首列为字符串时作为行索引
+        first_col = df.iloc[:, 0]
+        if first_col.dtype == 'object' or isinstance(first_col.iloc[0], str):
+            df = df.set_index(df.columns[0])
+
+        self.method = method
+        self.index = self.columns = df.index
+        self._log_base = base
+        if method == "euclidean":
+            self._X = df.to_numpy(dtype=np.float64)
+        else:
+            with span("lazy.prepare", n=df.shape[0]):
+                discrete = gaussian_discretization(df, sigma=sigma, bins=bins, return_zscore=return_zscore)
+                self._codes, self._levels = _encode(discrete, True)
+
+        n = len(self.index)
+        self.block_rows = max(1, int(block_rows))
+        self.max_blocks = max(1, int(cache_bytes) // (self.block_rows * n * ITEMSIZE))
+        self.computed_rows = 0
+        self._blocks = OrderedDict()
+        # 热图在后台线程构建金字塔，表格在界面线程取块
+        self._lock = threading.Lock()
+
+    @property
+    def shape(self) -> tuple:
+        n = len(self.index)
+        return (n, n)
+
+    @property
+    def dtype(self):
+        return np.dtype(np.float64)
+
+    def _compute(self, rows: np.ndarray, cols: np.ndarray = None) -> np.ndarray:
+        """计算 rows × cols（默认全部列）的距离，自身距离置 0"""
+        if self.method == "euclidean":
+            X_b = self._X if cols is None else self._X[cols]
+            out = _cross_euclidean(self._X[rows], X_b)
+        else:
+            codes_b = self._codes if cols is None else self._codes[cols]
+            out = _cross_information(self._codes[rows], codes_b, self._levels, self._log_base)
+        cols = np.arange(len(self.index)) if cols is None else cols
+        # 与方阵结果一致：自身距离为 0（信息距离没有任何观测时保持 NaN）
+        i, j = np.nonzero(rows[:, None] == cols[None, :])
+        out[i, j] = np.where(np.isnan(out[i, j]), np.nan, 0.0)
+        return out
+
+    def _block(self, b: int) -> np.ndarray:
+        """取出（必要时计算）第 b 个行块"""
+        with self._lock:
+            block = self._blocks.get(b)
+            if block is not None:
+                self._blocks.move_to_end(b)
+                return block
+
+        r0 = b * self.block_rows
+        r1 = min(r0 + self.block_rows, len(self.index))
+        with span("lazy.rows", rows=r1 - r0, method=self.method):
+            block = self._compute(np.arange(r0, r1))
+
+        with self._lock:
+            self.computed_rows += r1 - r0
+            self._blocks[b] = block
+            while len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+        return block
+
+    def rows(self, positions) -> np.ndarray:
+        """按位置取若干完整行，返回 (len(positions), n)"""
+        positions = np.atleast_1d(np.asarray(positions, dtype=np.intp))
+        out = np.empty((positions.size, len(self.index)))
+        blocks = positions // self.block_rows
+        for b in np.unique(blocks):
+            hit = blocks == b
+            out[hit] = self._block(int(b))[positions[hit] - b * self.block_rows]
+        return out
+
+    def __getitem__(self, key) -> np.ndarray:
+        rows, cols = key if isinstance(key, tuple) else (key, slice(None))
+        positions = np.arange(len(self.index))[rows]
+        return self.rows(positions)[:, cols]
+
+    def _positions(self, labels) -> np.ndarray:
+        """变量名 → 位置；找不到时抛出 KeyError"""
+        labels = pd.Index([labels] if np.isscalar(labels) else list(labels))
+        positions = self.index.get_indexer(labels)
+        if (positions < 0).any():
+            raise KeyError(f"找不到变量: {', '.join(map(str, labels[positions < 0]))}")
+        return positions
+
+    @span("lazy.neighbors")
+    def neighbors(self, label, k: int = 10) -> pd.Series:
+        """某个变量最近的 k 个邻居（不含自身与无法计算的 NaN），按距离升序。
+
+        Raises:
+            KeyError: 找不到该变量。
+            ValueError: k 不是正整数。
+        """
+        if not isinstance(k, int) or k < 1:
+            raise ValueError("k 必须为正整数。")
+        position = self._positions(label)[0]
+        # 所在行块已缓存时直接取，否则只算这一行（不为单行查询计算整个行块）
+        with self._lock:
+            block = self._blocks.get(position // self.block_rows)
+        if block is not None:
+            row = block[position % self.block_rows].copy()
+        else:
+            row = self._compute(np.array([position]))[0]
+        row[position] = np.nan
+        valid = np.flatnonzero(~np.isnan(row))
+        kk = min(k, valid.size)
+        if kk == 0:
+            return pd.Series(dtype=np.float64, name="distance")
+        nearest = valid[np.argpartition(row[valid], kk - 1)[:kk]]
+        nearest = nearest[np.argsort(row[nearest], kind="stable")]
+        return pd.Series(row[nearest], index=self.index[nearest], name="distance")
+
+    @span("lazy.submatrix")
+    def submatrix(self, rows, columns=None) -> pd.DataFrame:
+        """取若干变量（行）对若干变量（列）的距离子矩阵。
+
+        columns 为 None 时取完整行，计算结果会进入行块缓存；否则只计算 |rows|·|columns| 个距离。
+
+        Raises:
+            KeyError: 找不到某个变量。
+        """
+        row_positions = self._positions(rows)
+        if columns is None:
+            return pd.DataFrame(self.rows(row_positions), index=self.index[row_positions], columns=self.columns)
+        col_positions = self._positions(columns)
+        values = self._compute(row_positions, col_positions)
+        return pd.DataFrame(values, index=self.index[row_positions], columns=self.columns[col_positions])
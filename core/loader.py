@@ -1,7 +1,10 @@
 import os
 import pandas as pd
 
+from core.trace import span
 
+
+@span("loader.upload")
 def upload(path: str) -> pd.DataFrame:
     """读取 CSV/TXT 并返回 DataFrame。
 
@@ -50,6 +53,7 @@ def upload(path: str) -> pd.DataFrame:
     raise last_decode_err
 
 
+@span("loader.download")
 def download(df: pd.DataFrame, path: str) -> bool:
     """将 DataFrame 保存为 CSV/TXT（utf-8）。
 
@@ -81,3 +85,60 @@ def download(df: pd.DataFrame, path: str) -> bool:
     sep = "," if ext == ".csv" else "\t"
     df.to_csv(path, sep=sep, encoding="utf-8")
     return True
+
+
+def _read_header(path: str) -> tuple:
+    """读取表头，返回 (分隔符, 编码, 样本列名)"""
+    if not isinstance(path, str) or not path.strip():
+        raise ValueError("文件路径不能为空")
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in (".csv", ".txt"):
+        raise ValueError(f"不支持 {ext} 文件格式")
+    sep = "," if ext == ".csv" else "\t"
+
+    last_decode_err = None
+    for enc in ("utf-8", "gbk"):
+        try:
+            header = pd.read_csv(path, sep=sep, index_col=0, header=0, nrows=0, encoding=enc)
+        except UnicodeDecodeError as e:
+            last_decode_err = e
+        except pd.errors.EmptyDataError as e:
+            raise ValueError(f"文件内容为空") from e
+        else:
+            return sep, enc, header.columns
+    raise last_decode_err
+
+
+def iter_column_chunks(path: str, columns_per_chunk: int = 4096):
+    """按样本列分块读取 CSV/TXT（格式同 :func:`upload`），每块包含全部变量（行）。
+
+    每块只解析该块的列，内存占用为 行数 × columns_per_chunk；代价是每块都要扫描一遍文件，
+    列很多时应取尽量大的块。
+
+    Args:
+        path: 文件路径。
+        columns_per_chunk: 每块的样本列数。
+
+    Yields:
+        tuple: ``(c0, block)``，c0 为块的首列位置，block 为以变量名为索引的 DataFrame。
+
+    Raises:
+        FileNotFoundError: 文件不存在。
+        ValueError: 路径为空/后缀不支持/内容为空，或 columns_per_chunk 不是正整数。
+    """
+    if not isinstance(columns_per_chunk, int) or columns_per_chunk < 1:
+        raise ValueError("columns_per_chunk 必须为正整数。")
+    sep, enc, columns = _read_header(path)
+    for c0 in range(0, len(columns), columns_per_chunk):
+        # usecols 的位置包含索引列（第 0 列）
+        usecols = [0] + list(range(c0 + 1, min(c0 + columns_per_chunk, len(columns)) + 1))
+        with span("loader.column_chunk", c0=c0, columns=len(usecols) - 1):
+            block = pd.read_csv(path, sep=sep, index_col=0, header=0, usecols=usecols, encoding=enc)
+        yield c0, block
+
+
+def sample_columns(path: str) -> pd.Index:
+    """只读取表头，返回样本列名（不含索引列）"""
+    return _read_header(path)[2]
@@ -0,0 +1,205 @@
+"""信息距离的局部敏感哈希（LSH）近邻。
+
+变量很多而只关心距离近的变量对时，即使分块计算全部 O(n²) 个 VI 也太慢。这里把每个变量的
+离散结果看作 (样本, 等级) 记号的集合：两个变量在越多样本上落入同一等级，集合的 Jaccard
+相似度越高、VI 越小。对记号集合计算 MinHash 签名，再按 LSH 分段（band）分桶，同桶的变量对
+才作为候选，只对候选对计算精确的 VI，结果与 ``strategy="topk"`` 相同格式的稀疏近邻长表。
+
+- 签名长度为 ``bands × rows``，相似度为 s 的变量对成为候选的概率为 1 - (1 - s^rows)^bands
+  （:func:`candidate_probability`），增大 bands 或减小 rows 召回更高、候选更多；
+- VI 与等级的编号无关，负相关的变量在镜像等级（z → -z）上一致，``mirror=True`` 时用镜像签名
+  再查询一次，使这类变量对同样能成为候选；
+- 超过 ``max_bucket`` 的桶（如大量常数变量）只把每个成员与随机排列后相邻的若干成员配对，
+  避免候选数按桶大小平方增长；
+- ``n_check`` 个随机变量会额外计算完整的一行，与精确的 k 近邻比较得到实测召回率。
+"""
+import numpy as np
+import pandas as pd
+
+from core.trace import span
+from core.distance import gaussian_discretization, _encode, _cross_information
+from core.runtime import thread_limited
+
+# MinHash 使用的梅森素数 2^31 - 1
+_PRIME = (1 << 31) - 1
+# 计算签名时每块的元素数上限（uint64）
+_SIGNATURE_CHUNK = 1 << 22
+
+
+def candidate_probability(similarity, bands: int, rows: int):
+    """Jaccard 相似度为 similarity 的变量对至少在一个段上同桶（成为候选）的概率"""
+    similarity = np.asarray(similarity, dtype=np.float64)
+    return 1.0 - (1.0 - similarity ** rows) ** bands
+
+
+def _level_tokens(discrete: np.ndarray, bins: int, mirror: bool) -> np.ndarray:
+    """z-score 中心 → 记号 ``样本 × bins + 等级``，缺失为 -1；mirror 时取镜像等级"""
+    step = 6.0 / (bins - 1)
+    with np.errstate(invalid="ignore"):
+        level = np.rint((discrete + 3.0) / step)
+    if mirror:
+        level = bins - 1 - level
+    missing = np.isnan(level)
+    tokens = np.arange(discrete.shape[1], dtype=np.int64)[None, :] * bins + np.nan_to_num(level).astype(np.int64)
+    tokens[missing] = -1
+    return tokens
+
+
+def minhash_signatures(tokens: np.ndarray, n_hashes: int, seed: int = 0) -> np.ndarray:
+    """每行记号集合的 MinHash 签名 (rows, n_hashes)；记号为 -1 的位置不参与，空集合的签名为 2^31 - 1。
+
+    使用 ``h(t) = (a·t + b) mod (2^31 - 1)`` 的全域哈希族，同一 seed 下各行共享同一组哈希函数。
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _PRIME, size=n_hashes, dtype=np.uint64)
+    b = rng.integers(0, _PRIME, size=n_hashes, dtype=np.uint64)
+    n_rows, n_cols = tokens.shape
+    missing = tokens < 0
+    values = np.where(missing, 0, tokens).astype(np.uint64)
+    out = np.empty((n_rows, n_hashes), dtype=np.uint32)
+    step = max(1, _SIGNATURE_CHUNK // max(1, n_cols))
+    for r0 in range(0, n_rows, step):
+        r1 = min(r0 + step, n_rows)
+        block, block_missing = values[r0:r1], missing[r0:r1]
+        for h in range(n_hashes):
+            hashed = (a[h] * block + b[h]) % _PRIME
+            hashed[block_missing] = _PRIME
+            out[r0:r1, h] = hashed.min(axis=1)
+    return out
+
+
+def _bucket_pairs(keys: np.ndarray, owners: np.ndarray, max_bucket: int, rng) -> list:
+    """同一段内键相同的条目两两配对，返回 (i, j) 数组的列表（i、j 为 owners 中的变量位置）"""
+    _, group = np.unique(keys, axis=0, return_inverse=True)
+    group = group.ravel()
+    order = np.argsort(group, kind="stable")
+    sizes = np.bincount(group)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    pairs = []
+    for g in np.flatnonzero(sizes > 1):
+        members = owners[order[starts[g]:starts[g] + sizes[g]]]
+        if members.size <= max_bucket:
+            i, j = np.triu_indices(members.size, 1)
+            pairs.append(np.stack([members[i], members[j]], axis=1))
+        else:
+            # 大桶：随机排列后每个成员只与其后的 max_bucket 个成员（循环）配对
+            members = rng.permutation(members)
+            offsets = np.arange(1, max_bucket + 1)
+            j = (np.arange(members.size)[:, None] + offsets[None, :]) % members.size
+            pairs.append(np.stack([np.repeat(members, offsets.size), members[j].ravel()], axis=1))
+    return pairs
+
+
+def _knn_edges(source: np.ndarray, target: np.ndarray, distance: np.ndarray, n: int, k: int) -> tuple:
+    """在有向边 (source, target, distance) 中为每个 source 保留最近的 k 条"""
+    keep = ~np.isnan(distance)
+    source, target, distance = source[keep], target[keep], distance[keep]
+    order = np.lexsort((target, distance, source))
+    source, target, distance = source[order], target[order], distance[order]
+    starts = np.searchsorted(source, np.arange(n))
+    rank = np.arange(source.size) - starts[source]
+    keep = rank < k
+    return source[keep], target[keep], distance[keep]
+
+
+@span("lsh.neighbors")
+@thread_limited
+def lsh_neighbors(df: pd.DataFrame, k: int = 10, sigma: float = 1.0, bins: int = 13, base: float = 2.0,
+                  bands: int = 64, rows: int = 3, mirror: bool = True, max_bucket: int = 256,
+                  seed: int = 0, n_check: int = 20) -> pd.DataFrame:
+    """用 MinHash/LSH 生成候选变量对，只在候选对上计算精确的信息距离（VI），返回稀疏近邻。
+
+    Args:
+        df: 行=变量、列=样本的 DataFrame；首列为字符串时作为行索引。
+        k: 每个变量保留的近邻数。
+        sigma: 高斯离散化的标准差。
+        bins: 离散等级数量。
+        base: 熵的对数底。
+        bands: LSH 的段数。
+        rows: 每段的签名长度，签名总长为 bands × rows。
+        mirror: 是否用镜像等级的签名再查询一次，以找到负相关的近邻。
+        max_bucket: 桶内两两配对的成员数上限，更大的桶只与相邻成员配对。
+        seed: 哈希函数与大桶排列的随机种子。
+        n_check: 用于实测召回率的随机变量数，0 表示不实测。
+
+    Returns:
+        pandas.DataFrame: 以 (source, target) 为 MultiIndex、单列 ``distance`` 的长表，每个 source
+        按距离升序，最多 k 行（候选不足时更少）。``attrs["lsh"]`` 记录 ``candidates``（候选对数）、
+        ``pair_fraction``（占全部变量对的比例）与 ``recall``（实测的 k 近邻召回率，未实测时为 NaN）。
+
+    Raises:
+        TypeError: df 不是 DataFrame，或 k、bands、rows 不是整数。
+        ValueError: df 为空，或 k、bands、rows、max_bucket 不为正。
+    """
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError("df 必须是 pandas.DataFrame。")
+    if df.empty:
+        raise ValueError("DataFrame 为空，无法计算距离。")
+    if not all(isinstance(v, int) for v in (k, bands, rows)):
+        raise TypeError("k、bands、rows 必须为整数。")
+    if min(k, bands, rows, max_bucket) < 1:
+        raise ValueError("k、bands、rows、max_bucket 必须为正。")
+    # 与 compute_distance_matrix 一致：首列为字符串时作为行索引
+    first_col = df.iloc[:, 0]
+    if first_col.dtype == 'object' or isinstance(first_col.iloc[0], str):
+        df = df.set_index(df.columns[0])
+
+    discrete = gaussian_discretization(df, sigma=sigma, bins=bins, return_zscore=True)
+    codes, levels = _encode(discrete, True)
+    values = discrete.to_numpy(dtype=np.float64)
+    n = len(df)
+    rng = np.random.default_rng([seed, 1])
+
+    with span("lsh.signatures", n=n, hashes=bands * rows):
+        signatures = minhash_signatures(_level_tokens(values, bins, False), bands * rows, seed)
+        if mirror:
+            signatures = np.vstack([signatures, minhash_signatures(_level_tokens(values, bins, True),
+                                                                   bands * rows, seed)])
+    owners = np.tile(np.arange(n), 2 if mirror else 1)
+
+    with span("lsh.candidates", bands=bands):
+        pairs = []
+        for band in range(bands):
+            pairs += _bucket_pairs(signatures[:, band * rows:(band + 1) * rows], owners, max_bucket, rng)
+        pairs = np.concatenate(pairs) if pairs else np.empty((0, 2), dtype=np.intp)
+        pairs = np.sort(pairs, axis=1)
+        pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+        keys = np.unique(pairs[:, 0].astype(np.int64) * n + pairs[:, 1])
+        first, second = keys // n, keys % n
+
+    with span("lsh.exact", pairs=int(keys.size)):
+        distance = np.empty(keys.size)
+        starts = np.searchsorted(first, np.arange(n + 1))
+        for i in np.flatnonzero(np.diff(starts)):
+            s0, s1 = starts[i], starts[i + 1]
+            distance[s0:s1] = _cross_information(codes[i:i + 1], codes[second[s0:s1]], levels, base)[0]
+
+    kk = min(k, n - 1)
+    source, target, dist = _knn_edges(np.concatenate([first, second]), np.concatenate([second, first]),
+                                       np.concatenate([distance, distance]), n, kk)
+    index = pd.MultiIndex.from_arrays([df.index[source], df.index[target]], names=["source", "target"])
+    result = pd.DataFrame({"distance": dist}, index=index)
+
+    recall = np.nan
+    if n_check and kk > 0:
+        with span("lsh.check", rows=min(n_check, n)):
+            hits = total = 0
+            for i in rng.choice(n, size=min(n_check, n), replace=False):
+                row = _cross_information(codes[i:i + 1], codes, levels, base)[0]
+                row[i] = np.nan
+                valid = np.flatnonzero(~np.isnan(row))
+                if valid.size == 0:
+                    continue
+                m = min(kk, valid.size)
+                # 与第 k 近距离并列的变量都算作正确的近邻
+                cutoff = np.partition(row[valid], m - 1)[m - 1]
+                found = target[source == i]
+                hits += min(m, int((row[found] <= cutoff + 1e-12).sum()))
+                total += m
+            recall = hits / total if total else np.nan
+
+    pair_total = n * (n - 1) // 2
+    result.attrs["lsh"] = {"candidates": int(keys.size),
+                           "pair_fraction": keys.size / pair_total if pair_total else 0.0,
+                           "recall": recall}
+    return result
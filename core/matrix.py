@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+
+
+def _as_order(order, n: int, what: str) -> np.ndarray:
+    """校验并规范化一个位置排列（None 表示原顺序）"""
+    if order is None:
+        return None
+    order = np.asarray(order)
+    if order.ndim != 1 or order.dtype.kind not in "iu":
+        raise TypeError(f"{what} 必须是一维整数位置数组。")
+    if order.size and (order.min() < 0 or order.max() >= n):
+        raise ValueError(f"{what} 中的位置越界。")
+    return order.astype(np.intp, copy=False)
+
+
+def _compose(order, key):
+    """把对视图的一维下标（切片/整数/数组）换算成对底层矩阵的下标"""
+    if order is None:
+        return key
+    return order[key]
+
+
+def _compose_orders(outer, inner):
+    """先按 outer、再按 inner 映射，合成为对底层矩阵的单层映射"""
+    if inner is None:
+        return outer
+    return inner if outer is None else outer[inner]
+
+
+class MatrixView:
+    """只读矩阵视图的公共接口，表格与热图按块读取，不要求矩阵整体驻留内存。
+
+    子类需提供 ``shape``、``dtype``、``index``、``columns`` 与按块取值的 ``__getitem__``
+    （``m[r0:r1]``、``m[r0:r1, c0:c1]``，切片可带步长，也可以是整数或整数数组）。
+    """
+    index: pd.Index
+    columns: pd.Index
+
+    @property
+    def shape(self) -> tuple:
+        raise NotImplementedError
+
+    @property
+    def dtype(self):
+        raise NotImplementedError
+
+    def __getitem__(self, key) -> np.ndarray:
+        raise NotImplementedError
+
+    @property
+    def empty(self) -> bool:
+        return 0 in self.shape
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def to_frame(self) -> pd.DataFrame:
+        """按视图顺序物化为 DataFrame（会复制数据，仅用于导出等需要真实表格的场合）"""
+        return pd.DataFrame(self[:, :], index=self.index, columns=self.columns)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(shape={self.shape}, dtype={self.dtype})"
+
+
+class IndexedMatrix(MatrixView):
+    """按行/列位置映射查看底层矩阵的只读视图，不复制数据。
+
+    视图的第 i 行对应底层矩阵的第 ``row_order[i]`` 行（列同理），取块时才按映射读取对应区域，
+    因此可以让表格与热图按聚类顺序显示大矩阵（包括 memmap）而无需生成重排后的副本。
+    支持的下标形式与表格/热图的访问方式一致：``m[r0:r1]``、``m[r0:r1, c0:c1]``（切片可带步长）、
+    整数或整数数组。
+
+    Attributes:
+        base: 底层二维数组（ndarray 或 memmap）。
+        index: 视图的行标签（已按映射排列）。
+        columns: 视图的列标签（已按映射排列）。
+        row_order: 行位置映射，None 表示原顺序。
+        col_order: 列位置映射，None 表示原顺序。
+    """
+
+    def __init__(self, values, index=None, columns=None, row_order=None, col_order=None):
+        if getattr(values, "ndim", None) != 2:
+            raise TypeError("values 必须是二维数组。")
+        self.base = values
+        n_rows, n_cols = values.shape
+        self.row_order = _as_order(row_order, n_rows, "row_order")
+        self.col_order = _as_order(col_order, n_cols, "col_order")
+
+        index = pd.RangeIndex(n_rows) if index is None else pd.Index(index)
+        columns = pd.RangeIndex(n_cols) if columns is None else pd.Index(columns)
+        if len(index) != n_rows or len(columns) != n_cols:
+            raise ValueError("标签数量与矩阵形状不一致。")
+        # 标签只有 O(n) 大小，直接按映射排好
+        self.index = index if self.row_order is None else index.take(self.row_order)
+        self.columns = columns if self.col_order is None else columns.take(self.col_order)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, row_order=None, col_order=None) -> "IndexedMatrix":
+        """由单一数值 dtype 的 DataFrame 构造视图（to_numpy 不复制，memmap 同样成立）。
+
+        Raises:
+            TypeError: df 不是 DataFrame。
+            ValueError: df 含多种 dtype。
+        """
+        if not isinstance(df, pd.DataFrame):
+            raise TypeError("输入必须是 pandas.DataFrame。")
+        if df.shape[1] and len(set(df.dtypes)) != 1:
+            raise ValueError("只支持单一 dtype 的矩阵。")
+        return cls(df.to_numpy(), df.index, df.columns, row_order, col_order)
+
+    @classmethod
+    def expanded(cls, values, inverse, labels) -> "IndexedMatrix":
+        """由代表行之间的方阵按逆映射展开为完整方阵视图。
+
+        视图的 (i, j) 元素为 ``values[inverse[i], inverse[j]]``，重复变量共享同一个代表行。
+
+        Args:
+            values: 代表行之间的 k×k 矩阵。
+            inverse: 长度 n 的逆映射，每个变量对应的代表行位置。
+            labels: 完整的 n 个变量名。
+        """
+        labels = pd.Index(labels)
+        if len(labels) != len(inverse):
+            raise ValueError("标签数量与逆映射长度不一致。")
+        view = cls(values, None, None, inverse, inverse)
+        view.index = view.columns = labels
+        return view
+
+    @property
+    def shape(self) -> tuple:
+        n_rows = len(self.row_order) if self.row_order is not None else self.base.shape[0]
+        n_cols = len(self.col_order) if self.col_order is not None else self.base.shape[1]
+        return (n_rows, n_cols)
+
+    @property
+    def dtype(self):
+        return self.base.dtype
+
+    def __getitem__(self, key) -> np.ndarray:
+        rows, cols = key if isinstance(key, tuple) else (key, slice(None))
+        rows = _compose(self.row_order, rows)
+        cols = _compose(self.col_order, cols)
+        if isinstance(rows, slice) and isinstance(cols, slice):
+            return np.asarray(self.base[rows, cols])
+        # 行、列都有数组下标时用 np.ix_ 取外积块，只读取被访问的区域
+        rows = np.arange(self.base.shape[0])[rows] if isinstance(rows, slice) else np.atleast_1d(rows)
+        cols = np.arange(self.base.shape[1])[cols] if isinstance(cols, slice) else np.atleast_1d(cols)
+        return np.asarray(self.base[np.ix_(rows, cols)])
+
+    def reorder(self, row_order=None, col_order=None) -> "IndexedMatrix":
+        """在当前视图之上再叠加一层位置映射，返回新视图（仍共享底层矩阵）"""
+        n_rows, n_cols = self.shape
+        row_order = _as_order(row_order, n_rows, "row_order")
+        col_order = _as_order(col_order, n_cols, "col_order")
+        view = IndexedMatrix(self.base, None, None, _compose_orders(self.row_order, row_order),
+                             _compose_orders(self.col_order, col_order))
+        view.index = self.index if row_order is None else self.index.take(row_order)
+        view.columns = self.columns if col_order is None else self.columns.take(col_order)
+        return view
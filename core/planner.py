@@ -0,0 +1,336 @@
+"""距离计算的内存/耗时估算与执行策略选择。
+
+三种执行策略：
+
+- ``dense``：整个 n×n 距离矩阵放在内存中；
+- ``tiled``：按块计算，结果写入临时目录中的内存映射文件，内存只需容纳一个块；
+- ``topk``：按块计算，每个变量只保留最近的 k 个邻居，结果是稀疏的长表。
+
+估算值只用于选择策略和提示用户，常数按普通桌面机器粗略标定，并不精确。
+"""
+import os
+import math
+import shutil
+
+
+ITEMSIZE = 8                          # 距离矩阵元素大小（float64）
+KERNEL_BYTES = 64 * 1024 * 1024       # 信息距离分块核的工作内存
+DISCRETIZE_CHUNK_BYTES = 64 * 1024 * 1024  # 高斯离散化每块张量的内存上限
+MAX_TILE_ROWS = 4096                  # 分块时每块的最大行数
+DEFAULT_BUDGET = 2 * 1024 ** 3        # 无法读取可用内存时的默认预算
+BUDGET_FRACTION = 0.5                 # 默认预算占可用内存的比例
+
+# 粗略的吞吐量常数
+GEMM_FLOPS = 2e10                     # 矩阵乘法（BLAS）
+LUT_RATE = 3e8                        # 信息距离查表/求和（元素/秒）
+DISCRETIZE_RATE = 5e7                 # 高斯离散化（样本×等级/秒）
+DISK_RATE = 2e8                       # 顺序写盘（字节/秒）
+
+STRATEGIES = ("dense", "tiled", "topk")
+STRATEGY_NAMES = {"dense": "内存计算", "tiled": "分块写盘", "topk": "稀疏近邻"}
+
+
+def parse_size(size) -> int:
+    """把 ``"4G"``、``"512M"``、``"1.5GB"`` 或整数解析为字节数。
+
+    Args:
+        size: 字符串或整数。
+
+    Returns:
+        int: 字节数。
+
+    Raises:
+        ValueError: 无法解析或不为正。
+    """
+    if isinstance(size, (int, float)):
+        value = int(size)
+    else:
+        text = str(size).strip().upper().rstrip("B")
+        units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+        factor = units.get(text[-1:], 1)
+        if factor != 1:
+            text = text[:-1]
+        try:
+            value = int(float(text) * factor)
+        except ValueError:
+            raise ValueError(f"无法解析的内存大小: {size}") from None
+    if value <= 0:
+        raise ValueError("内存大小必须为正。")
+    return value
+
+
+def format_size(nbytes: float) -> str:
+    """把字节数格式化为易读的字符串"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(nbytes) < 1024:
+            return f"{nbytes:.0f} {unit}" if unit == "B" else f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f} TB"
+
+
+def format_seconds(seconds: float) -> str:
+    """把秒数格式化为易读的字符串"""
+    if seconds < 1:
+        return "不到 1 秒"
+    if seconds < 120:
+        return f"{seconds:.0f} 秒"
+    if seconds < 7200:
+        return f"{seconds / 60:.0f} 分钟"
+    return f"{seconds / 3600:.1f} 小时"
+
+
+def available_memory():
+    """读取当前可用的物理内存（字节），无法读取时返回 None"""
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        return int(psutil.virtual_memory().available)
+
+    # Linux：MemAvailable 包含可回收的页缓存
+    try:
+        with open("/proc/meminfo", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    if os.name == "nt":
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                        ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                        ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                        ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                        ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return int(status.ullAvailPhys)
+
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def memory_budget(budget=None) -> int:
+    """确定内存预算。
+
+    优先使用传入值，其次是运行配置的预算（见 :mod:`core.runtime`，默认读取环境变量
+    ``CORR_MEMORY_BUDGET``，如 ``"4G"``；进程池的子进程中为分摊后的预算），否则取可用内存的一半。
+
+    Args:
+        budget: 字节数或 ``"4G"`` 形式的字符串，None 表示自动。
+
+    Returns:
+        int: 预算字节数。
+    """
+    if budget is None:
+        from core.runtime import get_runtime
+
+        budget = get_runtime().memory_budget
+    if budget is not None:
+        return parse_size(budget)
+    available = available_memory()
+    return int(available * BUDGET_FRACTION) if available else DEFAULT_BUDGET
+
+
+def kernel_block(levels: int, kernel_bytes: int = KERNEL_BYTES) -> int:
+    """信息距离分块核每块的变量数，使联合计数块 (block·L)² 的工作集不超过 kernel_bytes。
+
+    每个联合计数元素约占 20 字节（float32 计数、整数下标、float64 查表结果）。
+    """
+    side = math.isqrt(max(1, kernel_bytes // 20))
+    return max(1, side // max(1, levels))
+
+
+class Plan:
+    """一次距离计算的执行计划。
+
+    Attributes:
+        method: ``"euclidean"`` 或 ``"information"``。
+        strategy: ``"dense"``、``"tiled"`` 或 ``"topk"``。
+        n_vars: 变量数（距离矩阵边长）。
+        n_samples: 样本数。
+        peak_bytes: 预计额外占用的峰值内存。
+        disk_bytes: 预计写盘的字节数（仅 tiled）。
+        seconds: 预计耗时。
+        budget: 内存预算。
+        tile_rows: 分块计算时每块的行数。
+        k: topk 策略保留的近邻数。
+        feasible: 预计峰值内存是否在预算内。
+        scratch_dir: tiled 结果所在目录。
+    """
+    def __init__(self, method, strategy, n_vars, n_samples, peak_bytes, disk_bytes, seconds,
+                 budget, tile_rows, k, scratch_dir):
+        self.method = method
+        self.strategy = strategy
+        self.n_vars = n_vars
+        self.n_samples = n_samples
+        self.peak_bytes = peak_bytes
+        self.disk_bytes = disk_bytes
+        self.seconds = seconds
+        self.budget = budget
+        self.tile_rows = tile_rows
+        self.k = k
+        self.scratch_dir = scratch_dir
+        self.feasible = peak_bytes <= budget
+
+    def describe(self) -> str:
+        """生成给用户看的一句话说明"""
+        text = (f"{STRATEGY_NAMES[self.strategy]}：{self.n_vars}×{self.n_vars}，"
+                f"预计内存 {format_size(self.peak_bytes)}（预算 {format_size(self.budget)}），"
+                f"预计耗时 {format_seconds(self.seconds)}")
+        if self.strategy == "tiled":
+            text += f"，结果写入 {self.scratch_dir}（{format_size(self.disk_bytes)}）"
+        elif self.strategy == "topk":
+            text += f"，每个变量保留最近的 {self.k} 个邻居"
+        return text
+
+    def __repr__(self) -> str:
+        return f"Plan({self.method!r}, {self.strategy!r}, peak={format_size(self.peak_bytes)}, seconds={self.seconds:.1f})"
+
+
+def estimate(n_vars: int, n_samples: int, method: str, strategy: str, bins: int = 13,
+             tile_rows: int = None, k: int = 10, has_nan: bool = False) -> tuple:
+    """估算某个策略的峰值内存、写盘量与耗时。
+
+    峰值内存只计算计算过程额外申请的内存，不含已加载的输入数据。
+
+    Args:
+        n_vars: 变量数。
+        n_samples: 样本数。
+        method: ``"euclidean"`` 或 ``"information"``。
+        strategy: ``"dense"``、``"tiled"`` 或 ``"topk"``。
+        bins: 离散等级数量（information）。
+        tile_rows: 分块行数（tiled/topk），None 时按 MAX_TILE_ROWS。
+        k: topk 的近邻数。
+        has_nan: 输入是否含缺失值（euclidean 此时改用成对完整的掩码核）。
+
+    Returns:
+        tuple: ``(peak_bytes, disk_bytes, seconds)``。
+
+    Raises:
+        ValueError: method 或 strategy 未知。
+    """
+    if method not in ("euclidean", "information"):
+        raise ValueError(f"未知的距离计算方法: {method}")
+    if strategy not in STRATEGIES:
+        raise ValueError(f"未知的执行策略: {strategy}")
+
+    n, m = n_vars, n_samples
+    tile = min(n, tile_rows or MAX_TILE_ROWS)
+    full = n * n * ITEMSIZE
+    disk = 0
+
+    if method == "euclidean":
+        seconds = 2.0 * n * n * m / GEMM_FLOPS
+        if has_nan:
+            # 掩码核：缺失处置 0 的数值、其平方与观测掩码三份 n×m，四次矩阵乘法；
+            # 每块有平方和、共同观测数与两个同形的临时矩阵
+            seconds *= 4
+            peak = 3 * n * m * ITEMSIZE + 4 * (n if strategy == "dense" else tile) * n * ITEMSIZE
+            if strategy == "dense":
+                peak += full
+        elif strategy == "dense":
+            # 结果矩阵与点积中间矩阵
+            peak = 2 * full
+        else:
+            peak = 2 * tile * n * ITEMSIZE
+    else:
+        levels = bins + 1
+        # 离散化结果、行编码，以及按块计算的 (rows, bins, m) 张量
+        peak = n * m * ITEMSIZE + n * m * 4 + min(DISCRETIZE_CHUNK_BYTES, 2 * n * bins * m * ITEMSIZE)
+        seconds = n * m * bins / DISCRETIZE_RATE
+        pairs = n * n / 2.0
+        kernel = pairs * levels * levels * (2.0 * m / GEMM_FLOPS + 1.0 / LUT_RATE)
+        # 分块核的工作集与 one-hot 矩阵（总量不大时一次性构建）
+        peak += min(KERNEL_BYTES, 20 * (n * levels) ** 2) + min(4 * KERNEL_BYTES, n * levels * m * 4)
+        if strategy == "dense":
+            peak += full
+            seconds += kernel
+        elif strategy == "tiled":
+            seconds += kernel
+        else:
+            # 每行需要与全部列比较，无法利用对称性
+            peak += tile * n * ITEMSIZE
+            seconds += 2 * kernel
+
+    if strategy == "tiled":
+        disk = full
+        seconds += full / DISK_RATE
+    elif strategy == "topk":
+        # MultiIndex 两层编码 + 距离列
+        peak += n * k * 3 * ITEMSIZE
+    return int(peak), int(disk), float(seconds)
+
+
+def _tile_rows(n_vars: int, budget: int, fixed: int, per_row: int = 2) -> int:
+    """在预算内选择分块行数，per_row 为每块同时存在的 (rows, n_vars) 矩阵个数"""
+    rows = (budget - fixed) // max(1, per_row * n_vars * ITEMSIZE)
+    return int(max(1, min(n_vars, MAX_TILE_ROWS, rows)))
+
+
+def plan_distance(n_vars: int, n_samples: int, method: str, bins: int = 13, budget=None,
+                  strategy: str = "auto", k: int = 10, scratch_dir: str = None, has_nan: bool = False) -> Plan:
+    """为一次距离计算选择执行策略。
+
+    ``auto`` 依次尝试 dense → tiled → topk，选第一个峰值内存在预算内（tiled 还要求临时目录
+    有足够的磁盘空间）的策略；都不满足时返回 topk，且 ``feasible`` 为 False。
+
+    Args:
+        n_vars: 变量数。
+        n_samples: 样本数。
+        method: ``"euclidean"`` 或 ``"information"``。
+        bins: 离散等级数量（information）。
+        budget: 内存预算，见 :func:`memory_budget`。
+        strategy: ``"auto"`` 或指定的策略。
+        k: topk 的近邻数。
+        scratch_dir: tiled 结果的目录，默认运行配置的临时目录。
+        has_nan: 输入是否含缺失值，见 :func:`estimate`。
+
+    Returns:
+        Plan: 执行计划。
+
+    Raises:
+        ValueError: 规模、method 或 strategy 不合法。
+    """
+    if n_vars <= 0 or n_samples <= 0:
+        raise ValueError("变量数与样本数必须为正。")
+    if strategy != "auto" and strategy not in STRATEGIES:
+        raise ValueError(f"未知的执行策略: {strategy}")
+    if k <= 0:
+        raise ValueError("k 必须为正整数。")
+
+    budget = memory_budget(budget)
+    if scratch_dir is None:
+        from core.runtime import get_runtime
+
+        scratch_dir = get_runtime().scratch_path
+    fixed, _, _ = estimate(n_vars, n_samples, method, "tiled", bins, tile_rows=1, k=k, has_nan=has_nan)
+    tile_rows = _tile_rows(n_vars, budget, fixed, per_row=4 if has_nan and method == "euclidean" else 2)
+
+    def make(name):
+        peak, disk, seconds = estimate(n_vars, n_samples, method, name, bins, tile_rows, k, has_nan)
+        return Plan(method, name, n_vars, n_samples, peak, disk, seconds, budget, tile_rows, k, scratch_dir)
+
+    if strategy != "auto":
+        return make(strategy)
+
+    plan = make("dense")
+    if plan.feasible:
+        return plan
+
+    plan = make("tiled")
+    try:
+        free = shutil.disk_usage(scratch_dir).free
+    except OSError:
+        free = 0
+    if plan.feasible and free >= plan.disk_bytes * 1.1:
+        return plan
+    return make("topk")
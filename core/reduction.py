@@ -2,6 +2,11 @@ import numpy as np
 import pandas as pd
 from sklearn.manifold import MDS
 
+from core.trace import span
+from core.runtime import thread_limited
+
+@span("reduction.reduce_dimension")
+@thread_limited
 def reduce_dimension(distance_matrix: pd.DataFrame, n_components: int = 2, random_state: int = 42) -> pd.DataFrame:
     """使用 MDS 将预计算的距离矩阵降维到低维坐标。
 
@@ -32,5 +37,6 @@ def reduce_dimension(distance_matrix: pd.DataFrame, n_components: int = 2, rando
         dissimilarity="precomputed",  # 直接使用距离矩阵
         random_state=random_state
     )
-    coords = mds.fit_transform(distance)
+    with span("reduction.smacof", n=distance.shape[0]):
+        coords = mds.fit_transform(distance)
     return pd.DataFrame(coords, index=distance_matrix.index, columns=['x', 'y'])
\ No newline at end of file
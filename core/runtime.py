@@ -0,0 +1,246 @@
+"""计算资源的统一配置：进程数、每个进程的 BLAS/OpenMP 线程数、内存预算与临时目录。
+
+各处的并行原本各自为政：批处理按文件开进程池，置换检验、参数扫描、分布式的本机 worker
+与计算服务又各有自己的并发数，而 numpy/scipy/sklearn 底层的 BLAS 与 OpenMP 默认在每个进程里
+都开满 CPU 核数的线程。多个进程各开满线程时线程数远超核数（oversubscription），反而更慢。
+这里集中一份 :class:`RuntimeConfig`：
+
+- ``workers`` 是进程池的默认进程数；
+- ``blas_threads`` 是每个进程内 BLAS/OpenMP 的线程数，未指定时按 CPU 核数 ÷ 并发进程数分配，
+  单进程计算时不作限制；
+- ``memory_budget`` 是总内存预算，开进程池时平分给各进程（见 :func:`core.planner.memory_budget`）；
+- ``scratch_dir`` 是分块写盘结果与作业目录所在的临时目录。
+
+当前配置由 :func:`get_runtime` 取得，首次使用时从环境变量 ``CORR_WORKERS``、``CORR_BLAS_THREADS``、
+``CORR_MEMORY_BUDGET``、``CORR_SCRATCH_DIR`` 读取，界面与批处理用 :func:`set_runtime` 修改。
+:func:`process_pool` 创建的进程池会把按进程数分摊后的配置带进子进程，并在子进程中限制线程数。
+
+线程数的限制优先使用 ``threadpoolctl``（sklearn 的依赖，对已加载的库立即生效）；未安装时只能
+设置 ``OMP_NUM_THREADS`` 等环境变量，对之后启动的子进程生效。
+"""
+import os
+import functools
+import tempfile
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+
+from core.planner import parse_size, format_size
+
+# 常见 BLAS/OpenMP 实现读取的线程数环境变量
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                   "BLIS_NUM_THREADS", "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+def cpu_count() -> int:
+    """当前进程可用的 CPU 核数（考虑 CPU 亲和性）"""
+    try:
+        return len(os.sched_getaffinity(0)) or 1
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+def _positive_int(value, name: str):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return None
+        try:
+            value = int(value)
+        except ValueError:
+            raise ValueError(f"{name} 必须为正整数：{value}") from None
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError(f"{name} 必须为整数。")
+    if value < 1:
+        raise ValueError(f"{name} 必须为正整数。")
+    return value
+
+
+class RuntimeConfig:
+    """一份计算资源配置。
+
+    Attributes:
+        workers: 进程池的默认进程数，None 表示 CPU 核数。
+        blas_threads: 每个进程内 BLAS/OpenMP 的线程数，None 表示自动（见 :meth:`threads_for`）。
+        memory_budget: 总内存预算字节数，None 表示可用内存的一半。
+        scratch_dir: 临时目录，None 表示系统临时目录。
+    """
+    def __init__(self, workers=None, blas_threads=None, memory_budget=None, scratch_dir=None):
+        self.workers = _positive_int(workers, "workers")
+        self.blas_threads = _positive_int(blas_threads, "blas_threads")
+        self.memory_budget = parse_size(memory_budget) if memory_budget not in (None, "") else None
+        if self.memory_budget is not None and self.memory_budget <= 0:
+            raise ValueError("memory_budget 必须为正。")
+        self.scratch_dir = os.fspath(scratch_dir) if scratch_dir else None
+
+    @classmethod
+    def from_env(cls) -> "RuntimeConfig":
+        """从环境变量 ``CORR_WORKERS``、``CORR_BLAS_THREADS``、``CORR_MEMORY_BUDGET``、``CORR_SCRATCH_DIR`` 读取"""
+        return cls(workers=os.environ.get("CORR_WORKERS"),
+                   blas_threads=os.environ.get("CORR_BLAS_THREADS"),
+                   memory_budget=os.environ.get("CORR_MEMORY_BUDGET"),
+                   scratch_dir=os.environ.get("CORR_SCRATCH_DIR"))
+
+    @property
+    def n_workers(self) -> int:
+        """实际的默认进程数"""
+        return self.workers or cpu_count()
+
+    @property
+    def scratch_path(self) -> str:
+        """实际的临时目录"""
+        return self.scratch_dir or tempfile.gettempdir()
+
+    def threads_for(self, concurrency: int = 1):
+        """concurrency 个进程（或计算线程）并发时每个的 BLAS 线程数。
+
+        指定了 blas_threads 时直接使用；否则平分 CPU 核数，单进程时返回 None（不限制）。
+        """
+        if self.blas_threads is not None:
+            return self.blas_threads
+        if concurrency <= 1:
+            return None
+        return max(1, cpu_count() // concurrency)
+
+    def for_worker(self, concurrency: int) -> "RuntimeConfig":
+        """进程池中每个子进程使用的配置：线程数与内存预算按 concurrency 分摊"""
+        from core.planner import memory_budget as total_budget
+
+        budget = self.memory_budget if self.memory_budget is not None else total_budget()
+        return RuntimeConfig(workers=1, blas_threads=self.threads_for(concurrency) or cpu_count(),
+                             memory_budget=max(1, budget // max(1, concurrency)), scratch_dir=self.scratch_dir)
+
+    def limit_threads(self, concurrency: int = 1):
+        """在 with 块内把 BLAS/OpenMP 线程数限制为 :meth:`threads_for` 的结果；不需要限制时什么也不做"""
+        return limit_threads(self.threads_for(concurrency))
+
+    def to_dict(self) -> dict:
+        return {"workers": self.workers, "blas_threads": self.blas_threads,
+                "memory_budget": self.memory_budget, "scratch_dir": self.scratch_dir}
+
+    def describe(self) -> str:
+        """中文的配置说明，用于界面与批处理日志"""
+        threads = self.blas_threads or f"自动（{cpu_count()} 核 ÷ 并发进程数）"
+        budget = format_size(self.memory_budget) if self.memory_budget else "自动（可用内存的一半）"
+        return (f"进程数 {self.n_workers}，每进程 BLAS 线程 {threads}，内存预算 {budget}，"
+                f"临时目录 {self.scratch_path}")
+
+    def __repr__(self) -> str:
+        return "RuntimeConfig(" + ", ".join(f"{k}={v!r}" for k, v in self.to_dict().items()) + ")"
+
+
+_CURRENT = None
+
+
+def get_runtime() -> RuntimeConfig:
+    """当前的运行配置，首次调用时从环境变量读取"""
+    global _CURRENT
+    if _CURRENT is None:
+        _CURRENT = RuntimeConfig.from_env()
+    return _CURRENT
+
+
+def set_runtime(config) -> RuntimeConfig:
+    """替换当前的运行配置。
+
+    Args:
+        config: RuntimeConfig，或其构造参数组成的 dict；None 表示重新从环境变量读取。
+
+    Returns:
+        RuntimeConfig: 新的配置。
+
+    Raises:
+        TypeError: config 类型不合法。
+    """
+    global _CURRENT
+    if config is None:
+        config = RuntimeConfig.from_env()
+    elif isinstance(config, dict):
+        config = RuntimeConfig(**config)
+    elif not isinstance(config, RuntimeConfig):
+        raise TypeError("config 必须是 RuntimeConfig 或 dict。")
+    _CURRENT = config
+    return config
+
+
+def configure(**kwargs) -> RuntimeConfig:
+    """在当前配置上修改部分字段，如 ``configure(workers=4, blas_threads=2)``"""
+    values = get_runtime().to_dict()
+    unknown = set(kwargs) - set(values)
+    if unknown:
+        raise TypeError(f"未知的配置项: {', '.join(sorted(unknown))}")
+    values.update(kwargs)
+    return set_runtime(values)
+
+
+def limit_threads(threads):
+    """在 with 块内把已加载的 BLAS/OpenMP 库限制为 threads 个线程；threads 为 None 或未安装 threadpoolctl 时不做限制"""
+    if threads is None:
+        return nullcontext()
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return nullcontext()
+    return threadpool_limits(limits=threads)
+
+
+def thread_limited(fn):
+    """装饰器：调用期间按当前运行配置限制 BLAS/OpenMP 线程数，用于在本进程内计算的入口函数"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with get_runtime().limit_threads():
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def apply_thread_limit(threads) -> None:
+    """在整个进程内限制 BLAS/OpenMP 的线程数（子进程初始化时调用）。
+
+    同时设置 ``OMP_NUM_THREADS`` 等环境变量，让之后才加载的库与再启动的子进程也遵守。
+    """
+    if threads is None:
+        return
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    # 不作为上下文管理器使用，限制在进程结束前一直有效
+    threadpool_limits(limits=threads)
+
+
+def init_process(state: dict, initializer=None, initargs=()) -> None:
+    """子进程的初始化：安装父进程分摊好的配置、限制线程数，再调用原有的初始化函数"""
+    config = set_runtime(state)
+    apply_thread_limit(config.blas_threads)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def process_pool(max_workers: int = None, initializer=None, initargs=()) -> ProcessPoolExecutor:
+    """按当前运行配置创建进程池。
+
+    Args:
+        max_workers: 进程数，None 表示配置的 workers。
+        initializer: 子进程的初始化函数（在运行配置安装之后调用）。
+        initargs: initializer 的参数。
+
+    Returns:
+        ProcessPoolExecutor: 子进程的线程数与内存预算已按进程数分摊。
+    """
+    config = get_runtime()
+    workers = max(1, max_workers or config.n_workers)
+    state = config.for_worker(workers).to_dict()
+    return ProcessPoolExecutor(max_workers=workers, initializer=init_process,
+                               initargs=(state, initializer, initargs))
+
+
+def thread_info() -> list:
+    """已加载的 BLAS/OpenMP 库与其当前线程数 ``[(库, 线程数), ...]``；未安装 threadpoolctl 时为空"""
+    try:
+        from threadpoolctl import threadpool_info
+    except ImportError:
+        return []
+    return [(f"{info.get('internal_api', '?')}", info.get("num_threads")) for info in threadpool_info()]
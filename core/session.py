@@ -0,0 +1,227 @@
+import os
+import json
+import struct
+
+import numpy as np
+import pandas as pd
+
+from core.trace import span
+
+
+# 会话文件格式：
+#   [MAGIC 8B][header 偏移 8B][数据块 ...][JSON header]
+# 每个阶段的数据以 C 顺序按 ALIGN 对齐写入，打开时直接 np.memmap，读取按需发生；
+# 行/列标签单独存成 JSON 块，只在该阶段被加载时才解析。
+MAGIC = b"CORRSES1"
+ALIGN = 64
+CHUNK_BYTES = 64 * 1024 * 1024
+STAGES = ("data", "discretized_data", "eudistance", "infodistance", "coordinates")
+# 指向本机文件的 attrs 不随会话保存
+LOCAL_ATTRS = ("path", "job_dir")
+
+
+def _to_jsonable(labels: pd.Index) -> list:
+    """把 Index 转为可 JSON 序列化的列表（numpy 标量转 Python 标量，MultiIndex 的元组转列表）。"""
+    def scalar(v):
+        return v.item() if isinstance(v, np.generic) else v
+
+    if isinstance(labels, pd.MultiIndex):
+        return [[scalar(v) for v in item] for item in labels.tolist()]
+    return [scalar(v) for v in labels.tolist()]
+
+
+def _attrs(df: pd.DataFrame) -> dict:
+    """可随会话保存的 attrs（如离散化方法与边界）：跳过本机路径与不能 JSON 序列化的值。
+
+    quantile/grid 离散化结果靠 ``attrs["discretizer"]`` 标明是整数编码（缺失为 -1），必须随数据保存。
+    """
+    out = {}
+    for key, value in df.attrs.items():
+        if key in LOCAL_ATTRS:
+            continue
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            continue
+        out[key] = value
+    return out
+
+
+def _pad(f) -> int:
+    """把文件指针补齐到 ALIGN 的整数倍，返回补齐后的位置。"""
+    pos = f.tell()
+    rem = pos % ALIGN
+    if rem:
+        f.write(b"\0" * (ALIGN - rem))
+    return f.tell()
+
+
+@span("session.save")
+def save_session(path: str, stages: dict, params: dict = None) -> bool:
+    """把各阶段数据与参数写入单个会话文件。
+
+    数组按行分块写入，避免对大表做整块拷贝；写入先落到临时文件，完成后再替换目标文件。
+    各阶段可 JSON 序列化的 attrs（本机路径除外）一并保存，打开时恢复。
+
+    Args:
+        path: 目标路径。
+        stages: 阶段名 → DataFrame，阶段名需在 ``STAGES`` 中；空 DataFrame 会被跳过。
+        params: 各阶段的计算参数（需可 JSON 序列化）。
+
+    Returns:
+        bool: 保存成功返回 True。
+
+    Raises:
+        TypeError: stages 不是 dict，或其中的值不是 DataFrame。
+        ValueError: 路径为空、阶段名未知、没有可保存的数据或数据不是数值型。
+    """
+    if not isinstance(path, str) or not path.strip():
+        raise ValueError("保存路径不能为空")
+    if not isinstance(stages, dict):
+        raise TypeError("stages 必须是 dict。")
+
+    frames = {}
+    for name, df in stages.items():
+        if name not in STAGES:
+            raise ValueError(f"未知的阶段: {name}")
+        if not isinstance(df, pd.DataFrame):
+            raise TypeError(f"{name} 必须是 pandas.DataFrame。")
+        if df.empty:
+            continue
+        if not all(pd.api.types.is_numeric_dtype(t) for t in df.dtypes):
+            raise ValueError(f"{name} 含非数值列，无法写入会话。")
+        frames[name] = df
+    if not frames:
+        raise ValueError("没有可保存的数据")
+
+    header = {"version": 1, "params": params or {}, "stages": {}}
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", 0))  # header 偏移占位
+
+        for name, df in frames.items():
+            dtype = np.result_type(*df.dtypes)
+            n_rows, n_cols = df.shape
+            rows_per_chunk = max(1, CHUNK_BYTES // max(1, n_cols * dtype.itemsize))
+
+            offset = _pad(f)
+            for r0 in range(0, n_rows, rows_per_chunk):
+                block = df.iloc[r0:r0 + rows_per_chunk].to_numpy(dtype=dtype)
+                f.write(np.ascontiguousarray(block).tobytes())
+
+            labels = json.dumps({
+                "index": _to_jsonable(df.index),
+                "columns": _to_jsonable(df.columns),
+                "index_name": df.index.name,
+                "index_names": list(df.index.names),
+            }, ensure_ascii=False).encode("utf-8")
+            labels_offset = f.tell()
+            f.write(labels)
+
+            header["stages"][name] = {
+                "dtype": dtype.str,
+                "shape": [n_rows, n_cols],
+                "offset": offset,
+                "labels_offset": labels_offset,
+                "labels_size": len(labels),
+                "attrs": _attrs(df),
+            }
+
+        header_offset = _pad(f)
+        f.write(json.dumps(header, ensure_ascii=False).encode("utf-8"))
+        f.seek(len(MAGIC))
+        f.write(struct.pack("<Q", header_offset))
+
+    os.replace(tmp_path, path)
+    return True
+
+
+class Session:
+    """已打开的会话文件，各阶段在首次访问时才映射。
+
+    Attributes:
+        path: 会话文件路径。
+        params: 保存时记录的计算参数。
+        stages: 文件中包含的阶段名列表（按写入顺序）。
+    """
+
+    def __init__(self, path: str, header: dict):
+        self.path = path
+        self.params = header.get("params", {})
+        self._meta = header["stages"]
+        self.stages = list(self._meta)
+        self._cache = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._meta
+
+    @span("session.load")
+    def load(self, name: str) -> pd.DataFrame:
+        """以只读内存映射的方式加载某一阶段。
+
+        Args:
+            name: 阶段名。
+
+        Returns:
+            pandas.DataFrame: 以 memmap 为底层存储的数据表（不复制数据）。
+
+        Raises:
+            KeyError: 会话中没有该阶段。
+        """
+        if name in self._cache:
+            return self._cache[name]
+        if name not in self._meta:
+            raise KeyError(name)
+
+        meta = self._meta[name]
+        values = np.memmap(self.path, dtype=np.dtype(meta["dtype"]), mode="r",
+                           offset=meta["offset"], shape=tuple(meta["shape"]))
+        with open(self.path, "rb") as f:
+            f.seek(meta["labels_offset"])
+            labels = json.loads(f.read(meta["labels_size"]).decode("utf-8"))
+
+        names = labels.get("index_names", [labels["index_name"]])
+        if len(names) > 1:
+            # 稀疏近邻结果的 (source, target) 两层索引
+            index = pd.MultiIndex.from_tuples([tuple(item) for item in labels["index"]], names=names)
+        else:
+            index = pd.Index(labels["index"], name=labels["index_name"])
+        df = pd.DataFrame(values, index=index, columns=pd.Index(labels["columns"]), copy=False)
+        df.attrs.update(meta.get("attrs", {}))
+        self._cache[name] = df
+        return df
+
+
+@span("session.open")
+def open_session(path: str) -> Session:
+    """打开会话文件，只读取文件头，不读取任何阶段数据。
+
+    Args:
+        path: 会话文件路径。
+
+    Returns:
+        Session: 会话对象，通过 ``Session.load`` 按需加载各阶段。
+
+    Raises:
+        FileNotFoundError: 文件不存在。
+        ValueError: 路径为空或文件不是有效的会话文件。
+    """
+    if not isinstance(path, str) or not path.strip():
+        raise ValueError("文件路径不能为空")
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("不是有效的会话文件")
+        (header_offset,) = struct.unpack("<Q", f.read(8))
+        if header_offset == 0:
+            raise ValueError("会话文件不完整")
+        f.seek(header_offset)
+        try:
+            header = json.loads(f.read().decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ValueError("会话文件头损坏") from e
+
+    return Session(path, header)
@@ -0,0 +1,429 @@
+"""两两距离的显著性：置换检验 p 值与 bootstrap 置信区间。
+
+两者都复用距离计算的批量核：置换检验把同一批 P 个置换后的变量堆叠成一个大矩阵，一次矩阵乘法
+得到 P 份联合计数（信息距离）或 Gram 矩阵（欧氏距离）；bootstrap 用多项式权重代替重采样，
+同样一次乘法得到 P 份加权计数。按变量块拆分的任务可以交给进程池并行。
+
+- :func:`iter_permutation_test` 每完成一批置换产出一次当前的 p 值估计；开启提前停止后，
+  p 值已能以足够置信度判定在 alpha 两侧的变量对不再参与后续置换，全部判定完的块直接跳过。
+- :func:`iter_bootstrap` 每完成一个变量块产出一次，未完成的位置为 NaN。
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from core.trace import span
+from core.planner import KERNEL_BYTES, kernel_block
+from core.runtime import get_runtime, process_pool
+from core.distance import gaussian_discretization, _encode, _onehot, _entropy_block, _info_metrics
+
+
+# ------------------------------------------------------------------ 数据准备
+
+def _prepare(df: pd.DataFrame, method: str, sigma: float, bins: int, base: float) -> dict:
+    """把输入转换为批量核需要的状态（可 pickle，供进程池的初始化函数使用）"""
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError("df 必须是 pandas.DataFrame。")
+    if df.empty:
+        raise ValueError("DataFrame 为空，无法计算距离。")
+    # 与 compute_distance_matrix 一致：首列为字符串时作为行索引
+    first_col = df.iloc[:, 0]
+    if first_col.dtype == 'object' or isinstance(first_col.iloc[0], str):
+        df = df.set_index(df.columns[0])
+
+    if method == "information":
+        codes, levels = _encode(gaussian_discretization(df, sigma=sigma, bins=bins), ignore_na=True)
+        m = codes.shape[1]
+        clogc = np.zeros(m + 1)
+        counts = np.arange(1, m + 1, dtype=np.float64)
+        clogc[1:] = counts * np.log(counts)
+        return {"method": method, "index": df.index, "codes": codes, "levels": levels,
+                "clogc": clogc, "scale": 1.0 / np.log(base)}
+    if method == "euclidean":
+        X = df.to_numpy(dtype=np.float64)
+        if np.isnan(X).any():
+            raise ValueError("欧氏距离的显著性检验不支持缺失值。")
+        return {"method": method, "index": df.index, "X": X}
+    raise ValueError(f"未知的距离计算方法: {method}")
+
+
+def _block_size(state: dict, batch: int) -> int:
+    """每块的变量数，使一批 batch 份结果的工作集不超过 KERNEL_BYTES"""
+    if state["method"] == "information":
+        return max(1, kernel_block(state["levels"]) // max(1, math.isqrt(batch)))
+    # Gram 块、平方和与开方结果，每个元素约 24 字节
+    return max(1, math.isqrt(max(1, KERNEL_BYTES // (24 * batch))))
+
+
+def _blocks(n: int, block: int) -> list:
+    """上三角（含对角）的块坐标"""
+    return [(r0, min(r0 + block, n), c0, min(c0 + block, n))
+            for r0 in range(0, n, block) for c0 in range(r0, n, block)]
+
+
+# ------------------------------------------------------------------ 批量核
+
+def _permuted_block(state: dict, r0: int, r1: int, c0: int, c1: int, perms: np.ndarray) -> np.ndarray:
+    """行块 [r0, r1) 与置换后的列块 [c0, c1) 的距离，返回 (A, P, B)"""
+    P = perms.shape[0]
+    if state["method"] == "information":
+        codes, levels = state["codes"], state["levels"]
+        OA = _onehot(codes[r0:r1], levels)
+        # (B, P, m) → (P·B, m)：P 份置换后的列块堆叠成一个大块
+        stacked = codes[c0:c1][:, perms].transpose(1, 0, 2).reshape(-1, codes.shape[1])
+        hx, hy, hxy, _ = _entropy_block(OA, _onehot(stacked, levels), levels, state["clogc"])
+        vi = _info_metrics(hx, hy, hxy, ("vi",))["vi"] * state["scale"]
+        return vi.reshape(r1 - r0, P, c1 - c0)
+
+    X = state["X"]
+    XA, XB = X[r0:r1], X[c0:c1]
+    stacked = XB[:, perms].transpose(1, 0, 2).reshape(-1, X.shape[1])
+    gram = (XA @ stacked.T).reshape(r1 - r0, P, c1 - c0)
+    # 置换不改变平方和
+    sq = (XA ** 2).sum(axis=1)[:, None, None] + (XB ** 2).sum(axis=1)[None, None, :]
+    return np.sqrt(np.maximum(sq - 2.0 * gram, 0.0))
+
+
+def _weighted_block(state: dict, r0: int, r1: int, c0: int, c1: int, weights: np.ndarray) -> np.ndarray:
+    """bootstrap：以多项式权重 (P, m) 计算行块与列块的距离，返回 (A, P, B)"""
+    P = weights.shape[0]
+    if state["method"] == "information":
+        codes, levels = state["codes"], state["levels"]
+        OA = _onehot(codes[r0:r1], levels)
+        OB = _onehot(codes[c0:c1], levels)
+        # 只给一侧加权，联合计数 Σ w·[a=k][b=l] 即为重采样后的计数
+        stacked = (OB[None, :, :] * weights[:, None, :].astype(OB.dtype)).reshape(-1, codes.shape[1])
+        hx, hy, hxy, _ = _entropy_block(OA, stacked, levels, state["clogc"])
+        vi = _info_metrics(hx, hy, hxy, ("vi",))["vi"] * state["scale"]
+        vi = vi.reshape(r1 - r0, P, c1 - c0)
+        if r0 == c0:
+            diag = np.arange(r1 - r0)
+            vi[diag, :, diag] = 0.0
+        return vi
+
+    X = state["X"]
+    XA, XB = X[r0:r1], X[c0:c1]
+    W = weights.astype(np.float64)
+    stacked = (XB[None, :, :] * W[:, None, :]).reshape(-1, X.shape[1])
+    gram = (XA @ stacked.T).reshape(r1 - r0, P, c1 - c0)
+    sq = ((XA ** 2) @ W.T)[:, :, None] + ((XB ** 2) @ W.T).T[None, :, :]
+    return np.sqrt(np.maximum(sq - 2.0 * gram, 0.0))
+
+
+# ------------------------------------------------------------------ 进程池
+
+_STATE = None
+
+
+def _init_worker(state: dict) -> None:
+    global _STATE
+    _STATE = state
+
+
+def _permutation_task(blocks: list, perms: np.ndarray, observed: list) -> list:
+    """计算一组块在这批置换下“不大于观测值”的次数"""
+    out = []
+    for (r0, r1, c0, c1), obs in zip(blocks, observed):
+        values = _permuted_block(_STATE, r0, r1, c0, c1, perms)
+        out.append((values <= obs[:, None, :] + 1e-12).sum(axis=1))
+    return out
+
+
+def _bootstrap_task(block: tuple, weights: np.ndarray, batch: int, quantiles: tuple, interval: str) -> tuple:
+    """计算一个块的全部 bootstrap 结果并汇总为观测值、均值、标准差与置信区间"""
+    r0, r1, c0, c1 = block
+    estimate = _weighted_block(_STATE, r0, r1, c0, c1, np.ones((1, weights.shape[1]), dtype=weights.dtype))[:, 0, :]
+    samples = np.concatenate([_weighted_block(_STATE, r0, r1, c0, c1, weights[b0:b0 + batch])
+                              for b0 in range(0, weights.shape[0], batch)], axis=1)
+    q_lo, q_hi = np.nanquantile(samples, quantiles, axis=1)
+    if interval == "basic":
+        # 以观测值为中心翻转分位数，抵消插件熵估计在重采样下的偏差
+        lower, upper = np.maximum(2 * estimate - q_hi, 0.0), 2 * estimate - q_lo
+    else:
+        lower, upper = q_lo, q_hi
+    return block, estimate, np.nanmean(samples, axis=1), np.nanstd(samples, axis=1, ddof=1), lower, upper
+
+
+class _Pool:
+    """n_jobs > 1 时使用按运行配置分摊线程与内存的进程池，否则在当前进程中执行；None 表示运行配置的进程数"""
+    def __init__(self, state: dict, n_jobs):
+        self.executor = None
+        self.workers = max(1, n_jobs or get_runtime().n_workers)
+        if self.workers > 1:
+            self.executor = process_pool(self.workers, initializer=_init_worker, initargs=(state,))
+        else:
+            _init_worker(state)
+
+    def map(self, fn, tasks: list) -> list:
+        if self.executor is None:
+            return [fn(*task) for task in tasks]
+        return [f.result() for f in [self.executor.submit(fn, *task) for task in tasks]]
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+
+# ------------------------------------------------------------------ 置换检验
+
+class PermutationResult:
+    """置换检验的当前（或最终）结果。
+
+    Attributes:
+        observed: 观测距离矩阵。
+        pvalues: p 值矩阵 (1 + c) / (1 + b)，c 为置换距离不大于观测值的次数；对角为 NaN。
+        n_permutations: 每个变量对实际使用的置换次数（提前停止后各不相同）。
+        decided: 是否已判定（提前停止）。
+        significant: p 值上界小于 alpha 的变量对。
+        done: 是否已全部结束。
+    """
+    def __init__(self, observed, pvalues, n_permutations, decided, significant, done):
+        self.observed = observed
+        self.pvalues = pvalues
+        self.n_permutations = n_permutations
+        self.decided = decided
+        self.significant = significant
+        self.done = done
+
+    def __repr__(self) -> str:
+        n = self.decided.shape[0]
+        pairs = max(1, n * (n - 1))
+        return (f"PermutationResult(max_permutations={int(self.n_permutations.to_numpy().max())}, "
+                f"decided={(int(self.decided.to_numpy().sum()) - n) / pairs:.1%}, done={self.done})")
+
+
+def _clopper_pearson(c: np.ndarray, b: np.ndarray, confidence: float) -> tuple:
+    """二项比例 c / b 的 Clopper–Pearson 置信区间"""
+    from scipy.special import betaincinv
+
+    delta = (1.0 - confidence) / 2.0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        lower = np.where(c > 0, betaincinv(np.maximum(c, 1), b - c + 1, delta), 0.0)
+        upper = np.where(c < b, betaincinv(c + 1, np.maximum(b - c, 1), 1.0 - delta), 1.0)
+    return lower, upper
+
+
+def iter_permutation_test(df: pd.DataFrame, method: str = "information", n_permutations: int = 999,
+                          batch_size: int = 32, alpha: float = 0.05, early_stop: bool = True,
+                          confidence: float = 0.999, sigma: float = 1.0, bins: int = 13, base: float = 2.0,
+                          n_jobs=1, seed=None):
+    """逐批执行置换检验，每批结束后产出当前结果。
+
+    原假设为两变量独立：保持 X 不变、把 Y 的样本顺序打乱，距离不大于观测值的比例即单侧 p 值
+    （距离越小越相关）。同一批置换对所有变量对共享。
+
+    Args:
+        df: 行=随机变量、列=样本的 DataFrame（首列为字符串时作为行索引）。
+        method: ``"information"``（先高斯离散化）或 ``"euclidean"``。
+        n_permutations: 最多的置换次数。
+        batch_size: 每批置换数，一批在一次矩阵乘法中完成。
+        alpha: 显著性水平。
+        early_stop: 是否对已判定的变量对提前停止。
+        confidence: 判定所用 Clopper–Pearson 区间的置信度。
+        sigma: 高斯离散化的标准差（information）。
+        bins: 离散等级数量（information）。
+        base: 熵的对数底（information）。
+        n_jobs: 进程数，1 表示在当前进程中计算，None 表示运行配置的进程数（见 :mod:`core.runtime`）。
+        seed: 随机种子。
+
+    Yields:
+        PermutationResult: 当前的 p 值估计，最后一次的 ``done`` 为 True。
+
+    Raises:
+        TypeError: df 不是 DataFrame。
+        ValueError: df 为空、method 未知、参数不合法或欧氏距离输入含缺失值。
+    """
+    if n_permutations <= 0 or batch_size <= 0:
+        raise ValueError("n_permutations 与 batch_size 必须为正整数。")
+    if not 0 < alpha < 1 or not 0 < confidence < 1:
+        raise ValueError("alpha 与 confidence 必须在 (0, 1) 之间。")
+
+    state = _prepare(df, method, sigma, bins, base)
+    index = state["index"]
+    n = len(index)
+    m = state["codes" if method == "information" else "X"].shape[1]
+    rng = np.random.default_rng(seed)
+    block = _block_size(state, batch_size)
+    blocks = _blocks(n, block)
+
+    def frame(values):
+        return pd.DataFrame(values, index=index, columns=index)
+
+    pool = _Pool(state, n_jobs)
+    try:
+        # 观测值用同一个核（恒等置换）计算，保证与置换值的舍入一致
+        identity = np.arange(m)[None, :]
+        with span("significance.observed", n=n):
+            observed = np.empty((n, n))
+            for r0, r1, c0, c1 in blocks:
+                values = _permuted_block(state, r0, r1, c0, c1, identity)[:, 0, :]
+                observed[r0:r1, c0:c1] = values
+                observed[c0:c1, r0:r1] = values.T
+            np.fill_diagonal(observed, 0.0)
+
+        counts = np.zeros((n, n), dtype=np.int64)
+        used = np.zeros((n, n), dtype=np.int64)
+        decided = np.eye(n, dtype=bool) | np.isnan(observed)
+        significant = np.zeros((n, n), dtype=bool)
+        workers = pool.workers
+
+        done = 0
+        while done < n_permutations:
+            P = min(batch_size, n_permutations - done)
+            perms = np.argsort(rng.random((P, m)), axis=1)
+            active = [b for b in blocks if not decided[b[0]:b[1], b[2]:b[3]].all()]
+            if not active:
+                break
+
+            with span("significance.permutation_batch", permutations=P, blocks=len(active)):
+                # 按进程数把块均分成任务
+                chunks = [active[i::workers] for i in range(workers) if active[i::workers]]
+                tasks = [(chunk, perms, [observed[r0:r1, c0:c1] for r0, r1, c0, c1 in chunk]) for chunk in chunks]
+                for chunk, results in zip(chunks, pool.map(_permutation_task, tasks)):
+                    for (r0, r1, c0, c1), hits in zip(chunk, results):
+                        open_ = ~decided[r0:r1, c0:c1]
+                        counts[r0:r1, c0:c1] += np.where(open_, hits, 0)
+                        used[r0:r1, c0:c1] += np.where(open_, P, 0)
+                        if c0 != r0:
+                            counts[c0:c1, r0:r1] = counts[r0:r1, c0:c1].T
+                            used[c0:c1, r0:r1] = used[r0:r1, c0:c1].T
+                        else:
+                            # 对角块中 (i, j) 与 (j, i) 各算了一次，取上三角保持对称
+                            tril = np.tril_indices(r1 - r0, -1)
+                            for mat in (counts[r0:r1, c0:c1], used[r0:r1, c0:c1]):
+                                mat[tril] = mat.T[tril]
+            done += P
+
+            with np.errstate(invalid="ignore", divide="ignore"):
+                pvalues = (1.0 + counts) / (1.0 + used)
+            pvalues[np.eye(n, dtype=bool) | np.isnan(observed)] = np.nan
+            lower, upper = _clopper_pearson(counts, used, confidence)
+            significant = (upper < alpha) & ~np.eye(n, dtype=bool)
+            if early_stop:
+                decided |= significant | (lower > alpha)
+
+            finished = done >= n_permutations or decided.all()
+            yield PermutationResult(frame(observed), frame(pvalues), frame(used), frame(decided),
+                                    frame(significant), finished)
+            if finished:
+                break
+    finally:
+        pool.close()
+
+
+@span("significance.permutation_test")
+def permutation_test(df: pd.DataFrame, method: str = "information", n_permutations: int = 999,
+                     callback=None, **kwargs) -> PermutationResult:
+    """执行置换检验并返回最终结果，参数见 :func:`iter_permutation_test`。
+
+    Args:
+        df: 行=随机变量、列=样本的 DataFrame。
+        method: ``"information"`` 或 ``"euclidean"``。
+        n_permutations: 最多的置换次数。
+        callback: 每批结束时以 PermutationResult 调用，返回 True 时中止。
+        **kwargs: 传给 :func:`iter_permutation_test`。
+
+    Returns:
+        PermutationResult: 最终结果。
+    """
+    result = None
+    for result in iter_permutation_test(df, method, n_permutations, **kwargs):
+        if callback is not None and callback(result):
+            break
+    return result
+
+
+# ------------------------------------------------------------------ bootstrap
+
+def iter_bootstrap(df: pd.DataFrame, method: str = "information", n_boot: int = 200, ci: float = 0.95,
+                   interval: str = "basic", batch_size: int = 32, sigma: float = 1.0, bins: int = 13,
+                   base: float = 2.0, n_jobs=1, seed=None):
+    """对样本做 bootstrap 重采样，逐块产出距离的均值、标准差与置信区间。
+
+    所有变量对使用同一组重采样（多项式权重），重采样以权重形式并入批量核，不复制数据。
+    重采样会产生重复样本，使插件熵估计偏小，信息距离的百分位区间常常整体偏离观测值，
+    因此默认使用 basic 区间 [2θ - q_hi, 2θ - q_lo]。
+
+    Args:
+        df: 行=随机变量、列=样本的 DataFrame（首列为字符串时作为行索引）。
+        method: ``"information"`` 或 ``"euclidean"``。
+        n_boot: 重采样次数。
+        ci: 置信水平。
+        interval: ``"basic"`` 或 ``"percentile"``。
+        batch_size: 每次矩阵乘法处理的重采样数。
+        sigma: 高斯离散化的标准差（information）。
+        bins: 离散等级数量（information）。
+        base: 熵的对数底（information）。
+        n_jobs: 进程数，1 表示在当前进程中计算，None 表示运行配置的进程数（见 :mod:`core.runtime`）。
+        seed: 随机种子。
+
+    Yields:
+        dict: ``{"estimate", "mean", "std", "lower", "upper", "progress"}``，estimate 为观测距离，
+        前五项为 DataFrame（未完成的位置为 NaN），progress 为已完成块的比例。
+
+    Raises:
+        TypeError: df 不是 DataFrame。
+        ValueError: df 为空、method 未知或参数不合法。
+    """
+    if n_boot < 2 or batch_size <= 0:
+        raise ValueError("n_boot 必须 ≥ 2，batch_size 必须为正整数。")
+    if not 0 < ci < 1:
+        raise ValueError("ci 必须在 (0, 1) 之间。")
+    if interval not in ("basic", "percentile"):
+        raise ValueError(f"未知的区间类型: {interval}")
+
+    state = _prepare(df, method, sigma, bins, base)
+    index = state["index"]
+    n = len(index)
+    m = state["codes" if method == "information" else "X"].shape[1]
+    rng = np.random.default_rng(seed)
+    weights = rng.multinomial(m, np.full(m, 1.0 / m), size=n_boot).astype(np.int32)
+    quantiles = ((1.0 - ci) / 2.0, (1.0 + ci) / 2.0)
+    blocks = _blocks(n, _block_size(state, batch_size))
+    names = ("estimate", "mean", "std", "lower", "upper")
+    out = {name: np.full((n, n), np.nan) for name in names}
+
+    pool = _Pool(state, n_jobs)
+    try:
+        if pool.executor is None:
+            results = (_bootstrap_task(b, weights, batch_size, quantiles, interval) for b in blocks)
+        else:
+            futures = [pool.executor.submit(_bootstrap_task, b, weights, batch_size, quantiles, interval)
+                       for b in blocks]
+            results = (f.result() for f in futures)
+
+        for finished, ((r0, r1, c0, c1), *values) in enumerate(results, start=1):
+            with span("significance.bootstrap_block"):
+                for name, value in zip(names, values):
+                    out[name][r0:r1, c0:c1] = value
+                    out[name][c0:c1, r0:r1] = value.T
+            # 返回的 DataFrame 直接包装结果数组，后续块完成时会随之更新
+            result = {name: pd.DataFrame(value, index=index, columns=index, copy=False) for name, value in out.items()}
+            result["progress"] = finished / len(blocks)
+            yield result
+    finally:
+        pool.close()
+
+
+@span("significance.bootstrap")
+def bootstrap_ci(df: pd.DataFrame, method: str = "information", n_boot: int = 200, ci: float = 0.95,
+                 callback=None, **kwargs) -> dict:
+    """执行 bootstrap 并返回最终的均值、标准差与置信区间，参数见 :func:`iter_bootstrap`。
+
+    Args:
+        df: 行=随机变量、列=样本的 DataFrame。
+        method: ``"information"`` 或 ``"euclidean"``。
+        n_boot: 重采样次数。
+        ci: 置信水平。
+        callback: 每完成一块时以当前结果调用，返回 True 时中止。
+        **kwargs: 传给 :func:`iter_bootstrap`。
+
+    Returns:
+        dict: ``{"estimate", "mean", "std", "lower", "upper", "progress"}``。
+    """
+    result = None
+    for result in iter_bootstrap(df, method, n_boot, ci, **kwargs):
+        if callback is not None and callback(result):
+            break
+    return result
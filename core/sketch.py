@@ -0,0 +1,217 @@
+"""欧氏距离的随机投影草图（sketch）。
+
+样本列极多时，精确的欧氏距离代价为 O(n²·m)。稀疏 Johnson–Lindenstrauss 变换把每个变量
+投影到 k 维（k ≪ m），之后在 k 维上计算距离，总代价降为 O(n·m·k·density + n²·k)。
+
+投影矩阵 R（m × k）的元素以概率 density/2 取 ±sqrt(1/(density·k))，其余为 0（Li 等人的
+very sparse random projection，默认 density = 1/sqrt(m)），E[‖xR‖²] = ‖x‖²。投影按样本列分块
+累加 ``Y += X[:, c0:c1] @ R[c0:c1]``，数据可以由 :func:`core.loader.iter_column_chunks` 从文件
+流式读入，不需要整表驻留内存。
+
+误差有两种报告：
+
+- 理论界：n 个点的所有两两平方距离以不低于 1 - delta 的概率满足
+  (1 - eps)·d² ≤ d̂² ≤ (1 + eps)·d²，eps 由 k(eps²/2 - eps³/3) = 4 ln n + 2 ln(1/delta) 解出
+  （对稀疏投影为渐近成立）；
+- 实测：流式累加时顺带计算若干随机变量对的精确距离，与投影后的距离比较。
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from core.trace import span
+
+
+def jl_error_bound(n_points: int, n_components: int, delta: float = 0.05) -> float:
+    """投影到 n_components 维后，n_points 个点两两平方距离的相对误差上界 eps。
+
+    Returns:
+        float: eps ∈ (0, 1)；维数不足以给出有意义的界时返回 inf。
+
+    Raises:
+        ValueError: 参数不合法。
+    """
+    if n_points < 1 or n_components < 1:
+        raise ValueError("n_points 与 n_components 必须为正整数。")
+    if not 0 < delta < 1:
+        raise ValueError("delta 必须在 (0, 1) 内。")
+    target = (4 * math.log(max(n_points, 2)) + 2 * math.log(1 / delta)) / n_components
+    # g(eps) = eps²/2 - eps³/3 在 (0, 1] 上单调递增，最大值 1/6
+    if target >= 1 / 6:
+        return math.inf
+    lo, hi = 0.0, 1.0
+    for _ in range(60):
+        mid = (lo + hi) / 2
+        if mid * mid / 2 - mid ** 3 / 3 < target:
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+
+def min_components(n_points: int, eps: float, delta: float = 0.05) -> int:
+    """使 :func:`jl_error_bound` 不超过 eps 所需的最小投影维数"""
+    if not 0 < eps < 1:
+        raise ValueError("eps 必须在 (0, 1) 内。")
+    if not 0 < delta < 1:
+        raise ValueError("delta 必须在 (0, 1) 内。")
+    return math.ceil((4 * math.log(max(n_points, 2)) + 2 * math.log(1 / delta)) / (eps ** 2 / 2 - eps ** 3 / 3))
+
+
+def sparse_projection(n_features: int, n_components: int, density: float = None, seed: int = 0):
+    """生成 n_features × n_components 的稀疏随机投影矩阵（CSR），非零元约 n_features·n_components·density 个"""
+    from scipy import sparse
+
+    if density is None:
+        density = 1 / math.sqrt(n_features)
+    if not 0 < density <= 1:
+        raise ValueError("density 必须在 (0, 1] 内。")
+    rng = np.random.default_rng(seed)
+    size = n_features * n_components
+    nnz = rng.binomial(size, density)
+    flat = rng.choice(size, size=nnz, replace=False)
+    values = np.where(rng.random(nnz) < 0.5, -1.0, 1.0) * math.sqrt(1 / (density * n_components))
+    return sparse.csr_matrix((values, (flat // n_components, flat % n_components)),
+                             shape=(n_features, n_components))
+
+
+class SketchResult:
+    """随机投影的结果与误差报告。
+
+    Attributes:
+        embedding: n × k 的投影坐标，索引为变量名；其上的欧氏距离近似原始距离。
+        n_features: 原始样本列数 m。
+        n_components: 投影维数 k。
+        density: 投影矩阵的非零比例。
+        eps: 理论上两两平方距离的相对误差上界（概率不低于 1 - delta），不可用时为 inf。
+        delta: 理论界的失败概率。
+        check: 随机变量对上的实测距离相对误差 ``{"pairs", "mean", "p95", "max"}``。
+    """
+    def __init__(self, embedding, n_features, n_components, density, eps, delta, check):
+        self.embedding = embedding
+        self.n_features = n_features
+        self.n_components = n_components
+        self.density = density
+        self.eps = eps
+        self.delta = delta
+        self.check = check
+
+    @property
+    def distance_bounds(self) -> tuple:
+        """理论界换算到距离上的比例区间 (sqrt(1 - eps), sqrt(1 + eps))"""
+        if not math.isfinite(self.eps):
+            return (0.0, math.inf)
+        return (math.sqrt(max(0.0, 1 - self.eps)), math.sqrt(1 + self.eps))
+
+    def describe(self) -> str:
+        """中文的误差说明，用于界面提示与批处理日志"""
+        text = f"随机投影：{self.n_features} → {self.n_components} 维"
+        if math.isfinite(self.eps):
+            lo, hi = self.distance_bounds
+            text += f"，距离以 {1 - self.delta:.0%} 概率落在精确值的 [{lo:.3f}, {hi:.3f}] 倍内"
+        else:
+            text += "，维数不足以给出理论误差界"
+        if self.check["pairs"]:
+            text += f"；实测 {self.check['pairs']} 对的相对误差 p95 {self.check['p95']:.2%}、最大 {self.check['max']:.2%}"
+        return text
+
+    def __repr__(self) -> str:
+        return f"SketchResult(n={len(self.embedding)}, m={self.n_features}, k={self.n_components}, eps={self.eps:.3g})"
+
+
+def _check_pairs(n: int, n_pairs: int, rng) -> np.ndarray:
+    """随机抽取 n_pairs 个不同的变量对 (i, j)，i ≠ j"""
+    if n < 2 or n_pairs <= 0:
+        return np.empty((0, 2), dtype=np.intp)
+    i = rng.integers(0, n, size=n_pairs)
+    j = (i + rng.integers(1, n, size=n_pairs)) % n
+    return np.stack([i, j], axis=1)
+
+
+@span("sketch.project")
+def sketch_chunks(chunks, n_features: int, n_components: int, density: float = None, seed: int = 0,
+                  delta: float = 0.05, n_check_pairs: int = 1000) -> SketchResult:
+    """按样本列分块累加随机投影。
+
+    Args:
+        chunks: ``(c0, block)`` 的迭代器，block 为包含全部变量（行）、第 c0 列起若干样本列的
+            DataFrame，例如 :func:`core.loader.iter_column_chunks` 的输出。
+        n_features: 样本列总数 m。
+        n_components: 投影维数 k。
+        density: 投影矩阵的非零比例，默认 1/sqrt(m)。
+        seed: 随机种子。
+        delta: 理论误差界的失败概率。
+        n_check_pairs: 用于实测误差的随机变量对数，0 表示不实测。
+
+    Returns:
+        SketchResult: 投影坐标与误差报告。
+
+    Raises:
+        TypeError: n_components 不是整数。
+        ValueError: 参数不合法、分块为空、变量不一致或含 NaN。
+    """
+    if not isinstance(n_components, int):
+        raise TypeError("n_components 必须为整数。")
+    if n_components < 1 or n_features < 1:
+        raise ValueError("n_components 与样本列数必须为正。")
+
+    projection = sparse_projection(n_features, n_components, density, seed)
+    density = projection.nnz / max(1, n_features * n_components)
+    rng = np.random.default_rng([seed, 1])
+    embedding = index = pairs = exact = None
+    seen = 0
+    for c0, block in chunks:
+        if index is None:
+            index = block.index
+            embedding = np.zeros((len(index), n_components))
+            pairs = _check_pairs(len(index), n_check_pairs, rng)
+            exact = np.zeros(len(pairs))
+        elif not block.index.equals(index):
+            raise ValueError("各列块的变量不一致。")
+        values = block.to_numpy(dtype=np.float64)
+        if np.isnan(values).any():
+            raise ValueError("数据含 NaN，无法计算欧氏距离。")
+        c1 = c0 + values.shape[1]
+        if c1 > n_features:
+            raise ValueError("列块超出了 n_features。")
+        # 稀疏 × 稠密，代价与非零元成正比
+        embedding += (projection[c0:c1].T @ values.T).T
+        if len(pairs):
+            exact += ((values[pairs[:, 0]] - values[pairs[:, 1]]) ** 2).sum(axis=1)
+        seen += values.shape[1]
+    if index is None:
+        raise ValueError("没有读到任何数据。")
+    if seen != n_features:
+        raise ValueError(f"读到的样本列数 {seen} 与 n_features {n_features} 不一致。")
+
+    check = {"pairs": 0, "mean": np.nan, "p95": np.nan, "max": np.nan}
+    exact = np.sqrt(exact)
+    keep = exact > 0
+    if keep.any():
+        approx = np.linalg.norm(embedding[pairs[keep, 0]] - embedding[pairs[keep, 1]], axis=1)
+        error = np.abs(approx / exact[keep] - 1)
+        check = {"pairs": int(keep.sum()), "mean": float(error.mean()),
+                 "p95": float(np.quantile(error, 0.95)), "max": float(error.max())}
+
+    frame = pd.DataFrame(embedding, index=index, columns=[f"rp{i}" for i in range(n_components)])
+    return SketchResult(frame, n_features, n_components, density, jl_error_bound(len(index), n_components, delta),
+                        delta, check)
+
+
+def sketch_frame(df: pd.DataFrame, n_components: int, columns_per_chunk: int = 4096, **kwargs) -> SketchResult:
+    """对内存中的 DataFrame（行=变量、列=样本）按列分块做随机投影，参数见 :func:`sketch_chunks`"""
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError("df 必须是 pandas.DataFrame。")
+    if df.empty:
+        raise ValueError("DataFrame 为空。")
+    chunks = ((c0, df.iloc[:, c0:c0 + columns_per_chunk]) for c0 in range(0, df.shape[1], columns_per_chunk))
+    return sketch_chunks(chunks, df.shape[1], n_components, **kwargs)
+
+
+def sketch_file(path: str, n_components: int, columns_per_chunk: int = 4096, **kwargs) -> SketchResult:
+    """从 CSV/TXT 文件按列分块流式读取并做随机投影，整表不需要驻留内存，参数见 :func:`sketch_chunks`"""
+    from core.loader import iter_column_chunks, sample_columns
+
+    n_features = len(sample_columns(path))
+    return sketch_chunks(iter_column_chunks(path, columns_per_chunk), n_features, n_components, **kwargs)
@@ -0,0 +1,221 @@
+"""信息距离在 (sigma, bins, return_zscore) 网格上的参数扫描。
+
+逐个设置调用 ``compute_distance_matrix`` 时，每次都要重新计算行统计量、构造
+(行, bins, 样本) 的权重张量并计算完整的 VI 矩阵。扫描把可以共享的部分提出来：
+
+- 行均值、标准差只算一次，每个 bins 的中心只算一次；
+- 高斯权重对中心距离单调，离散化结果就是最近的中心（权重全部下溢为 0 时取第 0 个），
+  因此每个设置只需按相同算式比较两个候选中心，O(n·m) 而不是 O(n·m·bins)；
+- ``return_zscore`` 只改变离散值的数值、不改变划分，VI 与它无关；sigma 只在权重下溢时才影响结果。
+  编码完全相同的设置共享同一个 VI 矩阵，只计算一次；
+- 不同的 VI 矩阵可交给进程池并行计算。
+
+每个设置给出汇总指标：经典 MDS 嵌入的 Kruskal stress、与所有设置平均矩阵的 Spearman 秩相关，
+以及 k 近邻与平均矩阵的重合率（后两者衡量结果对参数的稳定性）。
+"""
+import hashlib
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from core.trace import span
+from core.planner import DISCRETIZE_CHUNK_BYTES
+from core.distance import information_distance, _row_moments
+from core.runtime import get_runtime, process_pool, thread_limited
+
+
+def _row_stats(data: np.ndarray) -> tuple:
+    """行均值、（避免除 0 的）标准差与零方差行掩码，与 gaussian_discretization 一致（缺失值不参与）"""
+    mu, std = _row_moments(data)
+    zero_std = std < 1e-12
+    std_safe = std.copy()
+    std_safe[zero_std] = 1.0
+    return mu, std_safe, zero_std
+
+
+def _nearest_centers(data: np.ndarray, mu: np.ndarray, std_safe: np.ndarray, zero_std: np.ndarray,
+                     sigma: float, bins: int) -> np.ndarray:
+    """与 gaussian_discretization 相同的离散等级下标（含并列与下溢时的取法），缺失为 -1，O(n·m)。
+
+    先在 z 空间定位相邻的两个候选中心，再用与原函数相同的算式计算两者的权重并比较，
+    因此 argmax 的结果（包括权重相等时取较小下标、全部下溢为 0 时取 0）逐元素一致。
+    """
+    z_centers = np.linspace(-3, 3, bins)
+    step = z_centers[1] - z_centers[0]
+    n_rows, n_cols = data.shape
+    rows_per_chunk = max(1, DISCRETIZE_CHUNK_BYTES // (4 * n_cols * 8))
+    idx = np.empty(data.shape, dtype=np.int16)
+    for r0 in range(0, n_rows, rows_per_chunk):
+        r1 = min(r0 + rows_per_chunk, n_rows)
+        x = data[r0:r1]
+        m, s = mu[r0:r1, None], std_safe[r0:r1, None]
+        with np.errstate(invalid="ignore"):
+            t = np.floor(((x - m) / s + 3.0) / step)
+        lo = np.clip(np.nan_to_num(t), 0, bins - 1).astype(np.intp)
+        hi = np.minimum(lo + 1, bins - 1)
+        w_lo = np.exp(-0.5 * ((x - (m + s * z_centers[lo])) / sigma) ** 2)
+        w_hi = np.exp(-0.5 * ((x - (m + s * z_centers[hi])) / sigma) ** 2)
+        block = np.where(w_hi > w_lo, hi, lo)
+        # argmax 在全零时返回 0
+        block[(w_lo == 0) & (w_hi == 0)] = 0
+        idx[r0:r1] = block
+    # 零方差行在原函数中整行取同一个值
+    idx[zero_std] = 0
+    # 缺失值在原函数中保持 NaN，编码为 -1
+    idx[np.isnan(data)] = -1
+    return idx
+
+
+def _classical_stress(distance: np.ndarray, n_components: int) -> float:
+    """经典 MDS 嵌入到 n_components 维后的 Kruskal stress-1"""
+    from scipy.linalg import eigh
+    from sklearn.metrics import pairwise_distances
+
+    n = distance.shape[0]
+    if n <= n_components or np.isnan(distance).any():
+        return np.nan
+    d2 = distance ** 2
+    # 双中心化 B = -1/2 · J D² J
+    b = -0.5 * (d2 - d2.mean(axis=0)[None, :] - d2.mean(axis=1)[:, None] + d2.mean())
+    values, vectors = eigh(b, subset_by_index=[n - n_components, n - 1])
+    coords = vectors * np.sqrt(np.maximum(values, 0.0))
+    fitted = pairwise_distances(coords)
+    upper = np.triu_indices(n, 1)
+    denominator = (distance[upper] ** 2).sum()
+    if denominator == 0:
+        return 0.0
+    return float(np.sqrt(((distance[upper] - fitted[upper]) ** 2).sum() / denominator))
+
+
+def _sweep_task(idx: np.ndarray, base: float, ignore_na: bool, n_components: int) -> tuple:
+    """计算一组离散编码的 VI 矩阵与嵌入 stress（可在子进程中执行）"""
+    frame = pd.DataFrame(idx)
+    if (idx < 0).any():
+        # 整数编码无法表示缺失，换成 NaN 交给 information_distance 的缺失处理
+        frame = pd.DataFrame(np.where(idx < 0, np.nan, idx))
+    vi = information_distance(frame, base=base, ignore_na=ignore_na).to_numpy()
+    return vi, _classical_stress(vi, n_components) if n_components else np.nan
+
+
+def _knn(distance: np.ndarray, k: int) -> np.ndarray:
+    """每行最近的 k 个邻居（不含自身），NaN 视为无穷远"""
+    values = np.where(np.isnan(distance), np.inf, distance)
+    np.fill_diagonal(values, np.inf)
+    return np.argpartition(values, k - 1, axis=1)[:, :k]
+
+
+@span("sweep.information")
+@thread_limited
+def sweep_information(df: pd.DataFrame, sigmas=(1.0,), bins=(13,), return_zscore=(True,), base: float = 2.0,
+                      ignore_na: bool = True, n_components: int = 2, k: int = 10,
+                      return_matrices: bool = False, n_jobs=1) -> dict:
+    """在 sigma × bins × return_zscore 的网格上计算信息距离并汇总。
+
+    Args:
+        df: 行=变量、列=样本的数值型 DataFrame；首列为字符串时作为行索引。
+        sigmas: sigma 取值，需为正。
+        bins: bins 取值，需为 ≥ 2 的整数。
+        return_zscore: return_zscore 取值（不影响 VI，只为与调用方的参数对应）。
+        base: 熵的对数底。
+        ignore_na: 是否只在共同观测上计算 VI。
+        n_components: 计算 stress 的嵌入维数，0 表示不计算 stress。
+        k: 近邻重合率使用的近邻数。
+        return_matrices: 是否返回各设置的 VI 矩阵。
+        n_jobs: 并行计算 VI 矩阵的进程数，None 表示运行配置的进程数（见 :mod:`core.runtime`）。
+
+    Returns:
+        dict:
+            - ``summary``：以 (sigma, bins, return_zscore) 为索引的 DataFrame，列为
+              ``group``（编码相同、共享同一 VI 矩阵的设置编号）、``mean_vi``、``stress``、
+              ``spearman``（与所有设置平均矩阵的 Spearman 秩相关）、``knn_overlap``（k 近邻与
+              平均矩阵 k 近邻的平均重合比例）；
+            - ``matrices``：return_matrices 为 True 时为 设置 → VI 矩阵 DataFrame，
+              同组的设置共享同一个对象；否则为 None。
+
+    Raises:
+        TypeError: df 不是 DataFrame，或 bins 中有非整数。
+        ValueError: df 为空/非数值，网格为空，或 sigma、bins、k 取值不合法。
+    """
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError("df 必须是 pandas.DataFrame。")
+    if df.empty:
+        raise ValueError("DataFrame 为空。")
+    # 与 compute_distance_matrix 一致：首列为字符串时作为行索引
+    first_col = df.iloc[:, 0]
+    if first_col.dtype == 'object' or isinstance(first_col.iloc[0], str):
+        df = df.set_index(df.columns[0])
+    if not all(pd.api.types.is_numeric_dtype(t) for t in df.dtypes):
+        raise ValueError("数据含非数值列。")
+
+    sigmas, bins, return_zscore = list(sigmas), list(bins), [bool(z) for z in return_zscore]
+    if not sigmas or not bins or not return_zscore:
+        raise ValueError("参数网格不能为空。")
+    if any(not isinstance(b, (int, np.integer)) for b in bins):
+        raise TypeError("bins 必须为整数。")
+    if any(s <= 0 for s in sigmas):
+        raise ValueError("sigma 必须为正。")
+    if any(b < 2 for b in bins):
+        raise ValueError("bins 必须 ≥ 2。")
+    if not isinstance(k, int) or k < 1:
+        raise ValueError("k 必须为正整数。")
+
+    data = df.to_numpy(dtype=np.float64)
+    n = data.shape[0]
+    settings = list(itertools.product(sigmas, [int(b) for b in bins], return_zscore))
+
+    # 编码只依赖 (sigma, bins)；按内容去重，相同编码的设置共享一次 VI 计算
+    with span("sweep.discretize", settings=len(settings)):
+        mu, std_safe, zero_std = _row_stats(data)
+        groups, codes, setting_group = {}, [], {}
+        for sigma, b in dict.fromkeys((s, b) for s, b, _ in settings):
+            idx = _nearest_centers(data, mu, std_safe, zero_std, sigma, b)
+            key = hashlib.sha1(idx.tobytes()).hexdigest()
+            if key not in groups:
+                groups[key] = len(codes)
+                codes.append(idx)
+            setting_group[(sigma, b)] = groups[key]
+
+    with span("sweep.pairs", groups=len(codes), n=n):
+        tasks = [(idx, base, ignore_na, n_components) for idx in codes]
+        n_jobs = n_jobs or get_runtime().n_workers
+        if n_jobs > 1 and len(tasks) > 1:
+            with process_pool(min(n_jobs, len(tasks))) as executor:
+                results = list(executor.map(_sweep_task, *zip(*tasks)))
+        else:
+            results = [_sweep_task(*task) for task in tasks]
+    del codes
+
+    # 以各设置（而非各组）的平均矩阵作为稳定性的参照
+    with span("sweep.summary"):
+        weights = np.bincount([setting_group[(s, b)] for s, b, _ in settings], minlength=len(results))
+        consensus = sum(w * vi for w, (vi, _) in zip(weights, results)) / weights.sum()
+        upper = np.triu_indices(n, 1)
+        kk = min(k, n - 1)
+        consensus_knn = _knn(consensus, kk) if kk > 0 else None
+        stats = []
+        for vi, stress in results:
+            condensed = vi[upper]
+            valid = ~(np.isnan(condensed) | np.isnan(consensus[upper]))
+            spearman = np.nan
+            if valid.sum() > 1:
+                from scipy.stats import spearmanr
+                spearman = float(spearmanr(condensed[valid], consensus[upper][valid]).statistic)
+            overlap = np.nan
+            if consensus_knn is not None:
+                hits = [np.intersect1d(a, b).size for a, b in zip(_knn(vi, kk), consensus_knn)]
+                overlap = float(np.mean(hits)) / kk
+            stats.append((float(np.nanmean(condensed)) if condensed.size else np.nan, stress, spearman, overlap))
+
+    rows = []
+    for sigma, b, z in settings:
+        group = setting_group[(sigma, b)]
+        rows.append((group,) + stats[group])
+    index = pd.MultiIndex.from_tuples(settings, names=["sigma", "bins", "return_zscore"])
+    summary = pd.DataFrame(rows, index=index, columns=["group", "mean_vi", "stress", "spearman", "knn_overlap"])
+
+    matrices = None
+    if return_matrices:
+        frames = [pd.DataFrame(vi, index=df.index, columns=df.index, copy=False) for vi, _ in results]
+        matrices = {setting: frames[setting_group[setting[:2]]] for setting in settings}
+    return {"summary": summary, "matrices": matrices}
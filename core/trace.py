@@ -0,0 +1,234 @@
+"""轻量的嵌套计时/内存跨度（span），用于定位流水线中各阶段的耗时。
+
+用法::
+
+    from core.trace import span
+
+    with span("distance.vi.pairs", n=100):
+        ...
+
+    @span("reduction.mds")
+    def reduce_dimension(...):
+        ...
+
+跨度按线程维护嵌套栈，结束时记录到全局 ``TRACER``。开启内存跟踪后（``set_memory_tracking(True)``
+或环境变量 ``CORR_TRACE_MEMORY=1``），每个跨度额外记录 tracemalloc 统计的峰值增量；tracemalloc
+是进程级的，多线程并发时峰值会包含其他线程的分配，仅作参考。记录可导出为 Chrome trace-event JSON，
+在 chrome://tracing 或 https://ui.perfetto.dev 中查看。
+"""
+import os
+import json
+import time
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import ContextDecorator
+
+
+class _SpanRecord:
+    """一个已结束的跨度"""
+    __slots__ = ("name", "start", "duration", "depth", "pid", "tid", "memory", "args")
+
+    def __init__(self, name, start, duration, depth, pid, tid, memory, args):
+        self.name = name
+        self.start = start
+        self.duration = duration
+        self.depth = depth
+        self.pid = pid
+        self.tid = tid
+        self.memory = memory
+        self.args = args
+
+    def to_event(self) -> dict:
+        """转换为 Chrome trace-event 的完整事件（ph = "X"，时间单位微秒）"""
+        args = dict(self.args)
+        if self.memory is not None:
+            args["peak_mb"] = round(self.memory / 2 ** 20, 3)
+        return {
+            "name": self.name,
+            "cat": self.name.split(".", 1)[0],
+            "ph": "X",
+            "ts": self.start * 1e6,
+            "dur": self.duration * 1e6,
+            "pid": self.pid,
+            "tid": self.tid,
+            "args": args,
+        }
+
+
+class Tracer:
+    """收集跨度记录，最多保留 max_records 条（超出时丢弃最早的）。
+
+    Args:
+        max_records: 最多保留的记录数。
+        memory: 是否记录 tracemalloc 峰值内存。
+    """
+    def __init__(self, max_records: int = 100_000, memory: bool = False):
+        self.enabled = True
+        self.memory = memory
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._owns_tracemalloc = False
+        self._memory_depth = 0
+        # 每新增一条记录自增，界面据此判断是否需要刷新
+        self.version = 0
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    # ------------------------------------------------------------ 内存跟踪
+    def _memory_enter(self) -> tuple:
+        """开始一段内存统计，返回 (起始占用, 进入前的峰值)"""
+        with self._lock:
+            if self._memory_depth == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_tracemalloc = True
+            self._memory_depth += 1
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        return current, peak
+
+    def _memory_exit(self, entry: tuple, child_peak: int) -> tuple:
+        """结束内存统计，返回 (本跨度的峰值增量, 本跨度期间的绝对峰值)"""
+        start_current, outer_peak = entry
+        with self._lock:
+            _, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, child_peak)
+            self._memory_depth -= 1
+            if self._memory_depth == 0 and self._owns_tracemalloc:
+                tracemalloc.stop()
+                self._owns_tracemalloc = False
+        return max(0, peak - start_current), max(peak, outer_peak)
+
+    # ------------------------------------------------------------ 记录
+    def _push(self, name: str, args: dict) -> dict:
+        frame = {"name": name, "args": args, "start": time.perf_counter(), "memory": None, "child_peak": 0}
+        if self.memory:
+            frame["memory"] = self._memory_enter()
+        self._stack().append(frame)
+        return frame
+
+    def _pop(self, frame: dict) -> None:
+        stack = self._stack()
+        end = time.perf_counter()
+        # 异常穿透时栈可能不平衡，弹出到当前帧为止
+        while stack and stack.pop() is not frame:
+            pass
+
+        memory = None
+        if frame["memory"] is not None:
+            memory, absolute_peak = self._memory_exit(frame["memory"], frame["child_peak"])
+            # reset_peak 会清掉外层的峰值，把本段峰值交给外层跨度
+            if stack:
+                stack[-1]["child_peak"] = max(stack[-1]["child_peak"], absolute_peak)
+
+        record = _SpanRecord(frame["name"], frame["start"], end - frame["start"], len(stack),
+                             os.getpid(), threading.get_ident(), memory, frame["args"])
+        with self._lock:
+            self._records.append(record)
+            self.version += 1
+
+    def records(self) -> list:
+        """返回当前所有记录的快照（按结束时间排序）"""
+        with self._lock:
+            return list(self._records)
+
+    def clear(self) -> None:
+        """清空记录"""
+        with self._lock:
+            self._records.clear()
+            self.version += 1
+
+    def summary(self) -> dict:
+        """按跨度名汇总。
+
+        Returns:
+            dict: 跨度名 → ``{"count", "total", "last", "max", "peak_mb", "depth"}``，时间单位秒，
+            按首次开始的时间排列（外层跨度排在其内层之前）。
+        """
+        stats = {}
+        for r in self.records():
+            s = stats.get(r.name)
+            if s is None:
+                s = stats[r.name] = {"count": 0, "total": 0.0, "last": 0.0, "max": 0.0,
+                                     "peak_mb": None, "depth": r.depth, "first": r.start}
+            s["first"] = min(s["first"], r.start)
+            s["count"] += 1
+            s["total"] += r.duration
+            s["last"] = r.duration
+            s["max"] = max(s["max"], r.duration)
+            s["depth"] = min(s["depth"], r.depth)
+            if r.memory is not None:
+                s["peak_mb"] = max(s["peak_mb"] or 0.0, r.memory / 2 ** 20)
+        ordered = sorted(stats.items(), key=lambda item: item[1].pop("first"))
+        return dict(ordered)
+
+    def events(self) -> list:
+        """返回 Chrome trace-event 字典列表，可跨进程合并后再导出"""
+        return [r.to_event() for r in self.records()]
+
+    def export_chrome(self, path: str, extra_events: list = None) -> bool:
+        """导出为 Chrome trace-event JSON。
+
+        Args:
+            path: 输出路径。
+            extra_events: 额外合并的事件（例如子进程返回的 ``events()``）。
+
+        Returns:
+            bool: 成功返回 True。
+
+        Raises:
+            ValueError: 路径为空。
+        """
+        if not isinstance(path, str) or not path.strip():
+            raise ValueError("保存路径不能为空")
+        events = self.events() + list(extra_events or [])
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        return True
+
+
+TRACER = Tracer(memory=os.environ.get("CORR_TRACE_MEMORY", "") not in ("", "0"))
+
+
+class span(ContextDecorator):
+    """计时跨度，可作为上下文管理器或装饰器使用。
+
+    Args:
+        name: 跨度名，建议用 ``模块.阶段`` 的点分形式，首段作为 Chrome trace 的类别。
+        tracer: 记录到的 Tracer，默认全局 ``TRACER``。
+        **args: 附加到记录上的参数（如数据规模），需可 JSON 序列化。
+    """
+    def __init__(self, name: str, tracer: Tracer = None, **args):
+        self.name = name
+        self.tracer = tracer or TRACER
+        self.args = args
+        self._frames = threading.local()
+
+    def __enter__(self):
+        frames = getattr(self._frames, "stack", None)
+        if frames is None:
+            frames = self._frames.stack = []
+        # 同一个 span 对象作为装饰器时可能递归或跨线程使用，帧按线程压栈；未启用时压入 None 占位
+        frames.append(self.tracer._push(self.name, self.args) if self.tracer.enabled else None)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        frame = self._frames.stack.pop()
+        if frame is not None:
+            self.tracer._pop(frame)
+        return False
+
+
+def set_memory_tracking(enabled: bool) -> None:
+    """开启或关闭全局 Tracer 的内存跟踪"""
+    TRACER.memory = bool(enabled)
+
+
+def export_chrome_trace(path: str, extra_events: list = None) -> bool:
+    """把全局 Tracer 的记录导出为 Chrome trace-event JSON，见 :meth:`Tracer.export_chrome`"""
+    return TRACER.export_chrome(path, extra_events)
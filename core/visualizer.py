@@ -0,0 +1,313 @@
+import math
+
+import numpy as np
+
+from core.trace import span
+
+
+def pool_block(block: np.ndarray, fy: int, fx: int, how: str = "mean"):
+    """把二维数组按 fy × fx 的窗口做池化，边缘不足一个窗口的部分单独成块。
+
+    Args:
+        block: 二维数组（可以是 memmap 切片）。
+        fy: 行方向池化因子。
+        fx: 列方向池化因子。
+        how: ``"mean"`` 或 ``"max"``，NaN 不参与统计。
+
+    Returns:
+        tuple: ``(values, counts)``，values 为池化结果（全 NaN 的窗口为 NaN），
+        counts 为每个窗口内有效值的个数。
+    """
+    block = np.asarray(block, dtype=np.float64)
+    rows = np.arange(0, block.shape[0], fy)
+    cols = np.arange(0, block.shape[1], fx)
+    finite = np.isfinite(block)
+    counts = np.add.reduceat(np.add.reduceat(finite, rows, axis=0, dtype=np.int64), cols, axis=1)
+
+    if how == "mean":
+        sums = np.where(finite, block, 0.0)
+        sums = np.add.reduceat(np.add.reduceat(sums, rows, axis=0), cols, axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = sums / counts
+    elif how == "max":
+        filled = np.where(finite, block, -np.inf)
+        values = np.maximum.reduceat(np.maximum.reduceat(filled, rows, axis=0), cols, axis=1)
+        values[counts == 0] = np.nan
+    else:
+        raise ValueError(f"未知的池化方式: {how}")
+    return values, counts
+
+
+class MatrixPyramid:
+    """大矩阵的多分辨率（mip）金字塔，用于热图的缩放与平移。
+
+    第 k 层的一个像素对应原矩阵 2^k × 2^k 的窗口。边长不超过 ``max_level_side`` 的层
+    在 ``build`` 中一次流式扫描原矩阵得到并常驻内存；更精细的层不做缓存，
+    需要时直接从原矩阵读取可见区域（原矩阵可以是 memmap，只有被访问的页才会读入）。
+
+    Attributes:
+        base: 原矩阵（二维 ndarray 或 memmap）。
+        how: 池化方式，``"mean"`` 或 ``"max"``。
+        levels: 已构建的层，层号 → (values, counts)。
+    """
+
+    def __init__(self, matrix, how: str = "mean", max_level_side: int = 4096, band_bytes: int = 64 * 1024 * 1024):
+        if how not in ("mean", "max"):
+            raise ValueError(f"未知的池化方式: {how}")
+        self.base = matrix
+        self.how = how
+        self.shape = tuple(matrix.shape)
+        self.band_bytes = band_bytes
+        self.levels = {}
+
+        longest = max(self.shape)
+        # 常驻的最精细层与最粗层
+        self.k_min = max(1, math.ceil(math.log2(max(1.0, longest / max_level_side))))
+        self.k_max = max(self.k_min, math.ceil(math.log2(max(1.0, longest / 256))))
+
+    @property
+    def ready(self) -> bool:
+        """常驻层是否已经构建完成"""
+        return self.k_min in self.levels
+
+    @span("visualizer.pyramid.build")
+    def build(self) -> None:
+        """流式扫描原矩阵，构建 k_min … k_max 各层。
+
+        按行带读取，每个行带的高度是 2^k_min 的整数倍，内存占用与矩阵规模无关。
+        """
+        f = 2 ** self.k_min
+        n_rows, n_cols = self.shape
+        rows_per_band = max(1, self.band_bytes // max(1, n_cols * 8 * f)) * f
+
+        parts, counts = [], []
+        for r0 in range(0, n_rows, rows_per_band):
+            v, c = pool_block(self.base[r0:r0 + rows_per_band], f, f, self.how)
+            parts.append(v.astype(np.float32))
+            counts.append(c.astype(np.int64))
+        level = (np.concatenate(parts, axis=0), np.concatenate(counts, axis=0))
+        levels = {self.k_min: level}
+
+        # 更粗的层由上一层按 2×2 合并，mean 以计数加权，结果与直接从原矩阵池化一致
+        for k in range(self.k_min + 1, self.k_max + 1):
+            values, cnt = level
+            rows = np.arange(0, values.shape[0], 2)
+            cols = np.arange(0, values.shape[1], 2)
+            new_cnt = np.add.reduceat(np.add.reduceat(cnt, rows, axis=0), cols, axis=1)
+            if self.how == "mean":
+                sums = np.where(cnt > 0, values.astype(np.float64) * cnt, 0.0)
+                sums = np.add.reduceat(np.add.reduceat(sums, rows, axis=0), cols, axis=1)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    new_values = sums / new_cnt
+            else:
+                filled = np.where(cnt > 0, values, -np.inf)
+                new_values = np.maximum.reduceat(np.maximum.reduceat(filled, rows, axis=0), cols, axis=1)
+                new_values[new_cnt == 0] = np.nan
+            level = (new_values.astype(np.float32), new_cnt)
+            levels[k] = level
+
+        self.levels = levels
+
+    def preview(self, max_side: int = 512) -> tuple:
+        """按步长抽样得到的快速预览，不需要扫描整个矩阵。
+
+        Returns:
+            tuple: ``(image, extent)``，extent 为 ``(c0, c1, r1, r0)``（imshow 约定）。
+        """
+        step = max(1, math.ceil(max(self.shape) / max_side))
+        image = np.asarray(self.base[::step, ::step], dtype=np.float32)
+        return image, (0, self.shape[1], self.shape[0], 0)
+
+    def region(self, r0: float, r1: float, c0: float, c1: float, max_side: int = 512) -> tuple:
+        """取可见区域 [r0, r1) × [c0, c1) 的图像，分辨率不超过 max_side。
+
+        优先使用常驻层；视野足够小时直接读取原矩阵的对应区域（全分辨率或现场池化）；
+        常驻层尚未构建时以步长抽样代替。
+
+        Returns:
+            tuple: ``(image, extent)``，extent 为 ``(c0, c1, r1, r0)``（imshow 约定）。
+        """
+        n_rows, n_cols = self.shape
+        r0 = int(min(max(0, math.floor(r0)), n_rows - 1))
+        c0 = int(min(max(0, math.floor(c0)), n_cols - 1))
+        r1 = int(min(n_rows, max(r0 + 1, math.ceil(r1))))
+        c1 = int(min(n_cols, max(c0 + 1, math.ceil(c1))))
+
+        span = max(r1 - r0, c1 - c0)
+        k = max(0, math.ceil(math.log2(max(1.0, span / max_side))))
+
+        if k >= self.k_min and self.ready:
+            # 比最粗层还粗时退回最粗层，图像略大于 max_side 无妨
+            k = min(k, self.k_max)
+            f = 2 ** k
+            values, _ = self.levels[k]
+            i0, i1 = r0 // f, -(-r1 // f)
+            j0, j1 = c0 // f, -(-c1 // f)
+            image = values[i0:i1, j0:j1]
+            return image, (j0 * f, min(j1 * f, n_cols), min(i1 * f, n_rows), i0 * f)
+
+        f = 2 ** k
+        r0, c0 = (r0 // f) * f, (c0 // f) * f
+        if k >= self.k_min:
+            # 常驻层未就绪：抽样代替池化，避免在界面线程里扫描大片区域
+            image = np.asarray(self.base[r0:r1:f, c0:c1:f], dtype=np.float32)
+        elif k == 0:
+            image = np.asarray(self.base[r0:r1, c0:c1], dtype=np.float32)
+        else:
+            image, _ = pool_block(self.base[r0:r1, c0:c1], f, f, self.how)
+            image = image.astype(np.float32)
+        return image, (c0, c1, r1, r0)
+
+
+class PointIndex:
+    """二维点集的空间索引，支撑散点图的点选、框选、套索选择和近邻查询。
+
+    近邻类查询使用 KD 树（在按各轴跨度归一化后的坐标上建立，使其与屏幕上的距离大致一致）；
+    矩形类查询使用按 x 排序的数组做二分，再对候选点做向量化筛选。
+
+    Attributes:
+        points: (n, 2) 点坐标。
+    """
+
+    def __init__(self, points):
+        from scipy.spatial import cKDTree
+
+        self.points = np.asarray(points, dtype=np.float64)
+        if self.points.ndim != 2 or self.points.shape[1] != 2:
+            raise ValueError("points 必须是 (n, 2) 的数组。")
+        span = np.ptp(self.points, axis=0) if len(self.points) else np.ones(2)
+        self.scale = np.where(span > 0, span, 1.0)
+        # 不做平衡与压缩，百万点级别的建树时间可降到数百毫秒以内
+        self.tree = cKDTree(self.points / self.scale, balanced_tree=False, compact_nodes=False)
+        self.order_x = np.argsort(self.points[:, 0], kind="stable")
+        self.sorted_x = self.points[self.order_x, 0]
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def nearest(self, x: float, y: float, rx: float, ry: float):
+        """返回落在以 (x, y) 为中心、半轴为 rx/ry 的椭圆内且最近的点。
+
+        Args:
+            x, y: 查询位置（数据坐标）。
+            rx, ry: 两个方向上的容差（数据坐标），通常由若干像素换算而来。
+
+        Returns:
+            int | None: 点的索引；容差内没有点时为 None。
+        """
+        r = max(rx / self.scale[0], ry / self.scale[1])
+        candidates = self.tree.query_ball_point((x / self.scale[0], y / self.scale[1]), r)
+        if not candidates:
+            return None
+        candidates = np.asarray(candidates, dtype=np.intp)
+        d = ((self.points[candidates, 0] - x) / rx) ** 2 + ((self.points[candidates, 1] - y) / ry) ** 2
+        best = int(np.argmin(d))
+        return int(candidates[best]) if d[best] <= 1.0 else None
+
+    def in_rect(self, x0: float, x1: float, y0: float, y1: float) -> np.ndarray:
+        """返回落在矩形 [x0, x1] × [y0, y1] 内的点索引（升序）。"""
+        x0, x1 = sorted((x0, x1))
+        y0, y1 = sorted((y0, y1))
+        lo = np.searchsorted(self.sorted_x, x0, side="left")
+        hi = np.searchsorted(self.sorted_x, x1, side="right")
+        candidates = self.order_x[lo:hi]
+        ys = self.points[candidates, 1]
+        return np.sort(candidates[(ys >= y0) & (ys <= y1)])
+
+    def in_polygon(self, vertices) -> np.ndarray:
+        """返回落在多边形（如套索轨迹）内的点索引（升序）。"""
+        from matplotlib.path import Path
+
+        vertices = np.asarray(vertices, dtype=np.float64)
+        if len(vertices) < 3:
+            return np.empty(0, dtype=np.intp)
+        (x0, y0), (x1, y1) = vertices.min(axis=0), vertices.max(axis=0)
+        candidates = self.in_rect(x0, x1, y0, y1)
+        inside = Path(vertices).contains_points(self.points[candidates])
+        return candidates[inside]
+
+    def knn(self, i: int, k: int = 10) -> np.ndarray:
+        """返回第 i 个点的 k 个最近邻（不含自身），按距离升序。"""
+        k = min(k, len(self.points) - 1)
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        _, idx = self.tree.query(self.points[i] / self.scale, k=k + 1)
+        idx = np.atleast_1d(idx)
+        return idx[idx != i][:k].astype(np.intp)
+
+
+class PointLOD:
+    """散点的多分辨率表示：远景用网格分箱的密度图，近景只给出视野内的点。
+
+    构建时对全部点做一次 grid × grid 的二维直方图并建立前缀和表，之后任意视野内的
+    点数估计都是 O(1)；密度图由细网格按视野池化得到，只有视野比单个细网格单元还要精细
+    且点仍然很多时，才对视野内的点重新分箱。
+
+    Attributes:
+        index: 点集的空间索引。
+        counts: (grid, grid) 的细网格计数，第一维为 x。
+        x_edges, y_edges: 细网格的边界。
+    """
+
+    def __init__(self, index: PointIndex, grid: int = 1024):
+        self.index = index
+        self.grid = grid
+        points = index.points
+        lo, hi = points.min(axis=0), points.max(axis=0)
+        hi = np.where(hi > lo, hi, lo + 1.0)
+        self.counts, self.x_edges, self.y_edges = np.histogram2d(
+            points[:, 0], points[:, 1], bins=grid, range=[[lo[0], hi[0]], [lo[1], hi[1]]]
+        )
+        # 前缀和表（多一行一列 0），用于 O(1) 统计矩形内的计数
+        self.table = np.zeros((grid + 1, grid + 1))
+        self.table[1:, 1:] = self.counts.cumsum(axis=0).cumsum(axis=1)
+
+    def _cells(self, x0: float, x1: float, y0: float, y1: float) -> tuple:
+        """视野覆盖的细网格单元范围 [i0, i1) × [j0, j1)"""
+        i0 = int(np.clip(np.searchsorted(self.x_edges, x0, side="right") - 1, 0, self.grid))
+        i1 = int(np.clip(np.searchsorted(self.x_edges, x1, side="left"), i0, self.grid))
+        j0 = int(np.clip(np.searchsorted(self.y_edges, y0, side="right") - 1, 0, self.grid))
+        j1 = int(np.clip(np.searchsorted(self.y_edges, y1, side="left"), j0, self.grid))
+        return i0, i1, j0, j1
+
+    def count(self, x0: float, x1: float, y0: float, y1: float) -> int:
+        """视野内点数的上界（按覆盖到的细网格单元统计）"""
+        i0, i1, j0, j1 = self._cells(x0, x1, y0, y1)
+        t = self.table
+        return int(t[i1, j1] - t[i0, j1] - t[i1, j0] + t[i0, j0])
+
+    def view(self, x0: float, x1: float, y0: float, y1: float, max_points: int = 20000, bins: int = 256) -> tuple:
+        """按视野选择表示方式。
+
+        Args:
+            x0, x1, y0, y1: 当前视野（数据坐标）。
+            max_points: 视野内点数不超过该值时直接给出点。
+            bins: 密度图在较长边上的目标分辨率。
+
+        Returns:
+            tuple: ``("points", indices, None)`` 或 ``("density", image, extent)``；
+            image 行对应 y、列对应 x，extent 为 ``(x0, x1, y0, y1)``。
+        """
+        x0, x1 = sorted((x0, x1))
+        y0, y1 = sorted((y0, y1))
+        if self.count(x0, x1, y0, y1) <= max_points:
+            return "points", self.index.in_rect(x0, x1, y0, y1), None
+
+        i0, i1, j0, j1 = self._cells(x0, x1, y0, y1)
+        if max(i1 - i0, j1 - j0) >= bins // 4:
+            # 从细网格池化
+            f = max(1, -(-max(i1 - i0, j1 - j0) // bins))
+            block = self.counts[i0:i1, j0:j1]
+            block = np.add.reduceat(np.add.reduceat(block, np.arange(0, block.shape[0], f), axis=0),
+                                    np.arange(0, block.shape[1], f), axis=1)
+            xe = self.x_edges[i0:i1 + 1:f]
+            ye = self.y_edges[j0:j1 + 1:f]
+            extent = (xe[0], xe[0] + block.shape[0] * f * (self.x_edges[1] - self.x_edges[0]),
+                      ye[0], ye[0] + block.shape[1] * f * (self.y_edges[1] - self.y_edges[0]))
+            return "density", block.T, extent
+
+        # 视野比细网格还精细但点仍然很多：只对视野内的点重新分箱
+        idx = self.index.in_rect(x0, x1, y0, y1)
+        pts = self.index.points[idx]
+        image, _, _ = np.histogram2d(pts[:, 0], pts[:, 1], bins=bins, range=[[x0, x1], [y0, y1]])
+        return "density", image.T, (x0, x1, y0, y1)
@@ -1,13 +1,20 @@
 import sys
+import importlib
+import subprocess
+import threading
 
 from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QFileDialog, QStyle
-from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtCore import Qt, QRect, QTimer
 from PyQt5.QtGui import QStandardItem, QStandardItemModel
 
 from qfluentwidgets import FluentWindow, FluentIcon, TableView
 from pages.distance.page import DistanceInterface
 
 
+# 首次使用时才导入的重模块（sklearn、scipy、matplotlib），窗口显示后在后台线程预热
+DEFERRED_MODULES = ("core.distance", "core.reduction", "pages.distance.plots")
+
+
 class MainWindow(FluentWindow):
     def __init__(self):
         super().__init__()
@@ -37,7 +44,51 @@ class MainWindow(FluentWindow):
         self.move(rect.topLeft())
 
 
+def warm_up(modules=DEFERRED_MODULES):
+    """在后台线程中导入重模块，使首次点击计算/绘图时无需等待导入"""
+    def run():
+        for name in modules:
+            importlib.import_module(name)
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def profile_imports(top: int = 20):
+    """
+    在子进程中用 ``-X importtime`` 测量导入耗时并打印报告
+
+    分别给出启动阶段（导入 main）和各延迟加载模块的累计耗时，以及自身耗时最多的模块
+
+    :param top: 列出的模块数量
+    """
+    code = "import main\n" + "".join(f"import {name}\n" for name in DEFERRED_MODULES)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True)
+
+    records = []  # (模块名, 自身耗时, 累计耗时)，单位微秒
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        records.append((name.strip(), int(self_us), int(cumulative_us)))
+    cumulative = {name: cum for name, _, cum in records}
+
+    print("启动阶段:")
+    print(f"  {'main':<40}{cumulative.get('main', 0) / 1000:>10.1f} ms")
+    print("延迟加载（启动后在后台预热）:")
+    for name in DEFERRED_MODULES:
+        print(f"  {name:<40}{cumulative.get(name, 0) / 1000:>10.1f} ms")
+    print(f"自身耗时最多的 {top} 个模块:")
+    for name, self_us, cum in sorted(records, key=lambda r: r[1], reverse=True)[:top]:
+        print(f"  {name:<40}{self_us / 1000:>10.1f} ms  (累计 {cum / 1000:.1f} ms)")
+
+
 if __name__ == "__main__":
+    # 导入耗时分析模式：python main.py --profile-imports
+    if "--profile-imports" in sys.argv:
+        profile_imports()
+        sys.exit(0)
+
     QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
     QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
@@ -45,4 +96,5 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
+    QTimer.singleShot(0, warm_up)
     sys.exit(app.exec_())
\ No newline at end of file
@@ -1,3 +1,5 @@
+import os
+
 import pandas as pd
 import numpy as np
 
@@ -7,14 +9,19 @@ from PyQt5.QtCore import Qt
 from qfluentwidgets import InfoBar, InfoBarPosition
 
 from core.loader import upload, download
-from core.distance import compute_distance_matrix, gaussian_discretization
-from core.reduction import reduce_dimension
-from pages.distance.widgets import tableWidget, PlotWidget, FileDialog
+from core.session import save_session, open_session, STAGES
+from core.trace import span, export_chrome_trace
+from pages.distance.widgets import tableWidget, FileDialog, LazyWidget, TracePanel, RuntimePanel
+
+# core.distance（sklearn/scipy）、core.reduction（sklearn.manifold）和 pages.distance.plots（matplotlib）
+# 导入很慢，放到首次使用时再导入，窗口启动后由 main.py 在后台线程预热
 
 
 class Controllers:
     def __init__(self, parent):
         self.parent = parent
+        # 计算服务的客户端，见 _daemon
+        self._daemon_client = None
         
     def _notify(self, kind: str, title: str, content: str, *, duration: int = 2400) -> None:
         """显示消息条（右上角）。
@@ -79,6 +86,7 @@ class Controllers:
             self._notify("error", "界面错误", f"关闭标签页失败：{e}")
 
     # 导入功能
+    @span("ui.upload_data")
     def upload_data(self, type: str):
         """加载文件数据到表格组件。
 
@@ -120,10 +128,13 @@ class Controllers:
         table.addItem(df)
         setattr(self.parent, type, df)
         self.add_tab(table, type, titles[type], icon="assets/icon/book.png")
+        if type in ("eudistance", "infodistance"):
+            self._add_heatmap_tab(df, type, titles[type])
         self._notify("success", "导入成功", f"已成功导入{titles[type]}")
         return True
 
     # 导出功能
+    @span("ui.download_data")
     def download_data(self, type:str):
         """将表格数据保存到文件。
 
@@ -165,7 +176,95 @@ class Controllers:
             return True
         return False
     
+    # 会话
+    @span("ui.save_session")
+    def save_session(self):
+        """把当前所有阶段的数据与参数保存为单个会话文件。
+
+        Returns:
+            bool: 成功 True；用户取消或失败 False。
+        """
+        stages = {name: getattr(self.parent, name) for name in STAGES}
+        if all(df.empty for df in stages.values()):
+            self._notify("warning", "数据异常", "没有可保存的数据。")
+            return False
+
+        path, _ = FileDialog.getSaveFileName(self.parent, "保存会话", "", "Session Files (*.corr)")
+        if not path:
+            self._notify("info", "已取消", "未选择保存路径")
+            return False
+
+        try:
+            save_session(path, stages, self.parent.params)
+        except (OSError, TypeError, ValueError) as e:
+            self._notify("error", "保存失败", str(e))
+            return False
+
+        self._notify("success", "保存成功", f"会话已保存到：{path}")
+        return True
+
+    @span("ui.open_session")
+    def open_session(self):
+        """打开会话文件，各阶段以内存映射方式挂载，标签页在首次查看时才构建表格。
+
+        Returns:
+            bool: 成功 True；用户取消或失败 False。
+        """
+        titles = {
+            "data": "原始数据",
+            "discretized_data": "离散化数据",
+            "eudistance": "欧氏距离",
+            "infodistance": "信息距离",
+            "coordinates": "坐标"
+        }
+
+        path, _ = FileDialog.getOpenFileName(self.parent, "打开会话", "", "Session Files (*.corr)")
+        if not path:
+            self._notify("info", "已取消", "未选择任何文件")
+            return False
+
+        try:
+            session = open_session(path)
+            frames = {name: session.load(name) for name in session.stages}
+        except (FileNotFoundError, OSError, ValueError) as e:
+            self._notify("error", "打开失败", str(e))
+            return False
+
+        self.parent.params = dict(session.params)
+        for name, df in frames.items():
+            setattr(self.parent, name, df)
+            self.add_tab(LazyWidget(lambda df=df: self._build_table(df)), name, titles[name])
+            # topk 长表以 (source, target) 为索引，不是方阵，不画热图
+            if name in ("eudistance", "infodistance") and not isinstance(df.index, pd.MultiIndex):
+                self._add_heatmap_tab(df, name, titles[name])
+        self._notify("success", "打开成功", f"已加载 {len(frames)} 个阶段")
+        return True
+
+    def _build_table(self, df: pd.DataFrame) -> tableWidget:
+        """构建并填充表格组件。"""
+        table = tableWidget()
+        table.addItem(df)
+        return table
+
+    def _add_heatmap_tab(self, matrix: pd.DataFrame, name: str, title: str):
+        """为距离矩阵添加热图标签页，热图在首次查看时才构建。
+
+        Args:
+            matrix: 距离矩阵。
+            name: 数据类型名，标签页对象名为 ``{name}_heatmap``。
+            title: 数据标题。
+        """
+        def build():
+            from pages.distance.plots import HeatmapWidget
+
+            heatmap = HeatmapWidget()
+            heatmap.setMatrix(matrix, title=f"{title}热图")
+            return heatmap
+
+        self.add_tab(LazyWidget(build), f"{name}_heatmap", f"{title}热图", icon="assets/icon/thinking_face.png")
+
     # 离散化
+    @span("ui.discretize")
     def discretize(self, data: pd.DataFrame):
         """对数据进行高斯离散化并展示在新标签页。
 
@@ -179,14 +278,17 @@ class Controllers:
             self._notify("warning", "数据为空", "无法离散化。")
             return False
 
+        from core.distance import gaussian_discretization
+
         # 进行高斯离散化
         try:
-            disc = gaussian_discretization(data)
+            disc = self._via_daemon(lambda client: client.discretize(data), lambda: gaussian_discretization(data))
         except (TypeError, ValueError) as e:
             self._notify("error", "离散化失败", str(e))
             return False
 
         self.parent.discretized_data = disc
+        self.parent.params["discretized_data"] = {"sigma": 1.0, "bins": 7, "return_zscore": True}
         table = tableWidget()
         table.addItem(disc)
         self.add_tab(table, "discretized_data", "离散化数据", icon="assets/icon/book.png")
@@ -194,6 +296,7 @@ class Controllers:
         return True
 
     # 计算距离
+    @span("ui.compute_distance")
     def compute_distance(self, data: pd.DataFrame, euclidean: bool = False, information: bool = False):
         """计算距离矩阵并展示。
 
@@ -212,33 +315,171 @@ class Controllers:
             self._notify("warning", "未选择方法", "请至少选择一种距离计算方式。")
             return False
 
+        from core.distance import compute_distance_matrix
+
         if euclidean:
+            plan = self._plan_distance(data, "euclidean", "欧氏距离")
+            if plan is None:
+                return False
+
+            def local(plan=plan):
+                job_dir = self._job_dir(data, plan, "euclidean", "欧氏距离")
+                result = compute_distance_matrix(data, method="euclidean", strategy=plan.strategy,
+                                                 budget=plan.budget, k=plan.k, job_dir=job_dir)
+                return self._release_job(result, job_dir)
+
             try:
-                eudist = compute_distance_matrix(data, method="euclidean")
-            except (TypeError, ValueError) as e:
+                if plan.strategy == "dense":
+                    eudist = self._via_daemon(lambda client: client.distance(data, "euclidean"), local)
+                else:
+                    eudist = local()
+            except (TypeError, ValueError, OSError) as e:
                 self._notify("error", "欧氏距离失败", str(e))
                 return False
             self.parent.eudistance = eudist
+            self.parent.params["eudistance"] = {"method": "euclidean", "strategy": plan.strategy}
             table = tableWidget()
             table.addItem(eudist)
             self.add_tab(table, "eudistance", "欧氏距离", icon="assets/icon/book.png")
+            if plan.strategy != "topk":
+                self._add_heatmap_tab(eudist, "eudistance", "欧氏距离")
             self._notify("success", "计算完成", "欧氏距离已生成。")
 
         if information:
+            plan = self._plan_distance(data, "information", "信息距离")
+            if plan is None:
+                return False
+
+            def local(plan=plan):
+                job_dir = self._job_dir(data, plan, "information", "信息距离")
+                result = compute_distance_matrix(data, method="information", strategy=plan.strategy,
+                                                 budget=plan.budget, k=plan.k, job_dir=job_dir)
+                return self._release_job(result, job_dir)
+
             try:
-                infodist = compute_distance_matrix(data, method="information")
-            except (TypeError, ValueError) as e:
+                if plan.strategy == "dense":
+                    infodist = self._via_daemon(lambda client: client.distance(data, "information"), local)
+                else:
+                    infodist = local()
+            except (TypeError, ValueError, OSError) as e:
                 self._notify("error", "信息距离失败", str(e))
                 return False
             self.parent.infodistance = infodist
+            self.parent.params["infodistance"] = {"method": "information", "sigma": 1.0, "bins": 13,
+                                                  "return_zscore": True, "strategy": plan.strategy}
             table = tableWidget()
             table.addItem(infodist)
             self.add_tab(table, "infodistance", "信息距离", icon="assets/icon/book.png")
+            if plan.strategy != "topk":
+                self._add_heatmap_tab(infodist, "infodistance", "信息距离")
             self._notify("success", "计算完成", "信息距离已生成。")
 
         return True
+
+    def _daemon(self):
+        """设置了环境变量 ``CORR_DAEMON`` 时连接本机计算服务（见 :mod:`core.daemon`）。
+
+        Returns:
+            DaemonClient | None: 客户端；未启用或服务不可用时返回 None（此时在本进程内计算）。
+        """
+        if os.environ.get("CORR_DAEMON", "0") in ("", "0"):
+            return None
+        if self._daemon_client is None:
+            from core.daemon import DaemonClient
+
+            try:
+                self._daemon_client = DaemonClient()
+            except ConnectionError as e:
+                self._notify("warning", "计算服务不可用", f"{e}，改为本机计算。", duration=4000)
+                return None
+        return self._daemon_client
+
+    def _via_daemon(self, request, fallback):
+        """启用计算服务时由服务计算，否则在本进程内计算；连接中断时丢弃客户端并改为本机计算。
+
+        Args:
+            request: 以 DaemonClient 为参数、向服务请求结果的函数。
+            fallback: 在本进程内计算的函数。
+
+        Returns:
+            request 或 fallback 的结果。
+        """
+        client = self._daemon()
+        if client is None:
+            return fallback()
+        try:
+            return request(client)
+        except ConnectionError as e:
+            self._daemon_client = None
+            try:
+                client.close()
+            except OSError:
+                pass
+            self._notify("warning", "计算服务连接中断", f"{e}，改为本机计算。", duration=4000)
+            return fallback()
+
+    def _job_dir(self, data: pd.DataFrame, plan, method: str, title: str):
+        """分块写盘的长时间计算使用作业目录，中断后再次计算时从已完成的分块继续；完成后由
+        :meth:`_release_job` 删除。
+
+        Args:
+            data: 原始数据。
+            plan: :meth:`_plan_distance` 给出的执行计划。
+            method: ``"euclidean"`` 或 ``"information"``。
+            title: 提示中显示的距离名称。
+
+        Returns:
+            str | None: 作业目录；内存计算与稀疏近邻不需要断点续算，返回 None。
+        """
+        if plan.strategy != "tiled":
+            return None
+        from core.checkpoint import default_job_dir, job_params, job_status
+
+        job_dir = default_job_dir(data, job_params(method))
+        status = job_status(job_dir)
+        if status is not None and not status["complete"]:
+            self._notify("info", f"{title}断点续算",
+                         f"已完成 {status['done']}/{status['total']} 个分块，从中断处继续。", duration=4000)
+        return job_dir
+
+    def _release_job(self, result: pd.DataFrame, job_dir):
+        """计算完成后删除界面的作业目录，结果文件随结果回收删除（见 :func:`core.checkpoint.release_job`）"""
+        if job_dir is None:
+            return result
+        from core.checkpoint import release_job
+
+        return release_job(result)
+
+    def _plan_distance(self, data: pd.DataFrame, method: str, title: str):
+        """估算内存与耗时并选择执行策略，把计划提示给用户。
+
+        Args:
+            data: 原始数据。
+            method: ``"euclidean"`` 或 ``"information"``。
+            title: 提示中显示的距离名称。
+
+        Returns:
+            Plan | None: 执行计划；预算内没有可行策略时返回 None。
+        """
+        from core.planner import plan_distance
+
+        try:
+            # 含缺失值的欧氏距离使用掩码核，中间数组更多
+            has_nan = method == "euclidean" and bool(data.isna().to_numpy().any())
+            plan = plan_distance(data.shape[0], data.shape[1], method, bins=13, has_nan=has_nan)
+        except ValueError as e:
+            self._notify("error", f"{title}失败", str(e))
+            return None
+
+        if not plan.feasible:
+            self._notify("warning", "内存不足", f"{title}：{plan.describe()}，超出内存预算。", duration=6000)
+            return None
+        kind = "info" if plan.strategy == "dense" else "warning"
+        self._notify(kind, f"{title}执行计划", plan.describe(), duration=4000)
+        return plan
     
     # 降维
+    @span("ui.reduce")
     def reduce(self, distance: pd.DataFrame):
         """使用 MDS 将距离矩阵降维为坐标并展示。
 
@@ -252,6 +493,8 @@ class Controllers:
             self._notify("warning", "数据为空", "无法降维。")
             return False
 
+        from core.reduction import reduce_dimension
+
         try:
             coords = reduce_dimension(distance)
         except (TypeError, ValueError) as e:
@@ -259,13 +502,118 @@ class Controllers:
             return False
 
         self.parent.coordinates = coords
+        self.parent.params["coordinates"] = {"method": "mds", "n_components": 2, "random_state": 42}
         table = tableWidget()
         table.addItem(coords)
         self.add_tab(table, "coordinates", "坐标", icon="assets/icon/book.png")
         self._notify("success", "降维完成", "已生成二维坐标。")
         return True
 
+    # 聚类
+    @span("ui.cluster")
+    def cluster(self, method: str = "average"):
+        """对已计算的距离矩阵做层次聚类，按聚类顺序展示矩阵与热图。
+
+        重排后的表格与热图都是原矩阵的索引视图，不复制数据。
+
+        Args:
+            method: 链接方式，见 ``core.cluster.LINKAGE_METHODS``。
+
+        Returns:
+            bool: 至少一个矩阵聚类成功 True；否则 False。
+        """
+        titles = {"eudistance": "欧氏距离", "infodistance": "信息距离"}
+        matrices = {name: getattr(self.parent, name) for name in titles if not getattr(self.parent, name).empty}
+        if not matrices:
+            self._notify("warning", "数据为空", "请先计算或导入距离矩阵。")
+            return False
+
+        from core.cluster import cluster_distance
+
+        done = False
+        for name, matrix in matrices.items():
+            title = titles[name]
+            try:
+                result = cluster_distance(matrix, method=method)
+            except (TypeError, ValueError, OSError) as e:
+                self._notify("error", f"{title}聚类失败", str(e))
+                continue
+
+            self.parent.clusters[name] = result
+            self.parent.params[f"{name}_cluster"] = {"method": method, "optimal_ordering": result.optimal,
+                                                     "n_clusters": result.n_clusters}
+            view = result.ordered(matrix)
+            table = tableWidget()
+            table.addItem(view)
+            self.add_tab(table, f"{name}_cluster", f"{title}（聚类）", icon="assets/icon/book.png")
+            self._add_heatmap_tab(view, f"{name}_cluster", f"{title}（聚类）")
+            self._notify("success", "聚类完成", f"{title}：{result.n_clusters} 个簇，已按聚类顺序重排。")
+            done = True
+        return done
+
+    # 近邻查询
+    @span("ui.show_neighbors")
+    def show_neighbors(self, name: str, euclidean: bool = False, information: bool = False, k: int = 20):
+        """按需计算某个变量的最近邻并展示在新标签页。
+
+        距离由 LazyDistanceMatrix 只为该变量计算一行，耗时 O(n)，不需要先计算完整矩阵。
+
+        Args:
+            name: 变量名。
+            euclidean: 是否按欧氏距离查询。
+            information: 是否按信息距离查询。
+            k: 近邻数。
+
+        Returns:
+            bool: 成功 True；失败 False。
+        """
+        name = name.strip()
+        data = self.parent.data
+        if not name:
+            self._notify("warning", "参数异常", "请输入变量名。")
+            return False
+        if data.empty:
+            self._notify("warning", "数据为空", "请先导入数据。")
+            return False
+        if not euclidean and not information:
+            self._notify("warning", "未选择方法", "请至少选择一种距离计算方式。")
+            return False
+
+        from core.lazy import LazyDistanceMatrix
+
+        frames = []
+        for method, title, selected in (("euclidean", "欧氏距离", euclidean), ("information", "信息距离", information)):
+            if not selected:
+                continue
+            # 数据未变时复用已缓存的行块
+            cached = self.parent.lazy_distances.get(method)
+            try:
+                if cached is None or cached[0] is not data:
+                    cached = (data, LazyDistanceMatrix(data, method))
+                    self.parent.lazy_distances[method] = cached
+                lazy = cached[1]
+                # 界面输入总是字符串，变量名为整数（无标签列）时按整数查找
+                label = int(name) if name not in lazy.index and name.lstrip("-").isdigit() else name
+                nearest = lazy.neighbors(label, k=k)
+            except KeyError:
+                self._notify("warning", "查询失败", f"找不到变量：{name}")
+                return False
+            except (TypeError, ValueError) as e:
+                self._notify("error", f"{title}查询失败", str(e))
+                return False
+            # 无法计算的 NaN 距离不计入近邻，两种方法的近邻数可能不同，按名次对齐、不足处留空
+            frames.append(pd.DataFrame({f"{title}近邻": nearest.index.astype(str), title: nearest.to_numpy()},
+                                       index=pd.RangeIndex(1, len(nearest) + 1, name="rank")))
+
+        result = pd.concat(frames, axis=1)
+        table = tableWidget()
+        table.addItem(result)
+        self.add_tab(table, f"neighbors_{name}", f"{name} 的近邻", icon="assets/icon/book.png")
+        self._notify("success", "查询完成", f"已列出 {name} 最近的 {len(result)} 个变量。")
+        return True
+
     # 绘图
+    @span("ui.plot_coordinates")
     def plot_coordinates(self, coordinates: pd.DataFrame):
         """绘制坐标点到新标签页。
 
@@ -280,6 +628,8 @@ class Controllers:
             return False
 
         try:
+            from pages.distance.plots import PlotWidget
+
             plot_widget = PlotWidget()
             plot_widget.plotPoints(coordinates)
             self.add_tab(plot_widget, "plot", "坐标图", icon="assets/icon/book.png")
@@ -288,4 +638,89 @@ class Controllers:
             self._notify("error", "绘图失败", str(e))
             return False
 
-        return True
\ No newline at end of file
+        return True
+
+    # 性能面板
+    def show_trace_panel(self):
+        """打开分阶段耗时面板；面板已存在时切换过去。
+
+        Returns:
+            bool: 成功 True。
+        """
+        panel = self.parent.stackedWidget.findChild(TracePanel, "trace")
+        if panel is not None:
+            self.parent.stackedWidget.setCurrentWidget(panel)
+            return True
+
+        panel = TracePanel()
+        panel.exportRequested.connect(self.export_trace)
+        self.add_tab(panel, "trace", "性能面板", icon="assets/icon/book.png")
+        return True
+
+    # 运行设置
+    def show_runtime_panel(self):
+        """打开计算资源设置面板；面板已存在时切换过去。
+
+        Returns:
+            bool: 成功 True。
+        """
+        panel = self.parent.stackedWidget.findChild(RuntimePanel, "runtime")
+        if panel is not None:
+            panel.refresh()
+            self.parent.stackedWidget.setCurrentWidget(panel)
+            return True
+
+        panel = RuntimePanel()
+        panel.applyRequested.connect(lambda values: self.apply_runtime(values, panel))
+        self.add_tab(panel, "runtime", "运行设置", icon="assets/icon/book.png")
+        return True
+
+    def apply_runtime(self, values: dict, panel: RuntimePanel = None):
+        """校验并应用运行配置，之后的计算（含进程池与分块写盘）都按新配置执行。
+
+        Args:
+            values: :class:`core.runtime.RuntimeConfig` 的构造参数。
+            panel: 发起请求的设置面板，应用后刷新其显示。
+
+        Returns:
+            bool: 成功 True；参数不合法 False。
+        """
+        from core.runtime import set_runtime
+
+        scratch_dir = values.get("scratch_dir")
+        if scratch_dir and not os.path.isdir(scratch_dir):
+            self._notify("error", "设置失败", f"临时目录不存在：{scratch_dir}")
+            return False
+        try:
+            config = set_runtime(values)
+        except (TypeError, ValueError) as e:
+            self._notify("error", "设置失败", str(e))
+            return False
+
+        if panel is not None:
+            panel.refresh()
+        content = config.describe()
+        if self._daemon_client is not None:
+            content += "。计算服务在独立进程中运行，不受此设置影响"
+        self._notify("success", "运行设置已应用", content, duration=4000)
+        return True
+
+    def export_trace(self):
+        """把已记录的跨度导出为 Chrome trace-event JSON。
+
+        Returns:
+            bool: 成功 True；用户取消或失败 False。
+        """
+        path, _ = FileDialog.getSaveFileName(self.parent, "导出 Trace", "", "Trace Files (*.json)")
+        if not path:
+            self._notify("info", "已取消", "未选择保存路径")
+            return False
+
+        try:
+            export_chrome_trace(path)
+        except (OSError, ValueError) as e:
+            self._notify("error", "导出失败", str(e))
+            return False
+
+        self._notify("success", "导出成功", f"Trace 已保存到：{path}，可在 chrome://tracing 中打开")
+        return True
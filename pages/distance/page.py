@@ -26,6 +26,12 @@ class DistanceInterface(QWidget, Ui_distance_page):
         self.eudistance = pd.DataFrame()
         self.infodistance = pd.DataFrame()
         self.coordinates = pd.DataFrame()
+        # 距离矩阵名 → 层次聚类结果
+        self.clusters = {}
+        # 距离类型 → (数据, 按需计算的 LazyDistanceMatrix)，用于近邻查询
+        self.lazy_distances = {}
+        # 各阶段的计算参数，随会话一起保存
+        self.params = {}
 
         # 初始化 UI
         self.setupUi(self)
@@ -72,6 +78,13 @@ class DistanceInterface(QWidget, Ui_distance_page):
         self.uploadEuDistButton.clicked.connect(lambda: self.controllers.upload_data("eudistance"))
         self.uploadInfoDistButton.clicked.connect(lambda: self.controllers.upload_data("infodistance"))
         self.uploadCoordButton.clicked.connect(lambda: self.controllers.upload_data("coordinates"))
+        # 会话按钮
+        self.openSessionButton.clicked.connect(lambda: self.controllers.open_session())
+        self.saveSessionButton.clicked.connect(lambda: self.controllers.save_session())
+        # 性能面板按钮
+        self.traceButton.clicked.connect(lambda: self.controllers.show_trace_panel())
+        # 运行设置按钮
+        self.runtimeButton.clicked.connect(lambda: self.controllers.show_runtime_panel())
         # 离散化按钮
         self.discreteDataButton.clicked.connect(lambda: self.controllers.discretize(self.data))
         # 计算距离按钮
@@ -85,6 +98,16 @@ class DistanceInterface(QWidget, Ui_distance_page):
         # 降维按钮
         self.reduceDimButton.clicked.connect(lambda: self.controllers.reduce(self.eudistance))
         self.reduceDimButton.clicked.connect(lambda: self.controllers.reduce(self.infodistance))
+        # 聚类按钮
+        self.clusterButton.clicked.connect(lambda: self.controllers.cluster())
+        # 近邻查询
+        self.neighborLineEdit.searchSignal.connect(
+            lambda text: self.controllers.show_neighbors(
+                text,
+                euclidean=self.euDistSwitch.isChecked(),
+                information=self.infoDistSwitch.isChecked()
+            )
+        )
         # 绘图按钮
         self.drawButton.clicked.connect(lambda: self.controllers.plot_coordinates(self.coordinates))
         # 导出按钮
@@ -0,0 +1,630 @@
+import threading
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+from matplotlib import rcParams
+from matplotlib.widgets import RectangleSelector, LassoSelector
+
+from core.visualizer import MatrixPyramid, PointIndex, PointLOD
+from core.matrix import MatrixView
+
+
+# 散点图左下角的操作提示
+HINT_TEXT = "Z 撤销  P 点选  R 框选  L 套索  N 近邻"
+
+
+class PlotWidget(QWidget):
+    """
+    集成matplotlib的绘图组件，支持点选择、框选/套索选择、近邻查询、距离计算、撤销和缩放功能
+
+    选中高亮、点标签、连接线和距离标注都是 animated 艺术家，不参与常规重绘：
+    完整重绘后缓存背景，交互时只恢复背景并 blit 这些艺术家；缩放通过 draw_idle 合并重绘。
+    点选、框选、套索和近邻查询都由 plotPoints 时建立的空间索引（PointIndex）完成，
+    不使用 matplotlib 对所有点的线性拾取。
+    点数超过 lod_threshold 时启用多分辨率显示（PointLOD）：视野内点多时显示分箱密度图，
+    点少时只绘制视野内的点，缩放时按视野重新计算。
+
+    按键：Z 撤销，P 点选，R 框选，L 套索，N 高亮最近选中点的近邻
+
+    :function plotPoints: 传入包含点坐标的pandas DataFrame绘制散点图
+    :function clearPlot: 清空当前绘图
+    :function setTitle: 设置图表标题
+    :function setAxisLabels: 设置坐标轴标签
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        # 设置中文字体
+        rcParams["font.family"] = "sans-serif"
+        rcParams["font.sans-serif"] = ["Microsoft YaHei", "SimHei", "Noto Sans CJK SC"]
+        rcParams["axes.unicode_minus"] = False  # 负号正常显示
+
+        # 创建matplotlib图形和画布
+        self.figure = Figure(figsize=(8, 6), dpi=100)
+        self.canvas = FigureCanvas(self.figure)
+        self.axes = self.figure.add_subplot(111)
+
+        # 设置布局
+        self.vlayout = QVBoxLayout(self)
+        self.vlayout.addWidget(self.canvas)
+        self.setLayout(self.vlayout)
+
+        # 设置默认样式
+        self.figure.patch.set_facecolor('white')
+        self.axes.grid(True, alpha=0.3)
+        self.axes.set_axisbelow(True)
+
+        # 初始化默认标签
+        self.axes.set_xlabel('X坐标')
+        self.axes.set_ylabel('Y坐标')
+        self.axes.set_title('散点图')
+        self.hint_text = self.axes.text(
+            0.01, 0.01,  # 位置（左下角，相对坐标）
+            HINT_TEXT,
+            fontsize=14,
+            color='green',
+            transform=self.axes.transAxes,  # 使用相对坐标（0-1 范围）
+            verticalalignment='bottom',  # 垂直对齐方式
+            bbox=dict(facecolor='white', edgecolor='none', alpha=0.7)  # 白色背景框，增加可读性
+        )
+
+        # 交互功能变量初始化
+        self.scatter = None  # 散点图对象
+        self.highlight = None  # 选中点的高亮层（animated）
+        self.coordinates = None  # 存储坐标数据
+        self.points = None  # (n, 2) 坐标数组
+        self.names = None  # 点名称
+        self.x_col = None  # x列名
+        self.y_col = None  # y列名
+        self.point_size = 50  # 点大小
+        self.index = None  # 空间索引
+        self.k_neighbors = 10  # 近邻查询个数
+        self.lod = None  # 多分辨率表示
+        self.density = None  # 密度图层
+        self.lod_threshold = 20000  # 超过该点数时启用多分辨率显示
+        self.max_visible_points = 20000  # 视野内点数不超过该值时绘制单个点
+
+        # 交互状态变量
+        self.selected_indices = []  # 当前选中的点索引
+        self.annotations = []  # 所有标注对象
+        self.lines = []  # 所有连接线
+        self.point_labels = []  # 点标签
+        self.operations = []  # 操作历史记录
+        self.region_indices = np.empty(0, dtype=np.intp)  # 框选/套索/近邻选中的点
+        self.last_index = None  # 最近一次点选的点
+        self._background = None  # 缓存的背景（不含 animated 艺术家）
+
+        # 选择模式：point | rect | lasso
+        self.mode = 'point'
+        self.rect_selector = RectangleSelector(self.axes, self.on_rect_select, useblit=True, button=[1])
+        self.lasso_selector = LassoSelector(self.axes, self.on_lasso_select, useblit=True, button=[1])
+        self.rect_selector.set_active(False)
+        self.lasso_selector.set_active(False)
+
+        # 绑定事件
+        self.cid_press = self.canvas.mpl_connect('button_press_event', self.on_press)
+        self.cid_key = self.canvas.mpl_connect('key_press_event', self.on_key)
+        self.cid_scroll = self.canvas.mpl_connect('scroll_event', self.on_scroll)
+        self.cid_draw = self.canvas.mpl_connect('draw_event', self.on_draw)
+
+        # 确保画布获得焦点以接收键盘事件
+        self.canvas.setFocusPolicy(Qt.StrongFocus)
+        self.canvas.setFocus()
+
+    def plotPoints(self, coordinates: pd.DataFrame, x_col=None, y_col=None,
+                   color='skyblue', marker='o', size=50, alpha=0.7, label=None,
+                   names=None):
+        """绘制点坐标散点图，支持交互选择和距离计算"""
+        if coordinates is None or not isinstance(coordinates, pd.DataFrame):
+            print("数据无效，请传入有效的 pandas DataFrame")
+            return
+
+        if coordinates.empty:
+            print("DataFrame 为空")
+            return
+
+        # 保存数据供交互使用
+        self.coordinates = coordinates.copy()
+        self.names = coordinates.index.tolist()
+
+        # 确定 x和 y列
+        columns = coordinates.columns.tolist()
+        if len(columns) < 2:
+            print("DataFrame 至少需要两列数据作为x和y坐标")
+            return
+
+        if x_col is None:
+            x_col = columns[0]
+        if y_col is None:
+            y_col = columns[1]
+
+        if x_col not in columns or y_col not in columns:
+            print(f"指定的列名不存在。可用列: {columns}")
+            return
+
+        # 保存列名
+        self.x_col = x_col
+        self.y_col = y_col
+
+        try:
+            # 获取 x和 y数据
+            x_data = coordinates[x_col].to_numpy(dtype=float)
+            y_data = coordinates[y_col].to_numpy(dtype=float)
+            self.points = np.column_stack([x_data, y_data])
+            self.point_size = size
+            self.index = PointIndex(self.points)
+
+            # 清空之前的绘图和状态
+            self.clearPlot()
+
+            # 点数很多时先不画点，由 _update_lod 按视野决定画点还是画密度图
+            use_lod = len(x_data) > self.lod_threshold
+            self.scatter = self.axes.scatter(
+                x_data[:0] if use_lod else x_data, y_data[:0] if use_lod else y_data,
+                c=color, marker=marker,
+                s=size, alpha=alpha,
+                label=label
+            )
+            if use_lod:
+                self.lod = PointLOD(self.index)
+                self.density = self.axes.imshow(
+                    np.zeros((1, 1)), origin='lower', cmap='Blues', aspect='auto',
+                    interpolation='nearest', zorder=1
+                )
+                pad_x = 0.05 * (np.ptp(x_data) or 1.0)
+                pad_y = 0.05 * (np.ptp(y_data) or 1.0)
+                self.axes.set_xlim(x_data.min() - pad_x, x_data.max() + pad_x)
+                self.axes.set_ylim(y_data.min() - pad_y, y_data.max() + pad_y)
+                self._update_lod()
+
+            # 重新设置标签和网格
+            self.axes.set_xlabel(x_col)
+            self.axes.set_ylabel(y_col)
+            self.axes.set_title('散点图')
+            self.axes.grid(True, alpha=0.3)
+
+            # 如果有标签，显示图例
+            if label:
+                self.axes.legend()
+
+            # 刷新画布
+            self.canvas.draw()
+            print(f"已绘制 {len(x_data)} 个点，等待交互...")
+
+        except Exception as e:
+            print(f"绘图时发生错误: {str(e)}")
+
+    def clearPlot(self):
+        """清空当前绘图"""
+        self.axes.clear()
+        self.scatter = None
+        self.selected_indices = []
+        self.annotations = []
+        self.lines = []
+        self.point_labels = []
+        self.operations = []
+        self.region_indices = np.empty(0, dtype=np.intp)
+        self.last_index = None
+        self.lod = None
+        self.density = None
+        # 重置标签
+        self.axes.set_xlabel(self.x_col if self.x_col else 'X坐标')
+        self.axes.set_ylabel(self.y_col if self.y_col else 'Y坐标')
+        self.axes.grid(True, alpha=0.3)
+        # 保留提示
+        self.hint_text = self.axes.text(
+            0.01, 0.01,
+            HINT_TEXT,
+            fontsize=14,
+            color='green',
+            transform=self.axes.transAxes,
+            verticalalignment='bottom',
+            bbox=dict(facecolor='white', edgecolor='none', alpha=0.7)
+        )
+        # 选中高亮层，只通过 blit 绘制
+        self.highlight = self.axes.scatter(
+            np.empty(0), np.empty(0), c='red', s=self.point_size,
+            zorder=3, animated=True
+        )
+        self.canvas.draw()
+
+    def setTitle(self, title: str):
+        """设置图表标题"""
+        self.axes.set_title(title)
+        self.canvas.draw_idle()
+
+    def setAxisLabels(self, x_label: str, y_label: str):
+        """设置坐标轴标签"""
+        self.axes.set_xlabel(x_label)
+        self.axes.set_ylabel(y_label)
+        self.x_col = x_label
+        self.y_col = y_label
+        self.canvas.draw_idle()
+
+    # 多分辨率显示
+    def _update_lod(self):
+        """按当前视野更新点层与密度图层"""
+        if self.lod is None:
+            return
+        x0, x1 = self.axes.get_xlim()
+        y0, y1 = self.axes.get_ylim()
+        kind, payload, extent = self.lod.view(x0, x1, y0, y1, max_points=self.max_visible_points)
+        if kind == "points":
+            self.scatter.set_offsets(self.points[payload])
+            self.density.set_visible(False)
+        else:
+            self.scatter.set_offsets(np.empty((0, 2)))
+            image = np.where(payload > 0, np.log1p(payload), np.nan)
+            self.density.set_data(image)
+            self.density.set_extent(extent)
+            self.density.set_clim(0, np.nanmax(image))
+            self.density.set_visible(True)
+
+    # 重绘与 blit
+    def _animated_artists(self):
+        """返回所有需要 blit 的艺术家"""
+        artists = [] if self.highlight is None else [self.highlight]
+        return artists + self.lines + self.annotations + self.point_labels
+
+    def on_draw(self, event):
+        """完整重绘后缓存背景，并补画 animated 艺术家"""
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        for artist in self._animated_artists():
+            self.figure.draw_artist(artist)
+
+    def _blit(self):
+        """恢复缓存的背景，只重画 animated 艺术家"""
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        for artist in self._animated_artists():
+            self.figure.draw_artist(artist)
+        self.canvas.blit(self.figure.bbox)
+
+    def _set_highlight(self, indices):
+        """把高亮层设为给定索引的点（整块写入偏移数组）"""
+        if self.highlight is None:
+            return
+        idx = np.asarray(indices, dtype=np.intp)
+        self.highlight.set_offsets(self.points[idx] if idx.size else np.empty((0, 2)))
+
+    # 点击事件回调：通过空间索引找到点击的点
+    def on_press(self, event, tolerance: float = 5.0):
+        # 只在点选模式下处理坐标区内的左键   button———— 1-左键  2-滚轮  3-右键
+        if self.mode != 'point' or self.index is None or event.inaxes != self.axes or event.button != 1:
+            return
+
+        # 把像素容差换算为数据坐标下的容差
+        inv = self.axes.transData.inverted()
+        (x0, y0), (x1, y1) = inv.transform([(event.x, event.y), (event.x + tolerance, event.y + tolerance)])
+        ind = self.index.nearest(x0, y0, abs(x1 - x0), abs(y1 - y0))
+        if ind is not None:
+            self.select_point(ind)
+
+    # 选择点并计算距离
+    def select_point(self, ind: int):
+        self.last_index = ind
+        self.region_indices = np.empty(0, dtype=np.intp)
+
+        # 防止重复选择同一点
+        if ind in self.selected_indices:
+            return
+
+        # 添加到选中列表
+        self.selected_indices.append(ind)
+        print(f"选中点索引: {ind}，当前选中 {len(self.selected_indices)} 个点")
+
+        # 将选中的点设为红色
+        self._set_highlight(self.selected_indices)
+
+        # 显示点信息
+        x, y = self.points[ind]
+        label = self.axes.text(
+            x, y,
+            f"{self.names[ind]}\n({x:.3f},{y:.3f})",
+            fontsize=9, color='blue', fontweight='bold', animated=True
+        )
+        self.point_labels.append(label)
+
+        # 当选中2个点时，绘制连接线和距离
+        if len(self.selected_indices) == 2:
+            i, j = self.selected_indices
+            (xi, yi), (xj, yj) = self.points[i], self.points[j]
+
+            # 计算距离
+            dist = np.hypot(xi - xj, yi - yj)
+
+            # 绘制连接线
+            line, = self.axes.plot(
+                [xi, xj], [yi, yj],
+                color='blue', linewidth=1.5, animated=True
+            )
+            self.lines.append(line)
+
+            # 显示距离
+            annot = self.axes.text(
+                (xi + xj) / 2, (yi + yj) / 2, f"距离: {dist:.3f}",
+                color='blue', fontsize=10, fontweight='bold', animated=True
+            )
+            self.annotations.append(annot)
+
+            # 记录操作历史
+            self.operations.append({
+                'points': self.selected_indices.copy(),
+                'line': line,
+                'annotation': annot,
+                'labels': [self.point_labels[-2], self.point_labels[-1]]
+            })
+
+            # 重置选中状态，准备下一次选择
+            self.selected_indices = []
+
+        # 更新显示
+        self._blit()
+
+    # 框选/套索回调
+    def on_rect_select(self, eclick, erelease):
+        if self.index is None or eclick.xdata is None or erelease.xdata is None:
+            return
+        self.setRegionSelection(self.index.in_rect(eclick.xdata, erelease.xdata, eclick.ydata, erelease.ydata))
+
+    def on_lasso_select(self, vertices):
+        if self.index is None:
+            return
+        self.setRegionSelection(self.index.in_polygon(vertices))
+
+    def setRegionSelection(self, indices):
+        """高亮一组点（框选、套索或近邻查询的结果）"""
+        self.region_indices = np.asarray(indices, dtype=np.intp)
+        self._set_highlight(self.region_indices)
+        print(f"选中 {len(self.region_indices)} 个点")
+        self._blit()
+
+    def setMode(self, mode: str):
+        """切换选择模式：point | rect | lasso"""
+        self.mode = mode
+        self.rect_selector.set_active(mode == 'rect')
+        self.lasso_selector.set_active(mode == 'lasso')
+        print(f"选择模式: {mode}")
+
+    def highlightNeighbors(self, ind: int = None, k: int = None):
+        """高亮某个点（默认最近一次点选的点）在嵌入空间中的 k 个最近邻"""
+        ind = self.last_index if ind is None else ind
+        if self.index is None or ind is None:
+            print("请先点选一个点")
+            return
+        neighbors = self.index.knn(ind, self.k_neighbors if k is None else k)
+        print(f"{self.names[ind]} 的近邻: {[self.names[i] for i in neighbors]}")
+        self.setRegionSelection(np.concatenate([[ind], neighbors]))
+
+    # 键盘事件：撤销上一次操作、切换模式、近邻查询
+    def on_key(self, event):
+        if event.key in ('p', 'escape'):
+            self.setMode('point')
+        elif event.key == 'r':
+            self.setMode('rect')
+        elif event.key == 'l':
+            self.setMode('lasso')
+        elif event.key == 'n':
+            self.highlightNeighbors()
+        elif event.key == 'z':  # 撤销
+            # 先撤销区域选择
+            if len(self.region_indices):
+                self.region_indices = np.empty(0, dtype=np.intp)
+                self._set_highlight(self.selected_indices)
+                self._blit()
+                return
+
+            if not self.operations and not self.selected_indices:
+                print("没有可撤销的操作")
+                return
+
+            # 处理未完成的选择（只选了一个点）
+            if self.selected_indices:
+                print(f"撤销未完成的选择，清除 {len(self.selected_indices)} 个点")
+                # 清除选中状态
+                if self.point_labels:
+                    for label in self.point_labels[-len(self.selected_indices):]:
+                        label.remove()
+                    del self.point_labels[-len(self.selected_indices):]
+
+                # 恢复点颜色
+                self._set_highlight([])
+
+                # 重置选中列表
+                self.selected_indices = []
+                self._blit()
+                return
+
+            # 处理已完成的操作
+            if self.operations:
+                last_op = self.operations.pop()
+                print(f"撤销上一次操作，清除 {len(last_op['points'])} 个点的标记")
+
+                # 移除连接线
+                if last_op['line'] in self.lines:
+                    last_op['line'].remove()            # 删除图像
+                    self.lines.remove(last_op['line'])  # 删除内存中的线
+
+                # 移除距离标注
+                if last_op['annotation'] in self.annotations:
+                    last_op['annotation'].remove()
+                    self.annotations.remove(last_op['annotation'])
+
+                # 移除点标签
+                for label in last_op['labels']:
+                    if label in self.point_labels:
+                        label.remove()
+                        self.point_labels.remove(label)
+
+                # 恢复点颜色
+                self._set_highlight([])
+
+                self._blit()
+
+    # 鼠标滚轮事件：实现缩放功能
+    def on_scroll(self, event):
+        # 获取当前坐标轴范围
+        cur_xlim = self.axes.get_xlim()
+        cur_ylim = self.axes.get_ylim()
+
+        # 获取鼠标在数据坐标系中的位置
+        if event.xdata is None or event.ydata is None:
+            return  # 鼠标在绘图区域外时不响应
+
+        xdata = event.xdata
+        ydata = event.ydata
+
+        # 缩放因子
+        scale_factor = 1.1
+        if event.button == 'down':
+            scale_factor = 1 / scale_factor
+
+        # 计算新的坐标轴范围
+        new_width = (cur_xlim[1] - cur_xlim[0]) / scale_factor
+        new_height = (cur_ylim[1] - cur_ylim[0]) / scale_factor
+
+        # 计算新的起点
+        new_x_start = xdata - (xdata - cur_xlim[0]) / scale_factor
+        new_y_start = ydata - (ydata - cur_ylim[0]) / scale_factor
+
+        # 设置新的范围
+        self.axes.set_xlim(new_x_start, new_x_start + new_width)
+        self.axes.set_ylim(new_y_start, new_y_start + new_height)
+
+        # 按新视野更新多分辨率显示，并合并连续滚轮刻度的重绘
+        self._update_lod()
+        self.canvas.draw_idle()
+
+
+class HeatmapWidget(QWidget):
+    """
+    距离矩阵热图组件，基于多分辨率金字塔按视野取图，支持滚轮缩放与左键拖动平移
+
+    :function setMatrix: 传入距离矩阵 DataFrame（可以是 memmap 支撑的）绘制热图
+    """
+    pyramidReady = pyqtSignal()
+
+    def __init__(self, parent=None, how: str = "mean", max_side: int = 512):
+        super().__init__(parent)
+        self.how = how
+        self.max_side = max_side
+        self.pyramid = None
+        self.labels = None
+        self.image = None
+        self.colorbar = None
+        self._drag = None
+
+        # 创建matplotlib图形和画布
+        self.figure = Figure(figsize=(8, 6), dpi=100)
+        self.canvas = FigureCanvas(self.figure)
+        self.axes = self.figure.add_subplot(111)
+        self.figure.patch.set_facecolor('white')
+
+        # 设置布局
+        self.vlayout = QVBoxLayout(self)
+        self.vlayout.addWidget(self.canvas)
+        self.setLayout(self.vlayout)
+
+        # 视野变化后合并刷新，避免每个滚轮刻度都取一次图
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(30)
+        self._refresh_timer.timeout.connect(self.refresh)
+        self.pyramidReady.connect(self.refresh)
+
+        # 绑定事件
+        self.canvas.mpl_connect('scroll_event', self.on_scroll)
+        self.canvas.mpl_connect('button_press_event', self.on_press)
+        self.canvas.mpl_connect('motion_notify_event', self.on_motion)
+        self.canvas.mpl_connect('button_release_event', self.on_release)
+
+    def setMatrix(self, matrix: pd.DataFrame, title: str = '热图'):
+        """设置要显示的矩阵，先显示抽样预览，金字塔在后台线程构建。
+        matrix 也可以是矩阵视图（例如按聚类顺序重排的 IndexedMatrix），金字塔按块从视图读取，不复制原矩阵"""
+        if matrix is None or not isinstance(matrix, (pd.DataFrame, MatrixView)) or matrix.empty:
+            print("数据无效，请传入有效的 pandas DataFrame")
+            return
+
+        self.labels = matrix.index.tolist()
+        values = matrix if isinstance(matrix, MatrixView) else matrix.to_numpy()
+        self.pyramid = MatrixPyramid(values, how=self.how)
+        n_rows, n_cols = self.pyramid.shape
+
+        image, extent = self.pyramid.preview(self.max_side)
+        self.axes.clear()
+        self.image = self.axes.imshow(image, extent=extent, cmap='viridis',
+                                      interpolation='nearest', aspect='auto')
+        if self.colorbar is not None:
+            self.colorbar.remove()
+        self.colorbar = self.figure.colorbar(self.image, ax=self.axes)
+        self.axes.set_xlim(0, n_cols)
+        self.axes.set_ylim(n_rows, 0)
+        self.axes.set_title(title)
+
+        # 变量不多时显示标签
+        if n_rows <= 50:
+            self.axes.set_yticks(np.arange(n_rows) + 0.5, [str(v) for v in self.labels], fontsize=7)
+            self.axes.set_xticks(np.arange(n_cols) + 0.5, [str(v) for v in matrix.columns], fontsize=7, rotation=90)
+        self.canvas.draw_idle()
+
+        threading.Thread(target=self._build_pyramid, args=(self.pyramid,), daemon=True).start()
+
+    def _build_pyramid(self, pyramid):
+        """后台线程：构建金字塔，完成后通过信号通知界面线程刷新"""
+        pyramid.build()
+        if pyramid is self.pyramid:
+            self.pyramidReady.emit()
+
+    def refresh(self):
+        """按当前视野从金字塔取图并重绘"""
+        if self.pyramid is None or self.image is None:
+            return
+        x0, x1 = sorted(self.axes.get_xlim())
+        y0, y1 = sorted(self.axes.get_ylim())
+        image, extent = self.pyramid.region(y0, y1, x0, x1, self.max_side)
+        self.image.set_data(image)
+        self.image.set_extent(extent)
+        self.canvas.draw_idle()
+
+    # 鼠标滚轮事件：以鼠标位置为中心缩放
+    def on_scroll(self, event):
+        if event.xdata is None or event.ydata is None:
+            return
+        scale_factor = 1.2 if event.button == 'up' else 1 / 1.2
+        cur_xlim = self.axes.get_xlim()
+        cur_ylim = self.axes.get_ylim()
+        self.axes.set_xlim([event.xdata + (x - event.xdata) / scale_factor for x in cur_xlim])
+        self.axes.set_ylim([event.ydata + (y - event.ydata) / scale_factor for y in cur_ylim])
+        self.canvas.draw_idle()
+        self._refresh_timer.start()
+
+    # 左键拖动平移
+    def on_press(self, event):
+        if event.button == 1 and event.inaxes == self.axes:
+            inv = self.axes.transData.inverted().frozen()
+            self._drag = (inv.transform((event.x, event.y)), inv, self.axes.get_xlim(), self.axes.get_ylim())
+
+    def on_motion(self, event):
+        if self._drag is None:
+            return
+        (dx0, dy0), inv, xlim, ylim = self._drag
+        dx1, dy1 = inv.transform((event.x, event.y))
+        self.axes.set_xlim(xlim[0] - (dx1 - dx0), xlim[1] - (dx1 - dx0))
+        self.axes.set_ylim(ylim[0] - (dy1 - dy0), ylim[1] - (dy1 - dy0))
+        self.canvas.draw_idle()
+        self._refresh_timer.start()
+
+    def on_release(self, event):
+        self._drag = None
+
+
+# 为了确保PyQt的焦点设置生效，需要导入Qt
+from PyQt5.QtCore import Qt
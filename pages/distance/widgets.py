@@ -1,15 +1,19 @@
+from collections import OrderedDict
+from contextlib import nullcontext
+
 from PyQt5.QtGui import QShowEvent
-from PyQt5.QtWidgets import QWidget, QApplication, QVBoxLayout, QFileDialog
-from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtWidgets import QWidget, QApplication, QVBoxLayout, QHBoxLayout, QFileDialog
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, pyqtSignal
 
-from qfluentwidgets import TableView
+from qfluentwidgets import TableView, PushButton, CheckBox, BodyLabel, SpinBox, LineEdit
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-from matplotlib import rcParams
+
+from core.trace import span, TRACER, set_memory_tracking
+from core.matrix import MatrixView
+from core.runtime import get_runtime, cpu_count, thread_info
+from core.planner import format_size
 
 
 class FileDialog(QFileDialog):
@@ -44,13 +48,90 @@ class FileDialog(QFileDialog):
         self.move(x, y)
     
 
+# 浮点格式化的 ufunc，整块调用以减少逐元素的 Python 分派
+_format_float = np.frompyfunc("{:.6f}".format, 1, 1)
+
+
+def _header_labels(index: pd.Index) -> list:
+    """把行/列索引转为表头字符串；多级索引（如 topk 长表的 (source, target)）的各级以 " / " 连接"""
+    if isinstance(index, pd.MultiIndex):
+        return [" / ".join(str(level) for level in key) for key in index]
+    return index.astype(str).tolist()
+
+
 class DataFrameModel(QAbstractTableModel):
     """
     基于 QAbstractTableModel 的自定义数据模型，用于将 pandas DataFrame 转换为表格视图
+
+    单元格文本按 BLOCK_ROWS × BLOCK_COLS 的块批量格式化并缓存，视图只请求可见单元格，
+    因此只有可见区域附近的块会被格式化；缓存超过 MAX_BLOCKS 时按最近最少使用淘汰。
     """
-    def __init__(self, df: pd.DataFrame, parent=None):
+    BLOCK_ROWS = 64
+    BLOCK_COLS = 32
+    MAX_BLOCKS = 256
+
+    def __init__(self, df: pd.DataFrame, parent=None, traced: bool = True):
         super().__init__(parent)
+        # 是否把块格式化记录为 table.format_block 跨度
+        self.traced = traced
+        self._blocks = OrderedDict()
+        self._load(df)
+
+    def _load(self, df):
+        """绑定 DataFrame，并准备 numpy 视图与表头字符串"""
         self._df = df if df is not None else pd.DataFrame()
+        self._blocks.clear()
+
+        # 单一 dtype 时 to_numpy 不复制（对 memmap 同样成立）；混合 dtype 时按列保存；
+        # 矩阵视图（IndexedMatrix、LazyDistanceMatrix）本身支持按块取值，直接使用
+        if isinstance(self._df, MatrixView):
+            self._values = self._df
+            self._columns = None
+        elif self._df.shape[1] and len(set(self._df.dtypes)) == 1:
+            self._values = self._df.to_numpy()
+            self._columns = None
+        else:
+            self._values = None
+            self._columns = [self._df.iloc[:, j].to_numpy() for j in range(self._df.shape[1])]
+
+        self._row_headers = _header_labels(self._df.index)
+        self._col_headers = _header_labels(self._df.columns)
+
+    @staticmethod
+    def _format(values: np.ndarray) -> np.ndarray:
+        """把一块数值批量格式化为字符串数组"""
+        if values.dtype.kind == "f":
+            out = _format_float(values)
+            out[np.isnan(values)] = "NaN"
+        elif values.dtype.kind in "iub":
+            out = values.astype(str)
+        else:
+            out = np.vectorize(str, otypes=[object])(values)
+            out[pd.isna(values)] = "NaN"
+        return out
+
+    def _block(self, br: int, bc: int) -> list:
+        """取出（必要时生成）第 (br, bc) 块的文本"""
+        key = (br, bc)
+        block = self._blocks.get(key)
+        if block is not None:
+            self._blocks.move_to_end(key)
+            return block
+
+        r0, c0 = br * self.BLOCK_ROWS, bc * self.BLOCK_COLS
+        r1 = min(r0 + self.BLOCK_ROWS, self._df.shape[0])
+        c1 = min(c0 + self.BLOCK_COLS, self._df.shape[1])
+        with span("table.format_block") if self.traced else nullcontext():
+            if self._values is not None:
+                block = self._format(np.asarray(self._values[r0:r1, c0:c1])).tolist()
+            else:
+                cols = [self._format(np.asarray(col[r0:r1])) for col in self._columns[c0:c1]]
+                block = np.stack(cols, axis=1).tolist()
+
+        self._blocks[key] = block
+        if len(self._blocks) > self.MAX_BLOCKS:
+            self._blocks.popitem(last=False)
+        return block
 
     def rowCount(self, parent=QModelIndex()):
         """返回行数"""
@@ -64,23 +145,16 @@ class DataFrameModel(QAbstractTableModel):
         """返回指定索引的数据"""
         if not index.isValid():
             return None
-            
-        row = index.row()
-        col = index.column()
 
         if role == Qt.DisplayRole:
+            row = index.row()
+            col = index.column()
             try:
-                value = self._df.iat[row, col]
-                # 处理不同的数据类型
-                if pd.isna(value):
-                    return "NaN"
-                elif isinstance(value, float):
-                    return f"{value:.6f}"  # 保留6位小数
-                else:
-                    return str(value)
+                block = self._block(row // self.BLOCK_ROWS, col // self.BLOCK_COLS)
+                return block[row % self.BLOCK_ROWS][col % self.BLOCK_COLS]
             except Exception as e:
                 return "Error"
-        
+
         return None
 
     def headerData(self, section, orientation, role=Qt.DisplayRole):
@@ -88,22 +162,24 @@ class DataFrameModel(QAbstractTableModel):
         if role == Qt.DisplayRole:
             try:
                 if orientation == Qt.Horizontal:
-                    return str(self._df.columns[section])
+                    return self._col_headers[section]
                 else:  # Qt.Vertical(行头)
-                    return str(self._df.index[section])
-            except Exception:
+                    return self._row_headers[section]
+            except IndexError:
                 pass
         return None
-    
+
     def setDataFrame(self, df):
         """更新 DataFrame 数据"""
         self.beginResetModel()
-        self._df = df if df is not None else pd.DataFrame()
+        self._load(df)
         self.endResetModel()
-    
+
     def getDataFrame(self):
-        """获取当前的 DataFrame"""
-        return self._df.copy() if not self._df.empty else pd.DataFrame()
+        """获取当前的 DataFrame（矩阵视图会按显示顺序物化）"""
+        if self._df.empty:
+            return pd.DataFrame()
+        return self._df.to_frame() if isinstance(self._df, MatrixView) else self._df.copy()
 
 
 class tableWidget(QWidget):
@@ -128,9 +204,9 @@ class tableWidget(QWidget):
     def addItem(self, dataframe: pd.DataFrame):
         """
         添加 pandas DataFrame 数据到表格
-        :param dataframe: pandas DataFrame 对象
+        :param dataframe: pandas DataFrame 对象，或按块取值的矩阵视图（MatrixView）
         """
-        if dataframe is None or not isinstance(dataframe, pd.DataFrame):
+        if dataframe is None or not isinstance(dataframe, (pd.DataFrame, MatrixView)):
             print("数据无效，请传入有效的 pandas DataFrame")
             return
 
@@ -161,343 +237,171 @@ class tableWidget(QWidget):
         return pd.DataFrame()
 
 
-class PlotWidget(QWidget):
+class LazyWidget(QWidget):
     """
-    集成matplotlib的绘图组件，支持点选择、距离计算、撤销和缩放功能
-
-    :function plotPoints: 传入包含点坐标的pandas DataFrame绘制散点图
-    :function clearPlot: 清空当前绘图
-    :function setTitle: 设置图表标题
-    :function setAxisLabels: 设置坐标轴标签
+    延迟构建的占位组件，首次显示时才调用工厂函数创建真正的内容
+    :param factory: 无参可调用对象，返回要嵌入的 QWidget
     """
-
-    def __init__(self, parent=None):
+    def __init__(self, factory, parent=None):
         super().__init__(parent)
+        self._factory = factory
+        self.content = None
 
-        # 设置中文字体
-        rcParams["font.family"] = "sans-serif"
-        rcParams["font.sans-serif"] = ["Microsoft YaHei", "SimHei", "Noto Sans CJK SC"]
-        rcParams["axes.unicode_minus"] = False  # 负号正常显示
-
-        # 创建matplotlib图形和画布
-        self.figure = Figure(figsize=(8, 6), dpi=100)
-        self.canvas = FigureCanvas(self.figure)
-        self.axes = self.figure.add_subplot(111)
-
-        # 设置布局
         self.vlayout = QVBoxLayout(self)
-        self.vlayout.addWidget(self.canvas)
+        self.vlayout.setContentsMargins(0, 0, 0, 0)
         self.setLayout(self.vlayout)
 
-        # 设置默认样式
-        self.figure.patch.set_facecolor('white')
-        self.axes.grid(True, alpha=0.3)
-        self.axes.set_axisbelow(True)
-
-        # 初始化默认标签
-        self.axes.set_xlabel('X坐标')
-        self.axes.set_ylabel('Y坐标')
-        self.axes.set_title('散点图')
-        self.hint_text = self.axes.text(
-            0.01, 0.01,  # 位置（左下角，相对坐标）
-            "按 Z 键撤销标注",
-            fontsize=14,
-            color='green',
-            transform=self.axes.transAxes,  # 使用相对坐标（0-1 范围）
-            verticalalignment='bottom',  # 垂直对齐方式
-            bbox=dict(facecolor='white', edgecolor='none', alpha=0.7)  # 白色背景框，增加可读性
-        )
-
-        # 交互功能变量初始化
-        self.scatter = None  # 散点图对象
-        self.coordinates = None  # 存储坐标数据
-        self.names = None  # 点名称
-        self.x_col = None  # x列名
-        self.y_col = None  # y列名
-
-        # 交互状态变量
-        self.selected_indices = []  # 当前选中的点索引
-        self.annotations = []  # 所有标注对象
-        self.lines = []  # 所有连接线
-        self.point_labels = []  # 点标签
-        self.operations = []  # 操作历史记录
-
-        # 绑定事件
-        self.cid_pick = self.canvas.mpl_connect('pick_event', self.on_pick)
-        self.cid_key = self.canvas.mpl_connect('key_press_event', self.on_key)
-        self.cid_scroll = self.canvas.mpl_connect('scroll_event', self.on_scroll)
-
-        # 确保画布获得焦点以接收键盘事件
-        self.canvas.setFocusPolicy(Qt.StrongFocus)
-        self.canvas.setFocus()
-
-    def plotPoints(self, coordinates: pd.DataFrame, x_col=None, y_col=None,
-                   color='skyblue', marker='o', size=50, alpha=0.7, label=None,
-                   names=None):
-        """绘制点坐标散点图，支持交互选择和距离计算"""
-        if coordinates is None or not isinstance(coordinates, pd.DataFrame):
-            print("数据无效，请传入有效的 pandas DataFrame")
-            return
+    def showEvent(self, a0: QShowEvent) -> None:
+        super().showEvent(a0)
+        if self.content is None:
+            self.content = self._factory()
+            self.vlayout.addWidget(self.content)
 
-        if coordinates.empty:
-            print("DataFrame 为空")
-            return
 
-        # 保存数据供交互使用
-        self.coordinates = coordinates.copy()
-        self.names = coordinates.index.tolist()
+class TracePanel(QWidget):
+    """
+    实时的分阶段耗时面板，定时读取全局 Tracer 的汇总并刷新表格
+    :param interval: 刷新间隔（毫秒），记录无变化时跳过刷新
+    :function exportRequested: 点击“导出 Trace”时发出，由控制器弹出保存对话框
+    """
+    exportRequested = pyqtSignal()
 
-        # 确定 x和 y列
-        columns = coordinates.columns.tolist()
-        if len(columns) < 2:
-            print("DataFrame 至少需要两列数据作为x和y坐标")
-            return
+    def __init__(self, interval: int = 500, parent=None):
+        super().__init__(parent)
+        self._version = -1
+
+        # 操作栏
+        self.exportButton = PushButton("导出 Trace", self)
+        self.clearButton = PushButton("清空", self)
+        self.memoryCheckBox = CheckBox("跟踪内存", self)
+        self.memoryCheckBox.setChecked(TRACER.memory)
+        self.statusLabel = BodyLabel("", self)
+
+        toolbar = QHBoxLayout()
+        toolbar.addWidget(self.exportButton)
+        toolbar.addWidget(self.clearButton)
+        toolbar.addWidget(self.memoryCheckBox)
+        toolbar.addStretch(1)
+        toolbar.addWidget(self.statusLabel)
+
+        self.table = tableWidget(self)
+        # 面板自身的渲染不记录，否则每次刷新都会产生新记录而反复刷新
+        self.model = DataFrameModel(pd.DataFrame(), traced=False)
+        self.table.table.setModel(self.model)
 
-        if x_col is None:
-            x_col = columns[0]
-        if y_col is None:
-            y_col = columns[1]
+        self.vlayout = QVBoxLayout(self)
+        self.vlayout.addLayout(toolbar)
+        self.vlayout.addWidget(self.table)
+        self.setLayout(self.vlayout)
 
-        if x_col not in columns or y_col not in columns:
-            print(f"指定的列名不存在。可用列: {columns}")
-            return
+        self.exportButton.clicked.connect(self.exportRequested.emit)
+        self.clearButton.clicked.connect(TRACER.clear)
+        self.memoryCheckBox.stateChanged.connect(lambda state: set_memory_tracking(state == Qt.Checked))
 
-        # 保存列名
-        self.x_col = x_col
-        self.y_col = y_col
-
-        try:
-            # 获取 x和 y数据
-            x_data = coordinates[x_col].to_numpy()
-            y_data = coordinates[y_col].to_numpy()
-
-            # 清空之前的绘图和状态
-            self.clearPlot()
-
-            # 绘制散点图，开启拾取功能
-            self.scatter = self.axes.scatter(
-                x_data, y_data,
-                c=color, marker=marker,
-                s=size, alpha=alpha,
-                label=label,
-                picker=True  # 开启拾取功能
-            )
-
-            # 重新设置标签和网格
-            self.axes.set_xlabel(x_col)
-            self.axes.set_ylabel(y_col)
-            self.axes.set_title('散点图')
-            self.axes.grid(True, alpha=0.3)
-
-            # 如果有标签，显示图例
-            if label:
-                self.axes.legend()
-
-            # 刷新画布
-            self.canvas.draw()
-            print(f"已绘制 {len(x_data)} 个点，等待交互...")
-
-        except Exception as e:
-            print(f"绘图时发生错误: {str(e)}")
-
-    def clearPlot(self):
-        """清空当前绘图"""
-        self.axes.clear()
-        self.scatter = None
-        self.selected_indices = []
-        self.annotations = []
-        self.lines = []
-        self.point_labels = []
-        self.operations = []
-        # 重置标签
-        self.axes.set_xlabel(self.x_col if self.x_col else 'X坐标')
-        self.axes.set_ylabel(self.y_col if self.y_col else 'Y坐标')
-        self.axes.grid(True, alpha=0.3)
-        # 保留提示
-        self.hint_text = self.axes.text(
-            0.01, 0.01,
-            "按Z键撤销标注",
-            fontsize=14,
-            color='green',
-            transform=self.axes.transAxes,
-            verticalalignment='bottom',
-            bbox=dict(facecolor='white', edgecolor='none', alpha=0.7)
-        )
-        self.canvas.draw()
-
-    def setTitle(self, title: str):
-        """设置图表标题"""
-        self.axes.set_title(title)
-        self.canvas.draw()
-
-    def setAxisLabels(self, x_label: str, y_label: str):
-        """设置坐标轴标签"""
-        self.axes.set_xlabel(x_label)
-        self.axes.set_ylabel(y_label)
-        self.x_col = x_label
-        self.y_col = y_label
-        self.canvas.draw()
-
-    # 点击事件回调：选择点并计算距离
-    def on_pick(self, event):
-        # 确保我们只处理散点图的拾取事件
-        if self.scatter is None or event.artist != self.scatter:
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start()
+        self.refresh()
+
+    def refresh(self):
+        """Tracer 有新记录时重建汇总表"""
+        if TRACER.version == self._version or not self.isVisible() and self._version >= 0:
             return
+        self._version = TRACER.version
+
+        rows = []
+        for name, s in TRACER.summary().items():
+            rows.append({
+                "阶段": "    " * s["depth"] + name,
+                "次数": str(s["count"]),
+                "总耗时 (ms)": f"{s['total'] * 1e3:.2f}",
+                "最近 (ms)": f"{s['last'] * 1e3:.2f}",
+                "最大 (ms)": f"{s['max'] * 1e3:.2f}",
+                "峰值内存 (MB)": "" if s["peak_mb"] is None else f"{s['peak_mb']:.2f}",
+            })
+        df = pd.DataFrame(rows)
+        if not df.empty:
+            df = df.set_index("阶段")
+        self.model.setDataFrame(df)
+        self.table.table.resizeColumnsToContents()
+        self.statusLabel.setText(f"{len(rows)} 个阶段")
 
-        # 忽略滚轮等其他事件   mouseevent———— 1-左键  2-滚轮  3-右键
-        if hasattr(event, 'mouseevent') and event.mouseevent.button != 1:
-            return  # 不是左键点击，直接返回，不处理
 
-        # 获取点击的点索引
-        ind = event.ind[0]
+class RuntimePanel(QWidget):
+    """
+    计算资源设置面板：进程数、每进程 BLAS 线程数、内存预算与临时目录（见 core.runtime）
+    :function applyRequested: 点击“应用”时发出，参数为 RuntimeConfig 的构造参数（dict），由控制器校验并生效
+    """
+    applyRequested = pyqtSignal(dict)
 
-        # 防止重复选择同一点
-        if ind in self.selected_indices:
-            return
+    def __init__(self, parent=None):
+        super().__init__(parent)
 
-        # 添加到选中列表
-        self.selected_indices.append(ind)
-        print(f"选中点索引: {ind}，当前选中 {len(self.selected_indices)} 个点")
-
-        # 获取点数据
-        x_data = self.coordinates[self.x_col].to_numpy()
-        y_data = self.coordinates[self.y_col].to_numpy()
-
-        # 将选中的点设为红色
-        colors = ['red' if i in self.selected_indices else 'skyblue' for i in range(len(x_data))]
-        self.scatter.set_color(colors)
-
-        # 显示点信息
-        label = self.axes.text(
-            x_data[ind], y_data[ind],
-            f"{self.names[ind]}\n({x_data[ind]:.3f},{y_data[ind]:.3f})",
-            fontsize=9, color='blue', fontweight='bold'
-        )
-        self.point_labels.append(label)
-
-        # 当选中2个点时，绘制连接线和距离
-        if len(self.selected_indices) == 2:
-            i, j = self.selected_indices
-
-            # 计算距离
-            dist = np.sqrt((x_data[i] - x_data[j]) ** 2 + (y_data[i] - y_data[j]) ** 2)
-
-            # 绘制连接线
-            line, = self.axes.plot(
-                [x_data[i], x_data[j]], [y_data[i], y_data[j]],
-                color='blue', linewidth=1.5
-            )
-            self.lines.append(line)
-
-            # 显示距离
-            mid_x = (x_data[i] + x_data[j]) / 2
-            mid_y = (y_data[i] + y_data[j]) / 2
-            annot = self.axes.text(
-                mid_x, mid_y, f"距离: {dist:.3f}",
-                color='blue', fontsize=10, fontweight='bold'
-            )
-            self.annotations.append(annot)
-
-            # 记录操作历史
-            self.operations.append({
-                'points': self.selected_indices.copy(),
-                'line': line,
-                'annotation': annot,
-                'labels': [self.point_labels[-2], self.point_labels[-1]]
-            })
+        # 0 显示为“自动”
+        self.workersSpinBox = SpinBox(self)
+        self.workersSpinBox.setRange(0, 512)
+        self.workersSpinBox.setSpecialValueText("自动")
+        self.threadsSpinBox = SpinBox(self)
+        self.threadsSpinBox.setRange(0, 512)
+        self.threadsSpinBox.setSpecialValueText("自动")
+        self.budgetLineEdit = LineEdit(self)
+        self.budgetLineEdit.setPlaceholderText("自动（可用内存的一半），如 4G")
+        self.scratchLineEdit = LineEdit(self)
+        self.scratchLineEdit.setPlaceholderText("系统临时目录")
+        self.browseButton = PushButton("浏览", self)
+        self.applyButton = PushButton("应用", self)
+        self.resetButton = PushButton("重置", self)
+        self.statusLabel = BodyLabel("", self)
+        self.statusLabel.setWordWrap(True)
+
+        self.vlayout = QVBoxLayout(self)
+        rows = (("进程数", self.workersSpinBox), ("每进程 BLAS 线程", self.threadsSpinBox),
+                ("内存预算", self.budgetLineEdit), ("临时目录", self.scratchLineEdit, self.browseButton))
+        for text, *widgets in rows:
+            row = QHBoxLayout()
+            label = BodyLabel(text, self)
+            label.setMinimumWidth(120)
+            row.addWidget(label)
+            for widget in widgets:
+                row.addWidget(widget, 1 if widget is not self.browseButton else 0)
+            self.vlayout.addLayout(row)
+        toolbar = QHBoxLayout()
+        toolbar.addWidget(self.applyButton)
+        toolbar.addWidget(self.resetButton)
+        toolbar.addStretch(1)
+        self.vlayout.addLayout(toolbar)
+        self.vlayout.addWidget(self.statusLabel)
+        self.vlayout.addStretch(1)
+        self.setLayout(self.vlayout)
+
+        self.browseButton.clicked.connect(self.browse)
+        self.applyButton.clicked.connect(lambda: self.applyRequested.emit(self.values()))
+        self.resetButton.clicked.connect(self.refresh)
+        self.refresh()
+
+    def values(self) -> dict:
+        """当前输入对应的 RuntimeConfig 构造参数，“自动”与空白为 None"""
+        return {
+            "workers": self.workersSpinBox.value() or None,
+            "blas_threads": self.threadsSpinBox.value() or None,
+            "memory_budget": self.budgetLineEdit.text().strip() or None,
+            "scratch_dir": self.scratchLineEdit.text().strip() or None,
+        }
+
+    def browse(self):
+        """选择临时目录"""
+        path = FileDialog.getExistingDirectory(self, "选择临时目录", self.scratchLineEdit.text())
+        if path:
+            self.scratchLineEdit.setText(path)
+
+    def refresh(self):
+        """按当前生效的运行配置重置输入并刷新说明"""
+        config = get_runtime()
+        self.workersSpinBox.setValue(config.workers or 0)
+        self.threadsSpinBox.setValue(config.blas_threads or 0)
+        self.budgetLineEdit.setText(format_size(config.memory_budget) if config.memory_budget else "")
+        self.scratchLineEdit.setText(config.scratch_dir or "")
+        libraries = "、".join(f"{name} {threads} 线程" for name, threads in thread_info()) or "未检测到"
+        self.statusLabel.setText(f"当前：{config.describe()}\n本机 {cpu_count()} 核；已加载的 BLAS/OpenMP：{libraries}")
 
-            # 重置选中状态，准备下一次选择
-            self.selected_indices = []
-
-        # 更新显示
-        self.canvas.draw()
-
-    # 键盘事件：撤销上一次操作
-    def on_key(self, event):
-        if event.key == 'z':  # 撤销
-            if not self.operations and not self.selected_indices:
-                print("没有可撤销的操作")
-                return
-
-            # 处理未完成的选择（只选了一个点）
-            if self.selected_indices:
-                print(f"撤销未完成的选择，清除 {len(self.selected_indices)} 个点")
-                # 清除选中状态
-                if self.point_labels:
-                    for label in self.point_labels[-len(self.selected_indices):]:
-                        label.remove()
-                    del self.point_labels[-len(self.selected_indices):]
-
-                # 恢复点颜色
-                x_data = self.coordinates[self.x_col].to_numpy()
-                colors = ['skyblue'] * len(x_data)
-                self.scatter.set_color(colors)
-
-                # 重置选中列表
-                self.selected_indices = []
-                self.canvas.draw()
-                return
-
-            # 处理已完成的操作
-            if self.operations:
-                last_op = self.operations.pop()
-                print(f"撤销上一次操作，清除 {len(last_op['points'])} 个点的标记")
-
-                # 移除连接线
-                if last_op['line'] in self.lines:
-                    last_op['line'].remove()            # 删除图像
-                    self.lines.remove(last_op['line'])  # 删除内存中的线
-
-                # 移除距离标注
-                if last_op['annotation'] in self.annotations:
-                    last_op['annotation'].remove()
-                    self.annotations.remove(last_op['annotation'])
-
-                # 移除点标签
-                for label in last_op['labels']:
-                    if label in self.point_labels:
-                        label.remove()
-                        self.point_labels.remove(label)
-
-                # 恢复点颜色
-                x_data = self.coordinates[self.x_col].to_numpy()
-                colors = ['skyblue'] * len(x_data)
-                self.scatter.set_color(colors)
-
-                self.canvas.draw()
-
-    # 鼠标滚轮事件：实现缩放功能
-    def on_scroll(self, event):
-        # 获取当前坐标轴范围
-        cur_xlim = self.axes.get_xlim()
-        cur_ylim = self.axes.get_ylim()
-
-        # 获取鼠标在数据坐标系中的位置
-        if event.xdata is None or event.ydata is None:
-            return  # 鼠标在绘图区域外时不响应
-
-        xdata = event.xdata
-        ydata = event.ydata
-
-        # 缩放因子
-        scale_factor = 1.1
-        if event.button == 'down':
-            scale_factor = 1 / scale_factor
-
-        # 计算新的坐标轴范围
-        new_width = (cur_xlim[1] - cur_xlim[0]) / scale_factor
-        new_height = (cur_ylim[1] - cur_ylim[0]) / scale_factor
-
-        # 计算新的起点
-        new_x_start = xdata - (xdata - cur_xlim[0]) / scale_factor
-        new_y_start = ydata - (ydata - cur_ylim[0]) / scale_factor
-
-        # 设置新的范围
-        self.axes.set_xlim(new_x_start, new_x_start + new_width)
-        self.axes.set_ylim(new_y_start, new_y_start + new_height)
-
-        self.canvas.draw()
-
-
-# 为了确保PyQt的焦点设置生效，需要导入Qt
-from PyQt5.QtCore import Qt
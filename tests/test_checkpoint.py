@@ -0,0 +1,98 @@
+"""断点续算：中断后重新运行只计算未完成的分块，结果与一次算完一致"""
+import gc
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import core.checkpoint as checkpoint
+from core.checkpoint import job_status, release_job, run_job
+from core.distance import compute_distance_matrix
+
+METHODS = ["euclidean", "information"]
+
+
+class Interrupt(Exception):
+    pass
+
+
+def _data(n=30, m=25, seed=3):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=(n, m))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    values[n - 4:] = values[:4]  # 重复变量，覆盖去重后的展开
+    return pd.DataFrame(values, index=[f"v{i}" for i in range(n)], columns=[f"s{j}" for j in range(m)])
+
+
+@pytest.fixture
+def small_tiles(monkeypatch):
+    """把分块边长压到 4，小数据也能分成多块"""
+    monkeypatch.setattr(checkpoint, "MAX_TILE_ROWS", 4)
+    monkeypatch.setattr(checkpoint, "kernel_block", lambda levels: 4)
+
+
+def _interrupt_after(count):
+    """第 count 个分块完成后中断"""
+    def progress(done, total):
+        if done == count:
+            raise Interrupt()
+    return progress
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_resume_matches_uninterrupted(tmp_path, small_tiles, method):
+    data = _data()
+    expected = compute_distance_matrix(data, method)
+    job_dir = str(tmp_path / "job")
+
+    progress = _interrupt_after(3)
+    with pytest.raises(Interrupt):
+        run_job(data, method, job_dir, progress=progress)
+    status = job_status(job_dir)
+    assert not status["complete"]
+    assert 0 < status["done"] < status["total"]
+
+    calls = []
+    result = run_job(data, method, job_dir, progress=lambda done, total: calls.append(done))
+    # 只计算剩下的分块
+    assert calls[0] == status["done"] + 1
+    assert calls[-1] == status["total"]
+    assert job_status(job_dir)["complete"]
+    pd.testing.assert_index_equal(result.index, expected.index)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-10, atol=1e-12, equal_nan=True)
+
+    # 已完成的作业直接复用结果
+    again = run_job(data, method, job_dir, progress=lambda done, total: pytest.fail("不应重新计算"))
+    np.testing.assert_array_equal(again.to_numpy(), result.to_numpy())
+
+
+def test_job_dir_rejects_other_data_or_params(tmp_path, small_tiles):
+    data = _data()
+    job_dir = str(tmp_path / "job")
+    progress = _interrupt_after(1)
+    with pytest.raises(Interrupt):
+        run_job(data, "information", job_dir, progress=progress)
+
+    changed = data.copy()
+    changed.iloc[0, 0] += 1.0
+    with pytest.raises(ValueError):
+        run_job(changed, "information", job_dir)
+    with pytest.raises(ValueError):
+        run_job(data, "information", job_dir, bins=7)
+
+
+def test_release_job_removes_job_dir(tmp_path, small_tiles):
+    data = _data()
+    expected = compute_distance_matrix(data, "euclidean")
+    job_dir = str(tmp_path / "job")
+
+    result = release_job(run_job(data, "euclidean", job_dir))
+    assert not os.path.exists(job_dir)
+    path = result.attrs["path"]
+    assert os.path.exists(path)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-10, atol=1e-12, equal_nan=True)
+
+    del result
+    gc.collect()
+    assert not os.path.exists(path)
@@ -0,0 +1,51 @@
+"""层次聚类：内存与临时文件两种实现都与 scipy 一致"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.cluster import hierarchy
+from scipy.spatial.distance import squareform
+
+from core.cluster import LINKAGE_METHODS, cluster_distance
+from core.distance import compute_distance_matrix
+
+
+def _matrix(n=120, seed=0, rounded=False):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n, 8)), index=[f"v{i}" for i in range(n)])
+    dist = compute_distance_matrix(df, "euclidean")
+    if rounded:
+        # 大量并列的距离
+        dist = pd.DataFrame(np.round(dist.to_numpy()), index=dist.index, columns=dist.columns)
+    return dist
+
+
+@pytest.mark.parametrize("rounded", [False, True])
+@pytest.mark.parametrize("method", LINKAGE_METHODS)
+def test_out_of_core_matches_scipy(tmp_path, method, rounded):
+    dist = _matrix(rounded=rounded)
+    expected = hierarchy.linkage(squareform(dist.to_numpy(), checks=False), method=method)
+
+    in_memory = cluster_distance(dist, method, optimal_ordering=False)
+    out_of_core = cluster_distance(dist, method, optimal_ordering=False, budget=1, scratch_dir=str(tmp_path))
+
+    np.testing.assert_allclose(in_memory.linkage, expected)
+    np.testing.assert_allclose(out_of_core.linkage, expected)
+    assert os.listdir(tmp_path) == []
+
+
+def test_rejects_long_table_before_allocating(tmp_path):
+    df = pd.DataFrame(np.random.default_rng(0).normal(size=(40, 5)))
+    nearest = compute_distance_matrix(df, "euclidean", strategy="topk", k=3)
+    with pytest.raises(ValueError):
+        cluster_distance(nearest, budget=1, scratch_dir=str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_ordered_view_follows_leaves():
+    dist = _matrix(n=30)
+    result = cluster_distance(dist, n_clusters=3)
+    view = result.ordered(dist)
+    np.testing.assert_array_equal(np.asarray(view[:, :]), dist.to_numpy()[np.ix_(result.order, result.order)])
+    assert result.n_clusters <= 3
@@ -0,0 +1,97 @@
+"""本机计算服务：结果与进程内计算一致，拒绝伪造的上传与允许目录之外的读取"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.checkpoint import fingerprint
+from core.daemon import ComputeDaemon, DaemonClient, _float_frame
+from core.distance import compute_distance_matrix, gaussian_discretization
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="测试使用 Unix socket")
+
+AUTHKEY = "test-key"
+
+
+def _data(n=20, m=15, seed=4):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.normal(size=(n, m)), index=[f"v{i}" for i in range(n)],
+                        columns=[f"s{j}" for j in range(m)])
+
+
+@pytest.fixture
+def service(tmp_path):
+    """在线程中启动服务，只允许读取 tmp_path/allowed；返回 (客户端, 允许的目录)"""
+    allowed = tmp_path / "allowed"
+    allowed.mkdir()
+    # Unix socket 路径有长度限制，不放在 tmp_path 下
+    address = os.path.join(tempfile.mkdtemp(prefix="corr"), "d.sock")
+    daemon = ComputeDaemon(address, authkey=AUTHKEY, capacity="64M", workers=2, roots=[str(allowed)])
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not os.path.exists(address):
+        assert time.monotonic() < deadline, "计算服务未能启动"
+        time.sleep(0.01)
+    client = DaemonClient(address, authkey=AUTHKEY)
+    yield client, allowed
+    client.shutdown()
+    client.close()
+    thread.join(timeout=10)
+    os.rmdir(os.path.dirname(address))
+
+
+@pytest.mark.parametrize("method", ["euclidean", "information"])
+def test_distance_matches_in_process(service, method):
+    client, _ = service
+    data = _data()
+    result = client.distance(data, method)
+    expected = compute_distance_matrix(data, method)
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-12)
+    # 第二次请求命中缓存
+    hits = client.stats()["hits"]
+    client.distance(data, method)
+    assert client.stats()["hits"] > hits
+
+
+def test_discretize_matches_in_process(service):
+    client, _ = service
+    data = _data()
+    result = client.discretize(data, sigma=0.5, bins=5)
+    expected = gaussian_discretization(data, sigma=0.5, bins=5)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(dtype=np.float64))
+    pd.testing.assert_index_equal(result.index, expected.index)
+
+
+def test_forged_put_is_rejected(service):
+    client, _ = service
+    victim, forged = _data(seed=4), _data(seed=5)
+    fp = fingerprint(_float_frame(victim))
+    with pytest.raises(ValueError):
+        client._request("put", fp, forged.to_numpy(), forged.index, forged.columns)
+    # 指纹下没有登记伪造的数据，真正的数据仍得到正确结果
+    pd.testing.assert_frame_equal(client.distance(victim, "euclidean"), compute_distance_matrix(victim, "euclidean"),
+                                  check_exact=False, rtol=1e-12)
+
+
+def test_load_only_within_allowed_roots(service, tmp_path):
+    client, allowed = service
+    data = _data()
+    inside, outside = allowed / "data.csv", tmp_path / "secret.csv"
+    data.to_csv(inside)
+    data.to_csv(outside)
+
+    loaded = client.load(str(inside))
+    np.testing.assert_allclose(loaded.to_numpy(), data.to_numpy())
+    with pytest.raises(ValueError):
+        client.load(str(outside))
+    # 符号链接按解析后的路径判断
+    link = allowed / "link.csv"
+    link.symlink_to(outside)
+    with pytest.raises(ValueError):
+        client.load(str(link))
@@ -0,0 +1,100 @@
+"""距离矩阵：缺失值、执行策略、去重展开与矩形距离"""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics.pairwise import nan_euclidean_distances
+
+from core.distance import compute_distance_matrix, cross_distance
+from core.matrix import IndexedMatrix
+
+METHODS = ["euclidean", "information"]
+
+
+def _data(n=40, m=30, seed=0, nan=0.1, duplicates=0):
+    """n 个变量；最后 duplicates 个变量复制自前面的变量（含常数变量）"""
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=(n, m))
+    if nan:
+        values[rng.random(values.shape) < nan] = np.nan
+    if duplicates:
+        values[1] = 3.0
+        values[2] = -1.0
+        values[n - duplicates:] = values[rng.integers(0, n - duplicates, size=duplicates)]
+    return pd.DataFrame(values, index=[f"v{i}" for i in range(n)], columns=[f"s{j}" for j in range(m)])
+
+
+def test_nan_euclidean_matches_sklearn():
+    data = _data(nan=0.2)
+    data.iloc[0, :] = np.nan
+    data.iloc[0, 0] = 1.0  # 与其他变量几乎没有共同观测
+
+    dist = compute_distance_matrix(data, "euclidean")
+    expected = nan_euclidean_distances(data.to_numpy())
+    np.fill_diagonal(expected, 0.0)
+    np.testing.assert_allclose(dist.to_numpy(), expected, rtol=1e-10, atol=1e-10, equal_nan=True)
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_tiled_matches_dense(tmp_path, method):
+    data = _data()
+    dense = compute_distance_matrix(data, method)
+    tiled = compute_distance_matrix(data, method, strategy="tiled", scratch_dir=str(tmp_path))
+    assert tiled.attrs["path"].startswith(str(tmp_path))
+    np.testing.assert_allclose(tiled.to_numpy(), dense.to_numpy(), rtol=1e-10, atol=1e-12, equal_nan=True)
+    pd.testing.assert_index_equal(tiled.index, dense.index)
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_topk_keeps_nearest_neighbours(method):
+    data = _data(nan=0.0)
+    dense = compute_distance_matrix(data, method).to_numpy()
+    k = 5
+    topk = compute_distance_matrix(data, method, strategy="topk", k=k)
+
+    assert list(topk.index.names) == ["source", "target"]
+    for i, label in enumerate(data.index):
+        neighbours = topk.loc[label, "distance"]
+        assert len(neighbours) == k
+        assert label not in neighbours.index
+        assert neighbours.is_monotonic_increasing
+        row = np.delete(dense[i], i)
+        np.testing.assert_allclose(neighbours.to_numpy(), np.sort(row)[:k], rtol=1e-10, atol=1e-12)
+        positions = data.index.get_indexer(neighbours.index)
+        np.testing.assert_allclose(dense[i, positions], neighbours.to_numpy(), rtol=1e-10, atol=1e-12)
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_dedup_expansion_matches_plain(tmp_path, method):
+    data = _data(duplicates=10)
+    plain = compute_distance_matrix(data, method, dedup=False)
+
+    dedup = compute_distance_matrix(data, method)
+    np.testing.assert_allclose(dedup.to_numpy(), plain.to_numpy(), rtol=1e-10, atol=1e-12, equal_nan=True)
+
+    compact = compute_distance_matrix(data, method, expand=False)
+    assert isinstance(compact, IndexedMatrix)
+    assert compact.shape == plain.shape
+    np.testing.assert_allclose(compact.to_frame().to_numpy(), plain.to_numpy(), rtol=1e-10, atol=1e-12,
+                               equal_nan=True)
+    order = np.arange(len(data))[::-1]
+    np.testing.assert_allclose(compact.reorder(order, order)[:, :], plain.to_numpy()[np.ix_(order, order)],
+                               rtol=1e-10, atol=1e-12, equal_nan=True)
+
+    tiled = compute_distance_matrix(data, method, strategy="tiled", scratch_dir=str(tmp_path))
+    np.testing.assert_allclose(tiled.to_numpy(), plain.to_numpy(), rtol=1e-10, atol=1e-12, equal_nan=True)
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_cross_distance_matches_submatrix(method):
+    data = _data()
+    dense = compute_distance_matrix(data, method)
+    a, b = data.iloc[:12], data.iloc[8:30]
+
+    cross = cross_distance(a, b, method)
+    pd.testing.assert_index_equal(cross.index, a.index)
+    pd.testing.assert_index_equal(cross.columns, b.index)
+    np.testing.assert_allclose(cross.to_numpy(), dense.loc[a.index, b.index].to_numpy(), rtol=1e-9, atol=1e-9,
+                               equal_nan=True)
+    # A、B 共有的变量与自身的距离精确为 0
+    for label in a.index.intersection(b.index):
+        assert cross.loc[label, label] == 0.0
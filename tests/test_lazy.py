@@ -0,0 +1,62 @@
+"""按需计算的距离矩阵与完整方阵一致"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.distance import compute_distance_matrix
+from core.lazy import LazyDistanceMatrix
+
+METHODS = ["euclidean", "information"]
+
+
+def _data(n=50, m=30, seed=1):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=(n, m))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    return pd.DataFrame(values, index=[f"v{i}" for i in range(n)], columns=[f"s{j}" for j in range(m)])
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_blocks_match_dense(method):
+    data = _data()
+    dense = compute_distance_matrix(data, method).to_numpy()
+    lazy = LazyDistanceMatrix(data, method, block_rows=8)
+
+    assert lazy.shape == dense.shape
+    np.testing.assert_allclose(lazy[:, :], dense, rtol=1e-9, atol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(lazy[5:30:3, 2:40], dense[5:30:3, 2:40], rtol=1e-9, atol=1e-9, equal_nan=True)
+    positions = np.array([49, 0, 17])
+    np.testing.assert_allclose(lazy.rows(positions), dense[positions], rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_submatrix_matches_dense(method):
+    data = _data()
+    dense = compute_distance_matrix(data, method)
+    lazy = LazyDistanceMatrix(data, method)
+
+    rows, columns = ["v3", "v40", "v7"], ["v1", "v3", "v49"]
+    pd.testing.assert_frame_equal(lazy.submatrix(rows, columns), dense.loc[rows, columns], rtol=1e-9, atol=1e-9)
+    pd.testing.assert_frame_equal(lazy.submatrix(rows), dense.loc[rows], rtol=1e-9, atol=1e-9)
+    with pytest.raises(KeyError):
+        lazy.submatrix(["nope"])
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_neighbors_match_dense(method):
+    data = _data()
+    dense = compute_distance_matrix(data, method)
+    lazy = LazyDistanceMatrix(data, method, block_rows=8)
+
+    row = dense.loc["v10"].drop("v10").dropna().sort_values(kind="stable")
+    # 只算一行，和行块已缓存时取到的结果一致
+    first = lazy.neighbors("v10", k=6)
+    lazy.rows(np.arange(8, 16))
+    cached = lazy.neighbors("v10", k=6)
+    for neighbours in (first, cached):
+        np.testing.assert_allclose(neighbours.to_numpy(), row.to_numpy()[:6], rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(dense.loc["v10", neighbours.index].to_numpy(), neighbours.to_numpy(),
+                                   rtol=1e-9, atol=1e-9)
+        assert "v10" not in neighbours.index
+    with pytest.raises(ValueError):
+        lazy.neighbors("v10", k=0)
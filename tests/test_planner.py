@@ -0,0 +1,92 @@
+"""执行策略的选择，以及按计划执行的结果与内存计算一致"""
+import collections
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import core.planner as planner
+from core.distance import compute_distance_matrix
+from core.planner import estimate, plan_distance
+
+N, M = 2000, 100
+
+
+def _data(n=60, m=25, seed=2, nan=0.1):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=(n, m))
+    values[rng.random(values.shape) < nan] = np.nan
+    return pd.DataFrame(values, index=[f"v{i}" for i in range(n)], columns=[f"s{j}" for j in range(m)])
+
+
+@pytest.mark.parametrize("method", ["euclidean", "information"])
+def test_auto_prefers_dense_when_it_fits(tmp_path, method):
+    plan = plan_distance(N, M, method, budget="1G", scratch_dir=str(tmp_path))
+    assert plan.strategy == "dense"
+    assert plan.feasible
+    assert plan.peak_bytes == estimate(N, M, method, "dense")[0]
+
+
+def test_auto_falls_back_to_tiled_within_budget(tmp_path):
+    budget = 10 * 1024 * 1024
+    plan = plan_distance(N, M, "euclidean", budget=budget, scratch_dir=str(tmp_path))
+    assert estimate(N, M, "euclidean", "dense")[0] > budget
+    assert plan.strategy == "tiled"
+    assert plan.feasible and plan.peak_bytes <= budget
+    assert 1 <= plan.tile_rows < N
+    assert plan.disk_bytes == N * N * 8
+
+
+def test_auto_uses_topk_without_scratch_space(tmp_path, monkeypatch):
+    usage = collections.namedtuple("usage", "total used free")
+    monkeypatch.setattr(planner.shutil, "disk_usage", lambda path: usage(0, 0, 0))
+    plan = plan_distance(N, M, "euclidean", budget="10M", k=5, scratch_dir=str(tmp_path))
+    assert plan.strategy == "topk"
+    assert plan.k == 5
+
+
+def test_auto_reports_infeasible_budget(tmp_path):
+    plan = plan_distance(N, M, "euclidean", budget="20K", scratch_dir=str(tmp_path))
+    assert plan.strategy == "topk"
+    assert not plan.feasible
+
+
+def test_missing_values_raise_the_estimate(tmp_path):
+    plain = plan_distance(N, M, "euclidean", budget="100M", scratch_dir=str(tmp_path))
+    masked = plan_distance(N, M, "euclidean", budget="100M", scratch_dir=str(tmp_path), has_nan=True)
+    assert plain.strategy == "dense"
+    # 掩码核的内存放不进同一预算，改为分块
+    assert estimate(N, M, "euclidean", "dense", has_nan=True)[0] > estimate(N, M, "euclidean", "dense")[0]
+    assert masked.strategy == "tiled"
+    assert masked.feasible
+    assert masked.tile_rows < plain.tile_rows
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        plan_distance(0, M, "euclidean")
+    with pytest.raises(ValueError):
+        plan_distance(N, M, "euclidean", strategy="nope")
+    with pytest.raises(ValueError):
+        estimate(N, M, "cosine", "dense")
+
+
+@pytest.mark.parametrize("method", ["euclidean", "information"])
+def test_planned_result_matches_dense(tmp_path, method):
+    data = _data()
+    dense = compute_distance_matrix(data, method)
+    has_nan = method == "euclidean"
+    # 放不下完整矩阵、但放得下几行的预算
+    budget = estimate(len(data), data.shape[1], method, "tiled", tile_rows=8, has_nan=has_nan)[0]
+    plan = plan_distance(len(data), data.shape[1], method, budget=budget, scratch_dir=str(tmp_path),
+                         has_nan=has_nan)
+    assert plan.strategy == "tiled" and plan.tile_rows < len(data)
+
+    result = compute_distance_matrix(data, method, strategy="auto", budget=budget, scratch_dir=str(tmp_path))
+    assert result.attrs["path"].startswith(str(tmp_path))
+    np.testing.assert_allclose(result.to_numpy(), dense.to_numpy(), rtol=1e-10, atol=1e-12, equal_nan=True)
+
+
+def test_infeasible_auto_plan_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        compute_distance_matrix(_data(), "information", strategy="auto", budget="1K", scratch_dir=str(tmp_path))
@@ -0,0 +1,48 @@
+"""会话文件的保存与打开"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.distance import compute_distance_matrix, discretize, information_distance
+from core.session import save_session, open_session
+
+
+def _data(n=30, m=40, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=(n, m))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    return pd.DataFrame(values, index=[f"v{i}" for i in range(n)], columns=[f"s{j}" for j in range(m)])
+
+
+def test_round_trip_values_and_labels(tmp_path):
+    data = _data()
+    dist = compute_distance_matrix(data, "euclidean")
+    path = str(tmp_path / "a.corr")
+    save_session(path, {"data": data, "eudistance": dist}, {"eudistance": {"method": "euclidean"}})
+
+    session = open_session(path)
+    assert session.stages == ["data", "eudistance"]
+    assert session.params == {"eudistance": {"method": "euclidean"}}
+    pd.testing.assert_frame_equal(session.load("data"), data)
+    pd.testing.assert_frame_equal(session.load("eudistance"), dist)
+
+
+@pytest.mark.parametrize("discretizer", ["quantile", "grid"])
+def test_integer_codes_keep_their_meaning(tmp_path, discretizer):
+    data = _data()
+    codes = discretize(data, discretizer, bins=5)
+    expected = information_distance(codes)
+    path = str(tmp_path / "b.corr")
+    save_session(path, {"discretized_data": codes, "infodistance": expected})
+
+    loaded = open_session(path).load("discretized_data")
+    assert loaded.attrs["discretizer"] == discretizer
+    assert (loaded.to_numpy() == -1).any()
+    np.testing.assert_allclose(information_distance(loaded).to_numpy(), expected.to_numpy(), atol=1e-12)
+
+
+def test_topk_long_table(tmp_path):
+    nearest = compute_distance_matrix(_data().fillna(0), "euclidean", strategy="topk", k=3)
+    path = str(tmp_path / "c.corr")
+    save_session(path, {"eudistance": nearest})
+    pd.testing.assert_frame_equal(open_session(path).load("eudistance"), nearest)
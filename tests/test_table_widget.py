@@ -0,0 +1,35 @@
+"""距离结果表格的界面测试（offscreen 平台运行）"""
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication
+
+from core.distance import compute_distance_matrix
+from pages.distance.widgets import tableWidget
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def test_topk_long_table(app):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(12, 8)), index=[f"v{i}" for i in range(12)])
+    nearest = compute_distance_matrix(df, "euclidean", strategy="topk", k=3)
+    assert isinstance(nearest.index, pd.MultiIndex)
+
+    table = tableWidget()
+    table.addItem(nearest)
+    model = table.table.model()
+
+    assert model.rowCount() == len(nearest)
+    assert model.headerData(0, Qt.Vertical, Qt.DisplayRole) == " / ".join(map(str, nearest.index[0]))
+    assert model.headerData(0, Qt.Horizontal, Qt.DisplayRole) == "distance"
+    assert float(model.data(model.index(0, 0))) == pytest.approx(nearest.iloc[0, 0], abs=1e-6)
@@ -134,6 +134,29 @@ class Ui_distance_page(object):
         self.uploadCoordButton.setObjectName("uploadCoordButton")
         self.horizontalLayout_10.addWidget(self.uploadCoordButton)
         self.functionVerticalLayout.addLayout(self.horizontalLayout_10)
+        self.horizontalLayout_16 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_16.setContentsMargins(-1, 5, -1, 5)
+        self.horizontalLayout_16.setObjectName("horizontalLayout_16")
+        self.label_16 = BodyLabel(self.widget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.label_16.sizePolicy().hasHeightForWidth())
+        self.label_16.setSizePolicy(sizePolicy)
+        self.label_16.setMinimumSize(QtCore.QSize(0, 25))
+        self.label_16.setObjectName("label_16")
+        self.horizontalLayout_16.addWidget(self.label_16)
+        spacerItem4 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.horizontalLayout_16.addItem(spacerItem4)
+        self.openSessionButton = PushButton(self.widget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.openSessionButton.sizePolicy().hasHeightForWidth())
+        self.openSessionButton.setSizePolicy(sizePolicy)
+        self.openSessionButton.setObjectName("openSessionButton")
+        self.horizontalLayout_16.addWidget(self.openSessionButton)
+        self.functionVerticalLayout.addLayout(self.horizontalLayout_16)
         self.horizontalLayout_14 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_14.setContentsMargins(-1, 5, -1, 5)
         self.horizontalLayout_14.setObjectName("horizontalLayout_14")
@@ -146,8 +169,8 @@ class Ui_distance_page(object):
         self.label_14.setMinimumSize(QtCore.QSize(0, 25))
         self.label_14.setObjectName("label_14")
         self.horizontalLayout_14.addWidget(self.label_14)
-        spacerItem4 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-        self.horizontalLayout_14.addItem(spacerItem4)
+        spacerItem5 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.horizontalLayout_14.addItem(spacerItem5)
         self.discreteDataButton = PushButton(self.widget)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
         sizePolicy.setHorizontalStretch(0)
@@ -169,8 +192,8 @@ class Ui_distance_page(object):
         self.label_3.setMinimumSize(QtCore.QSize(0, 25))
         self.label_3.setObjectName("label_3")
         self.horizontalLayout_3.addWidget(self.label_3)
-        spacerItem5 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-        self.horizontalLayout_3.addItem(spacerItem5)
+        spacerItem6 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.horizontalLayout_3.addItem(spacerItem6)
         self.euDistSwitch = SwitchButton(self.widget)
         self.euDistSwitch.setObjectName("euDistSwitch")
         self.horizontalLayout_3.addWidget(self.euDistSwitch)
@@ -187,8 +210,8 @@ class Ui_distance_page(object):
         self.label_4.setMinimumSize(QtCore.QSize(0, 25))
         self.label_4.setObjectName("label_4")
         self.horizontalLayout_4.addWidget(self.label_4)
-        spacerItem6 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-        self.horizontalLayout_4.addItem(spacerItem6)
+        spacerItem7 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.horizontalLayout_4.addItem(spacerItem7)
         self.infoDistSwitch = SwitchButton(self.widget)
         self.infoDistSwitch.setObjectName("infoDistSwitch")
         self.horizontalLayout_4.addWidget(self.infoDistSwitch)
@@ -205,8 +228,8 @@ class Ui_distance_page(object):
         self.label_5.setMinimumSize(QtCore.QSize(0, 25))
         self.label_5.setObjectName("label_5")
         self.horizontalLayout_5.addWidget(self.label_5)
-        spacerItem7 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-        self.horizontalLayout_5.addItem(spacerItem7)
+        spacerItem8 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.horizontalLayout_5.addItem(spacerItem8)
         self.calDistButton = PushButton(self.widget)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
         sizePolicy.setHorizontalStretch(0)
@@ -228,8 +251,8 @@ class Ui_distance_page(object):
         self.label_15.setMinimumSize(QtCore.QSize(0, 25))
         self.label_15.setObjectName("label_15")
         self.horizontalLayout_15.addWidget(self.label_15)
-        spacerItem8 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-        self.horizontalLayout_15.addItem(spacerItem8)
+        spacerItem9 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.horizontalLayout_15.addItem(spacerItem9)
         self.reduceDimButton = PushButton(self.widget)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
         sizePolicy.setHorizontalStretch(0)
@@ -239,6 +262,47 @@ class Ui_distance_page(object):
         self.reduceDimButton.setObjectName("reduceDimButton")
         self.horizontalLayout_15.addWidget(self.reduceDimButton)
         self.functionVerticalLayout.addLayout(self.horizontalLayout_15)
+        self.horizontalLayout_19 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_19.setContentsMargins(-1, 5, -1, 5)
+        self.horizontalLayout_19.setObjectName("horizontalLayout_19")
+        self.label_19 = BodyLabel(self.widget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.label_19.sizePolicy().hasHeightForWidth())
+        self.label_19.setSizePolicy(sizePolicy)
+        self.label_19.setMinimumSize(QtCore.QSize(0, 25))
+        self.label_19.setObjectName("label_19")
+        self.horizontalLayout_19.addWidget(self.label_19)
+        spacerItem10 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.horizontalLayout_19.addItem(spacerItem10)
+        self.clusterButton = PushButton(self.widget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.clusterButton.sizePolicy().hasHeightForWidth())
+        self.clusterButton.setSizePolicy(sizePolicy)
+        self.clusterButton.setObjectName("clusterButton")
+        self.horizontalLayout_19.addWidget(self.clusterButton)
+        self.functionVerticalLayout.addLayout(self.horizontalLayout_19)
+        self.horizontalLayout_20 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_20.setContentsMargins(-1, 5, -1, 5)
+        self.horizontalLayout_20.setObjectName("horizontalLayout_20")
+        self.label_20 = BodyLabel(self.widget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.label_20.sizePolicy().hasHeightForWidth())
+        self.label_20.setSizePolicy(sizePolicy)
+        self.label_20.setMinimumSize(QtCore.QSize(0, 25))
+        self.label_20.setObjectName("label_20")
+        self.horizontalLayout_20.addWidget(self.label_20)
+        spacerItem11 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.horizontalLayout_20.addItem(spacerItem11)
+        self.neighborLineEdit = SearchLineEdit(self.widget)
+        self.neighborLineEdit.setObjectName("neighborLineEdit")
+        self.horizontalLayout_20.addWidget(self.neighborLineEdit)
+        self.functionVerticalLayout.addLayout(self.horizontalLayout_20)
         self.horizontalLayout_7 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_7.setContentsMargins(-1, 5, -1, 5)
         self.horizontalLayout_7.setObjectName("horizontalLayout_7")
@@ -251,8 +315,8 @@ class Ui_distance_page(object):
         self.label_7.setMinimumSize(QtCore.QSize(0, 25))
         self.label_7.setObjectName("label_7")
         self.horizontalLayout_7.addWidget(self.label_7)
-        spacerItem9 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-        self.horizontalLayout_7.addItem(spacerItem9)
+        spacerItem12 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.horizontalLayout_7.addItem(spacerItem12)
         self.drawButton = PushButton(self.widget)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
         sizePolicy.setHorizontalStretch(0)
@@ -274,8 +338,8 @@ class Ui_distance_page(object):
         self.label_11.setMinimumSize(QtCore.QSize(0, 25))
         self.label_11.setObjectName("label_11")
         self.horizontalLayout_11.addWidget(self.label_11)
-        spacerItem10 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-        self.horizontalLayout_11.addItem(spacerItem10)
+        spacerItem13 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.horizontalLayout_11.addItem(spacerItem13)
         self.downloadDiscreteDataButton = PushButton(self.widget)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
         sizePolicy.setHorizontalStretch(0)
@@ -297,8 +361,8 @@ class Ui_distance_page(object):
         self.label_6.setMinimumSize(QtCore.QSize(0, 25))
         self.label_6.setObjectName("label_6")
         self.horizontalLayout_6.addWidget(self.label_6)
-        spacerItem11 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-        self.horizontalLayout_6.addItem(spacerItem11)
+        spacerItem14 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.horizontalLayout_6.addItem(spacerItem14)
         self.downloadEuDistButton = PushButton(self.widget)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
         sizePolicy.setHorizontalStretch(0)
@@ -320,8 +384,8 @@ class Ui_distance_page(object):
         self.label_9.setMinimumSize(QtCore.QSize(0, 25))
         self.label_9.setObjectName("label_9")
         self.horizontalLayout_9.addWidget(self.label_9)
-        spacerItem12 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-        self.horizontalLayout_9.addItem(spacerItem12)
+        spacerItem15 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.horizontalLayout_9.addItem(spacerItem15)
         self.downloadInfoDistButton = PushButton(self.widget)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
         sizePolicy.setHorizontalStretch(0)
@@ -343,8 +407,8 @@ class Ui_distance_page(object):
         self.label_12.setMinimumSize(QtCore.QSize(0, 25))
         self.label_12.setObjectName("label_12")
         self.horizontalLayout_12.addWidget(self.label_12)
-        spacerItem13 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-        self.horizontalLayout_12.addItem(spacerItem13)
+        spacerItem16 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.horizontalLayout_12.addItem(spacerItem16)
         self.downloadCoordButton = PushButton(self.widget)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
         sizePolicy.setHorizontalStretch(0)
@@ -366,8 +430,8 @@ class Ui_distance_page(object):
         self.label_13.setMinimumSize(QtCore.QSize(0, 25))
         self.label_13.setObjectName("label_13")
         self.horizontalLayout_13.addWidget(self.label_13)
-        spacerItem14 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-        self.horizontalLayout_13.addItem(spacerItem14)
+        spacerItem17 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.horizontalLayout_13.addItem(spacerItem17)
         self.downloadPlotButton = PushButton(self.widget)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
         sizePolicy.setHorizontalStretch(0)
@@ -377,9 +441,78 @@ class Ui_distance_page(object):
         self.downloadPlotButton.setObjectName("downloadPlotButton")
         self.horizontalLayout_13.addWidget(self.downloadPlotButton)
         self.functionVerticalLayout.addLayout(self.horizontalLayout_13)
+        self.horizontalLayout_17 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_17.setContentsMargins(-1, 5, -1, 5)
+        self.horizontalLayout_17.setObjectName("horizontalLayout_17")
+        self.label_17 = BodyLabel(self.widget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.label_17.sizePolicy().hasHeightForWidth())
+        self.label_17.setSizePolicy(sizePolicy)
+        self.label_17.setMinimumSize(QtCore.QSize(0, 25))
+        self.label_17.setObjectName("label_17")
+        self.horizontalLayout_17.addWidget(self.label_17)
+        spacerItem18 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.horizontalLayout_17.addItem(spacerItem18)
+        self.saveSessionButton = PushButton(self.widget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.saveSessionButton.sizePolicy().hasHeightForWidth())
+        self.saveSessionButton.setSizePolicy(sizePolicy)
+        self.saveSessionButton.setObjectName("saveSessionButton")
+        self.horizontalLayout_17.addWidget(self.saveSessionButton)
+        self.functionVerticalLayout.addLayout(self.horizontalLayout_17)
+        self.horizontalLayout_18 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_18.setContentsMargins(-1, 5, -1, 5)
+        self.horizontalLayout_18.setObjectName("horizontalLayout_18")
+        self.label_18 = BodyLabel(self.widget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.label_18.sizePolicy().hasHeightForWidth())
+        self.label_18.setSizePolicy(sizePolicy)
+        self.label_18.setMinimumSize(QtCore.QSize(0, 25))
+        self.label_18.setObjectName("label_18")
+        self.horizontalLayout_18.addWidget(self.label_18)
+        spacerItem19 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.horizontalLayout_18.addItem(spacerItem19)
+        self.traceButton = PushButton(self.widget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.traceButton.sizePolicy().hasHeightForWidth())
+        self.traceButton.setSizePolicy(sizePolicy)
+        self.traceButton.setObjectName("traceButton")
+        self.horizontalLayout_18.addWidget(self.traceButton)
+        self.functionVerticalLayout.addLayout(self.horizontalLayout_18)
+        self.horizontalLayout_21 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_21.setContentsMargins(-1, 5, -1, 5)
+        self.horizontalLayout_21.setObjectName("horizontalLayout_21")
+        self.label_21 = BodyLabel(self.widget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.label_21.sizePolicy().hasHeightForWidth())
+        self.label_21.setSizePolicy(sizePolicy)
+        self.label_21.setMinimumSize(QtCore.QSize(0, 25))
+        self.label_21.setObjectName("label_21")
+        self.horizontalLayout_21.addWidget(self.label_21)
+        spacerItem20 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.horizontalLayout_21.addItem(spacerItem20)
+        self.runtimeButton = PushButton(self.widget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.runtimeButton.sizePolicy().hasHeightForWidth())
+        self.runtimeButton.setSizePolicy(sizePolicy)
+        self.runtimeButton.setObjectName("runtimeButton")
+        self.horizontalLayout_21.addWidget(self.runtimeButton)
+        self.functionVerticalLayout.addLayout(self.horizontalLayout_21)
         self.verticalLayout.addWidget(self.widget)
-        spacerItem15 = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-        self.verticalLayout.addItem(spacerItem15)
+        spacerItem21 = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.verticalLayout.addItem(spacerItem21)
         self.scrollArea.setWidget(self.scrollAreaWidgetContents)
         self.mainHorizontalLayout.addWidget(self.scrollArea)
         self.showVerticalLayout = QtWidgets.QVBoxLayout()
@@ -407,6 +540,8 @@ class Ui_distance_page(object):
         self.uploadInfoDistButton.setText(_translate("distance_page", "导入信息距离"))
         self.label_10.setText(_translate("distance_page", "导入坐标"))
         self.uploadCoordButton.setText(_translate("distance_page", "导入坐标"))
+        self.label_16.setText(_translate("distance_page", "打开会话"))
+        self.openSessionButton.setText(_translate("distance_page", "打开会话"))
         self.label_14.setText(_translate("distance_page", "数据离散化"))
         self.discreteDataButton.setText(_translate("distance_page", "数据离散化"))
         self.label_3.setText(_translate("distance_page", "欧式距离"))
@@ -415,6 +550,10 @@ class Ui_distance_page(object):
         self.calDistButton.setText(_translate("distance_page", "计算距离"))
         self.label_15.setText(_translate("distance_page", "降维"))
         self.reduceDimButton.setText(_translate("distance_page", "降维"))
+        self.label_19.setText(_translate("distance_page", "层次聚类"))
+        self.clusterButton.setText(_translate("distance_page", "层次聚类"))
+        self.label_20.setText(_translate("distance_page", "近邻查询"))
+        self.neighborLineEdit.setPlaceholderText(_translate("distance_page", "输入变量名"))
         self.label_7.setText(_translate("distance_page", "绘制图像"))
         self.drawButton.setText(_translate("distance_page", "绘制图像"))
         self.label_11.setText(_translate("distance_page", "导出离散化数据"))
@@ -427,4 +566,10 @@ class Ui_distance_page(object):
         self.downloadCoordButton.setText(_translate("distance_page", "导出坐标"))
         self.label_13.setText(_translate("distance_page", "导出图像"))
         self.downloadPlotButton.setText(_translate("distance_page", "导出图像"))
-from qfluentwidgets import BodyLabel, PushButton, SwitchButton, TabBar
+        self.label_17.setText(_translate("distance_page", "保存会话"))
+        self.saveSessionButton.setText(_translate("distance_page", "保存会话"))
+        self.label_18.setText(_translate("distance_page", "性能面板"))
+        self.traceButton.setText(_translate("distance_page", "性能面板"))
+        self.label_21.setText(_translate("distance_page", "运行设置"))
+        self.runtimeButton.setText(_translate("distance_page", "运行设置"))
+from qfluentwidgets import BodyLabel, PushButton, SearchLineEdit, SwitchButton, TabBar